@@ -0,0 +1,110 @@
+"""Import-time budget of the entry points, measured with ``python -X importtime``.
+
+Each entry point is imported in a fresh interpreter a few times and the best
+run is kept.  An entry point fails its budget when
+
+- it imports one of its deferred modules (altair, flask, polars, the
+  settings.py catalog...), which should only load with the feature using
+  them, or
+- the modules of this repository take longer than ``own_ms`` to import.
+  pandas, numpy and the other third-party libraries are reported but not
+  budgeted: their import time depends on the machine, not on this code.
+
+Run from the repository root::
+
+    python benchmarks/import_time.py            # exits 1 when over budget
+    python benchmarks/import_time.py --runs 10 --scale 2
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+OWN_MODULES = ("class_schedule", "online_schedule_checker")
+
+# modules only the feature using them should load
+DEFERRED = (
+    "altair",
+    "flask",
+    "polars",
+    "class_schedule.polars_engine",
+    "class_schedule.settings",
+)
+# entry point -> (budget of the repository's own modules in ms, deferred modules)
+BUDGETS = {
+    "class_schedule.main": (10, ("pandas", "numpy") + DEFERRED),
+    "class_schedule.helper": (40, DEFERRED),
+    "class_schedule.visualisation": (40, DEFERRED),
+    # the web app needs flask, and draws its charts after the first upload
+    "online_schedule_checker": (80, tuple(name for name in DEFERRED if name != "flask")),
+}
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def import_times(module: str) -> dict[str, tuple[int, int]]:
+    """(self, cumulative) import time in µs of every module ``module`` imports."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            times[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return times
+
+
+def is_own(name: str) -> bool:
+    return name.split(".")[0] in OWN_MODULES
+
+
+def measure(module: str, runs: int) -> tuple[float, float, set[str]]:
+    """Best total and own-module import time in ms, and the modules imported."""
+    best_total = best_own = float("inf")
+    for _ in range(runs):
+        times = import_times(module)
+        best_total = min(best_total, times[module][1] / 1000)
+        own = sum(self_us for name, (self_us, _) in times.items() if is_own(name))
+        best_own = min(best_own, own / 1000)
+    return best_total, best_own, set(times)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="imports per entry point (5)")
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiply the budgets, on slow machines"
+    )
+    parser.add_argument("modules", nargs="*", help="entry points (all of BUDGETS)")
+    args = parser.parse_args(argv)
+
+    failures = []
+    for module in args.modules or BUDGETS:
+        own_ms, deferred = BUDGETS[module]
+        total, own, imported = measure(module, args.runs)
+        budget = own_ms * args.scale
+        loaded = sorted(name for name in deferred if name in imported)
+        status = "ok" if own <= budget and not loaded else "OVER"
+        print(
+            f"{status:4} {module:30} total {total:7.1f} ms"
+            f"  own {own:6.1f} ms (budget {budget:.0f})"
+        )
+        if own > budget:
+            failures.append(f"{module}: own modules took {own:.1f} ms > {budget:.0f} ms")
+        if loaded:
+            failures.append(f"{module}: imports {', '.join(loaded)}")
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
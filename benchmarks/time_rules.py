@@ -0,0 +1,165 @@
+"""Golden check and micro-benchmark of the time normalization (utilities.TIME_RULES).
+
+``legacy_times`` below is the chain of column-wide str.replace passes that
+clean_and_harmonize_times ran before the rules became a table.  The fused
+pass must give the same strings and flag the same rows on
+
+- GOLDEN_TIMES, the spellings met in the schedules so far, and
+- the time column of each workbook given on the command line.
+
+Each is then timed: the legacy chain, the fused pass without memoization
+and the fused pass with its memo warm, as on a second upload.
+
+Run from the repository root::
+
+    python benchmarks/time_rules.py                     # exits 1 on a mismatch
+    python benchmarks/time_rules.py schedule.xlsx --sheet "GENERAL SCHEDULE" --scale 50
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from class_schedule.utilities import normalize_times  # noqa: E402
+
+GOLDEN_TIMES = [
+    "8:00-9:30am",
+    "8:00-9:30 AM",
+    "8.00-9.30am",
+    "8;00-9:30am",
+    "8:00 - 9:30 am",
+    "8 9am",
+    "10:00-12 noon",
+    "12noon-1:30pm",
+    "12:00-1:30p",
+    "1:00\u20132:30pm",
+    "1:00\u20142:30pm",
+    "4:00-5:20pm pm",
+    "4:00-5:20pmpm",
+    "8:00-9:30ampm",
+    "9:30-12:30pm/1:00-2:30pm",
+    "TBA",
+    "tba",
+    "",
+    " ",
+    "nan",
+    "None",
+    None,
+    np.nan,
+    pd.NA,
+    9.3,
+    930,
+    "2:40-5:4:10pm",
+    "8:00:-930am",
+    "1:00-2:30p\n",
+]
+RULES = ("repeated_pm", "dots", "semicolons", "tba_default")
+
+
+def legacy_times(times: pd.Series) -> tuple[pd.Series, dict]:
+    """The normalized times and rule masks, as the former str.replace chain made them.
+
+    Missing times are set aside first: the chain looked for them after "noon"
+    had rewritten them, so they reached split_time_interval as "pmapm".
+    """
+    time_series = times.astype(str).str.lower()
+    missing = time_series.str.fullmatch(r"\s*(?:nan|none|<na>)?\s*")
+    time_series = time_series.mask(missing, pd.NA)
+    time_series = time_series.str.replace("\u2013", "-", regex=False)
+    time_series = time_series.str.replace("\u2014", "-", regex=False)
+    time_series = time_series.str.replace("no?o?n?", "pm", regex=True)
+    time_series = time_series.str.replace("pmpm", "pm", regex=False)
+    time_series = time_series.str.replace("ampm", "am", regex=False)
+    time_series = time_series.str.replace(
+        r"(\d) (\d)", lambda m: f"{m.groups()[0]}-{m.groups()[1]}", regex=True
+    )
+    masks = {"repeated_pm": time_series.str.contains("pm.*pm")}
+    time_series = time_series.str.replace(" ", "")
+    masks["dots"] = time_series.str.contains(".", regex=False)
+    time_series = time_series.str.replace(".", ":")
+    masks["semicolons"] = time_series.str.contains(";", regex=False)
+    time_series = time_series.str.replace(";", ":")
+    default_time = "01:01-02:02am"
+    masks["tba_default"] = time_series.isna() | time_series.str.contains(
+        "tba", regex=False, na=False
+    )
+    time_series = time_series.fillna(default_time)
+    time_series = time_series.str.replace("tba", default_time)
+    time_series = time_series.str.replace(
+        "(.*)p$", lambda m: f"{m.groups()[0]}pm", regex=True
+    )
+    return time_series, masks
+
+
+def differences(times: pd.Series) -> list[str]:
+    """How the fused pass differs from legacy_times on ``times``; empty if it does not."""
+    expected, expected_masks = legacy_times(times)
+    got, masks = normalize_times(times, memoize=False)
+    problems = []
+    changed = expected.to_numpy(dtype=object) != got.to_numpy(dtype=object)
+    for value, want, have in zip(times[changed], expected[changed], got[changed]):
+        problems.append(f"{value!r}: {have!r} instead of {want!r}")
+    for rule in RULES:
+        want = expected_masks[rule].to_numpy(dtype=bool, na_value=False)
+        have = masks.get(rule, np.zeros(len(times), dtype=bool))
+        wrong = want != have
+        for value, flagged in zip(times[wrong], have[wrong]):
+            problems.append(f"{value!r}: {rule} is {flagged}, not {not flagged}")
+    return problems
+
+
+def best_ms(func, runs: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=runs)) * 1000
+
+
+def workbook_times(path, sheet) -> pd.Series:
+    from class_schedule.helper import load_general_schedule
+
+    return load_general_schedule(path, sheet).time
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("workbooks", nargs="*", help="general schedule workbooks")
+    parser.add_argument("--sheet", default="GENERAL SCHEDULE", help="(GENERAL SCHEDULE)")
+    parser.add_argument("--runs", type=int, default=5, help="timings per variant (5)")
+    parser.add_argument(
+        "--scale", type=int, default=1, help="repeat each time column, for larger sheets"
+    )
+    args = parser.parse_args(argv)
+
+    columns = {"golden times": pd.Series(GOLDEN_TIMES, dtype=object)}
+    for path in args.workbooks:
+        columns[path] = workbook_times(path, args.sheet)
+
+    failures = 0
+    for name, times in columns.items():
+        problems = differences(times)
+        failures += len(problems)
+        for problem in problems:
+            print(f"MISMATCH {name}: {problem}", file=sys.stderr)
+
+        times = pd.concat([times] * args.scale, ignore_index=True)
+        normalize_times(times)  # warm the memo
+        legacy = best_ms(lambda: legacy_times(times), args.runs)
+        fused = best_ms(lambda: normalize_times(times, memoize=False), args.runs)
+        memo = best_ms(lambda: normalize_times(times), args.runs)
+        status = "ok" if not problems else "DIFF"
+        distinct = times.nunique(dropna=False)
+        print(
+            f"{status:4} {name:30} {len(times):7} rows {distinct:6} distinct"
+            f"  legacy {legacy:7.2f} ms  fused {fused:7.2f} ms  memo {memo:7.2f} ms"
+            f"  ({legacy / memo:.1f}x)"
+        )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Serve processed schedules as filtered, projected and paginated records."""
+
+from __future__ import annotations
+
+import base64
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FILTER_COLUMNS = ("college", "weekday", "instructor", "location", "cid")
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 5000
+
+
+@dataclass
+class RecordSet:
+    """A processed frame with one value -> row positions index per filter column."""
+
+    data: pd.DataFrame
+    index: dict[str, dict[str, np.ndarray]] = field(default_factory=dict)
+
+
+def _index_key(value) -> str:
+    return str(value).strip().casefold()
+
+
+def build_filter_index(df: pd.DataFrame) -> dict[str, dict[str, np.ndarray]]:
+    """Map each value of the filter columns to the sorted row positions holding it.
+
+    The keys are casefolded so ``?college=coba`` and ``?college=COBA`` agree.
+    """
+    index = {}
+    for col in FILTER_COLUMNS:
+        if col not in df.columns:
+            continue
+        codes, uniques = pd.factorize(df.loc[:, col], use_na_sentinel=True)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        col_index: dict[str, np.ndarray] = {}
+        for code, value in enumerate(uniques):
+            positions = order[bounds[code] : bounds[code + 1]]
+            key = _index_key(value)
+            if key in col_index:
+                positions = np.union1d(col_index[key], positions)
+            col_index[key] = positions
+        index[col] = col_index
+    return index
+
+
+def make_record_set(df: pd.DataFrame) -> RecordSet:
+    """Wrap a processed frame with its precomputed filter index."""
+    data = df.reset_index(drop=True)
+    return RecordSet(data=data, index=build_filter_index(data))
+
+
+# processed workbook path -> (mtime, record set) of the last version seen
+_RECORD_SETS: dict[str, tuple[float, RecordSet]] = {}
+
+
+def remember_record_set(path, df: pd.DataFrame) -> RecordSet:
+    """Index a frame just written to ``path`` so the API does not read it back."""
+    path = Path(path)
+    record_set = make_record_set(df)
+    _RECORD_SETS[str(path)] = (path.stat().st_mtime, record_set)
+    return record_set
+
+
+def load_record_set(path) -> Optional[RecordSet]:
+    """Return the record set of a processed workbook, reloaded only when it changes."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    mtime = path.stat().st_mtime
+    cached = _RECORD_SETS.get(str(path))
+    if cached is None or cached[0] != mtime:
+        logger.info("Loading processed records from %s", path)
+        cached = (mtime, make_record_set(pd.read_excel(path)))
+        _RECORD_SETS[str(path)] = cached
+    return cached[1]
+
+
+def encode_cursor(position: int) -> str:
+    return base64.urlsafe_b64encode(str(position).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """Return the row position a cursor points past; -1 for the first page."""
+    if not cursor:
+        return -1
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except ValueError as exc:
+        raise ValueError(f"Invalid cursor {cursor!r}") from exc
+
+
+def select_positions(
+    record_set: RecordSet, filters: Mapping[str, Iterable[str]]
+) -> np.ndarray:
+    """Intersect the index entries of every filter; values of one filter are OR-ed."""
+    positions = np.arange(len(record_set.data))
+    for col, values in filters.items():
+        if col not in FILTER_COLUMNS:
+            raise ValueError(f"Cannot filter on {col!r}; use one of {FILTER_COLUMNS}")
+        col_index = record_set.index.get(col, {})
+        keys = [_index_key(v) for v in values]
+        matches = [col_index[key] for key in keys if key in col_index]
+        selected = (
+            np.unique(np.concatenate(matches)) if matches else np.array([], dtype=int)
+        )
+        positions = np.intersect1d(positions, selected, assume_unique=True)
+    return positions
+
+
+def query_records(
+    record_set: RecordSet,
+    filters: Optional[Mapping[str, Iterable[str]]] = None,
+    fields: Optional[list[str]] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> tuple[pd.DataFrame, Optional[str], int]:
+    """Return the page of records after ``cursor``, the next cursor and the match count."""
+    if fields:
+        unknown = [f for f in fields if f not in record_set.data.columns]
+        if unknown:
+            raise ValueError(f"Unknown fields {unknown}")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    positions = select_positions(record_set, filters or {})
+    start = np.searchsorted(positions, decode_cursor(cursor), side="right")
+    page = positions[start : start + limit]
+    next_cursor = encode_cursor(int(page[-1])) if start + limit < len(positions) else None
+
+    columns = fields or list(record_set.data.columns)
+    return record_set.data.iloc[page].loc[:, columns], next_cursor, len(positions)
+
+
+def records_to_json(page: pd.DataFrame) -> list[dict]:
+    """Serialise a page of records to JSON-ready dicts, timestamps in ISO format."""
+    records: list[dict] = json.loads(page.to_json(orient="records", date_format="iso"))
+    return records
+
+
+def records_to_arrow(page: pd.DataFrame) -> bytes:
+    """Serialise a page of records as an Arrow IPC stream."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(page, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    data: bytes = sink.getvalue().to_pybytes()
+    return data
@@ -0,0 +1,249 @@
+"""Course catalog: the college of each course, loaded from settings.py on first use.
+
+settings.py stays the hand-maintained source.  It is read as data (not
+imported) into a CourseCatalog whose keys are normalized, so that spelling
+variants of a title ("&" / "and", case, spacing) find the same course; an
+entry written exactly as in the sheet still wins.  The built catalog is
+pickled next to the module and reused while settings.py keeps its
+modification time.
+"""
+
+from __future__ import annotations
+
+import ast
+import logging
+import os
+import pickle
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_PATH = Path(__file__).resolve().parent / "settings.py"
+# bump when CourseCatalog, normalize_title or title_ngrams change
+CATALOG_VERSION = 3
+CACHE_PATH = (
+    Path(__file__).resolve().parent / "__pycache__" / f"catalog.v{CATALOG_VERSION}.pickle"
+)
+SETTINGS_NAMES = ("course_colleged", "course_prefix_college", "course_code_mapping")
+AMPERSAND = re.compile(r"\s*&\s*")
+SPACES = re.compile(r"\s+")
+NGRAM = 3
+# suggestions scoring below this share too few trigrams to be the same course
+MIN_SUGGESTION_SCORE = 0.6
+
+
+def normalize_title(title) -> Optional[str]:
+    """Casefolded title with "&" written "and" and single spaces; None if not text."""
+    if not isinstance(title, str):
+        return None
+    title = AMPERSAND.sub(" and ", title.casefold())
+    return SPACES.sub(" ", title).strip()
+
+
+def course_key(cidno_sess, title, year) -> Optional[tuple]:
+    """Normalized (cidno_sess, course_title, year) key of a course."""
+    title = normalize_title(title)
+    if title is None or not isinstance(cidno_sess, str):
+        return None
+    return (cidno_sess.strip().casefold(), title, str(year))
+
+
+def title_ngrams(title) -> frozenset:
+    """Character trigrams of the normalized title, padded so short words count."""
+    title = normalize_title(title)
+    if not title:
+        return frozenset()
+    padded = f"  {title} "
+    return frozenset(padded[i : i + NGRAM] for i in range(len(padded) - NGRAM + 1))
+
+
+@dataclass
+class CourseCatalog:
+    """Colleges by normalized course key, by course prefix, and course-code aliases."""
+
+    mtime_ns: int = 0
+    colleges: dict = field(default_factory=dict)
+    prefix_colleges: dict = field(default_factory=dict)
+    code_mapping: dict = field(default_factory=dict)
+    # the settings.py entries, as written
+    entries: dict = field(default_factory=dict)
+    # inverted index of the entry titles: trigram -> title numbers
+    titles: list = field(default_factory=list)
+    title_sizes: list = field(default_factory=list)
+    title_entries: list = field(default_factory=list)
+    title_index: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_settings(cls, path=SETTINGS_PATH) -> "CourseCatalog":
+        """Read the mappings of settings.py without importing it."""
+        path = Path(path)
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+        values = {}
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1:
+                name = getattr(node.targets[0], "id", None)
+                if name in SETTINGS_NAMES:
+                    values[name] = ast.literal_eval(node.value)
+        missing = [name for name in SETTINGS_NAMES if name not in values]
+        if missing:
+            raise ValueError(f"{path} does not define {missing}")
+
+        catalog = cls(
+            mtime_ns=path.stat().st_mtime_ns,
+            prefix_colleges=values["course_prefix_college"],
+            code_mapping=values["course_code_mapping"],
+            entries=values["course_colleged"],
+        )
+        for entry, college in catalog.entries.items():
+            key = course_key(*entry)
+            if key is None:
+                logger.debug("%s has no course number or title; not indexed", entry)
+                continue
+            known = catalog.colleges.setdefault(key, college)
+            if known != college:
+                logger.warning(
+                    "%s and another entry normalize alike; keeping %s", entry, known
+                )
+        catalog._index_titles()
+        return catalog
+
+    def _index_titles(self) -> None:
+        numbers = {}
+        for entry in self.entries:
+            title = normalize_title(entry[1])
+            if title is None:
+                continue
+            if title not in numbers:
+                numbers[title] = len(self.titles)
+                grams = title_ngrams(title)
+                self.titles.append(title)
+                self.title_sizes.append(len(grams))
+                self.title_entries.append([])
+                for gram in grams:
+                    self.title_index.setdefault(gram, []).append(numbers[title])
+            self.title_entries[numbers[title]].append(entry)
+
+    def suggest(
+        self, cidno_sess, title, limit=3, min_score=MIN_SUGGESTION_SCORE
+    ) -> list[dict]:
+        """Entries whose title is closest to ``title``, best first.
+
+        The score is the Dice coefficient of the title trigrams; only titles
+        sharing a trigram with ``title`` are scored.  At equal score the
+        entries of the same cidno_sess come first.
+        """
+        grams = title_ngrams(title)
+        shared: Counter[int] = Counter()
+        for gram in grams:
+            shared.update(self.title_index.get(gram, ()))
+        cidno_sess = str(cidno_sess).strip().casefold()
+        suggestions = []
+        for number, count in shared.items():
+            score = 2 * count / (len(grams) + self.title_sizes[number])
+            if score < min_score:
+                continue
+            for entry in self.title_entries[number]:
+                suggestions.append(
+                    {
+                        "cidno_sess": entry[0],
+                        "course_title": entry[1],
+                        "year": entry[2],
+                        "college": self.entries[entry],
+                        "score": round(score, 3),
+                    }
+                )
+        suggestions.sort(
+            key=lambda s: (-s["score"], s["cidno_sess"].strip().casefold() != cidno_sess)
+        )
+        return suggestions[:limit]
+
+    def lookup(self, cidno_sess, title, year) -> Optional[str]:
+        """College of the entry as written in settings.py, else of its normalized key."""
+        college = self.entries.get((cidno_sess, title, year))
+        if college is None:
+            college = self.colleges.get(course_key(cidno_sess, title, year))
+        return college
+
+    def college(self, cidno_sess, title, year, course_code=None) -> Optional[str]:
+        """College of a course, else of its course-code prefix, else None."""
+        college = self.lookup(cidno_sess, title, year)
+        if college is None and course_code is not None:
+            college = self.prefix_colleges.get(str(course_code).upper())
+        return college
+
+    def save(self, path=CACHE_PATH) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump(self, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+
+def _load_cached(path, mtime_ns) -> Optional[CourseCatalog]:
+    try:
+        with open(path, "rb") as fh:
+            catalog = pickle.load(fh)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if isinstance(catalog, CourseCatalog) and catalog.mtime_ns == mtime_ns:
+        return catalog
+    return None
+
+
+_catalog: Optional[CourseCatalog] = None
+
+
+def get_catalog() -> CourseCatalog:
+    """The catalog of settings.py, built once and cached while settings.py is unchanged."""
+    global _catalog
+    mtime_ns = SETTINGS_PATH.stat().st_mtime_ns
+    if _catalog is not None and _catalog.mtime_ns == mtime_ns:
+        return _catalog
+
+    catalog = _load_cached(CACHE_PATH, mtime_ns)
+    if catalog is None:
+        catalog = CourseCatalog.from_settings(SETTINGS_PATH)
+        try:
+            catalog.save(CACHE_PATH)
+        except OSError as exc:
+            logger.debug("Could not cache the course catalog: %s", exc)
+        logger.info("Built the course catalog: %s courses", len(catalog.colleges))
+    _catalog = catalog
+    return catalog
+
+
+def suggest_courses(unmapped, catalog=None, report=None) -> list[dict]:
+    """Catalog suggestions for the unmapped (cidno_sess, course_title, year, course_code).
+
+    With a ``report`` dict they are added to its "course_suggestions".
+    """
+    catalog = catalog or get_catalog()
+    suggestions = []
+    for cidno_sess, title, year, course_code in dict.fromkeys(unmapped):
+        matches = catalog.suggest(cidno_sess, title)
+        suggestions.append(
+            {
+                "cidno_sess": cidno_sess,
+                "course_title": title,
+                "year": year,
+                "course_code": course_code,
+                "suggestions": matches,
+            }
+        )
+        if matches:
+            logger.info(
+                "%s %r may be %s %r (score %s)",
+                cidno_sess,
+                title,
+                matches[0]["cidno_sess"],
+                matches[0]["course_title"],
+                matches[0]["score"],
+            )
+    if report is not None:
+        report.setdefault("course_suggestions", []).extend(suggestions)
+    return suggestions
@@ -1,20 +1,25 @@
 """Fonction pour nettoyer un fichier de schedule de TU."""
 
+import numpy as np
 import pandas as pd  # read_csv, timedelta, timestamp, conv__dt, DataFrame
 from class_schedule.utilities import (
     time_filter,
     clean,
     split_time_interval,
     get_datetimes,
-    build_date,
     get_week_days,
-    log_offending_rows,
-)
-from class_schedule.settings import (
-    course_colleged,
-    course_code_mapping,
-    course_prefix_college,
+    meridiem_flips,
+    normalize_times,
+    keep_extension_dtypes,
+    uses_arrow_dtypes,
+    add_clock_columns,
+    clock_minutes,
+    MINUTES_PER_DAY,
+    WEEKDAY_INDEX,
+    TIME_ERRATUM,
 )
+from class_schedule.catalog import get_catalog, suggest_courses
+from class_schedule.quality import record_anomalies
 
 import logging
 
@@ -30,7 +35,10 @@ def general_cleaning(df, logger=logger):
     Actions:
     - Removes extra spaces from column names.
     - Harmonizes column names to lowercase with underscores.
-    - Strips excess spaces from string values in all columns.
+    - Lowercases the days and time columns.
+
+    String values are stripped once, when the sheet is loaded (see
+    utilities.normalize_text_columns).
 
     Logs:
     - Logs the start and completion of the cleaning process.
@@ -57,80 +65,49 @@ def general_cleaning(df, logger=logger):
     # assert "college" in df.columns, f"'college' should be df.columns={df.columns}"
     # df.loc[:, "college"] = df.college.str.upper()
 
-    for c in df:
-        if isinstance(df[c].iloc[0], str):
-            df[c] = df[c].str.strip().replace(r"  +", " ", regex=True)
     logger.info("Completed general cleaning.")
     return df
 
 
-def clean_and_harmonize_times(df):
+def clean_and_harmonize_times(df, report=None):
     """Clean and standardize the time column in the DataFrame.
         Actions:
     - Converts time to lowercase.
-    - Replaces common typos and standardizes formats.
+    - Replaces common typos and standardizes formats (utilities.TIME_RULES).
     Parameters:
     - df (pd.DataFrame): DataFrame containing a 'time' column.
+    - report (dict): receives the rows with repeated pm, dots, semicolons
+      or no time (see quality.record_anomalies).
 
     Returns:
     - pd.DataFrame: DataFrame with cleaned and standardized time values.
     """
     logger.info("cleaning and harmonizing times.")
 
-    time_series = df.time.astype(str).str.lower()
-    # normalize unicode dashes before further parsing
-    time_series = time_series.str.replace("\u2013", "-", regex=False)
-    time_series = time_series.str.replace("\u2014", "-", regex=False)
-
-    # we replace "noon" with "pm" to later ease the convertion of time in dt.
-    time_series = time_series.str.replace("no?o?n?", "pm", regex=True)
-
-    # handle stray duplicates like "pmpm" or "ampm"
-    time_series = time_series.str.replace("pmpm", "pm", regex=False)
-    time_series = time_series.str.replace("ampm", "am", regex=False)
-
-    time_series = time_series.str.replace(
-        r"(\d) (\d)", lambda m: f"{m.groups()[0]}-{m.groups()[1]}", regex=True
-    )
-
-    rows_with_pm_repeated = time_series.str.contains(r"(?P<A>pm).*(?P=A)")
-    log_offending_rows(df, rows_with_pm_repeated, msg='pm is repeating')
-
-    time_series = time_series.str.replace(" ", "")
-    rows_with_dots = time_series.str.contains(r"\.")
-    log_offending_rows(df,rows_with_dots, msg='dots are repeating')
-    time_series = time_series.str.replace(".", ":")
-
-    rows_with_semicols = time_series.str.contains(r"\;")
-    log_offending_rows(df, rows_with_semicols, msg="; is")
-    time_series = time_series.str.replace(";", ":")
-
-    default_time = "01:01-02:02am"
-    time_series = time_series.replace({"nan": pd.NA, "none": pd.NA})
-    time_series = time_series.fillna(default_time)
-    time_series = time_series.str.replace("tba", default_time)
-
-    time_series = time_series.str.replace(
-        "(.*)p$", lambda m: f"{m.groups()[0]}pm", regex=True
-    )
+    original = df.time.copy()
+    # one pass of utilities.TIME_RULES over each distinct time string
+    time_series, flagged = normalize_times(df.time)
 
     df.loc[:, "time"] = time_series
 
     no_meridium = ~df.time.apply(time_filter)
     df.loc[no_meridium, "time"] = df.loc[no_meridium, "time"].apply(lambda x: x + "pm")
+    for rule, mask in flagged.items():
+        record_anomalies(report, rule, mask, original, df.time)
     logger.info("Completed time cleaning and harmonization.")
 
     # standardize staff name
-    f = df.loc[:,'instructor'].str.lower() == 'staff'
+    f = (df.loc[:,'instructor'].str.lower() == 'staff').fillna(False)
     df.loc[f,'instructor'] = 'Staff'
     return df
 
 
-def getting_start_end_times(df):
+def getting_start_end_times(df, report=None):
     """
     Extract start time, end time, and meridium from the 'time' column.
     Parameters:
     - df (pd.DataFrame): DataFrame containing a 'time' column.
+    - report (dict): receives the start and end times fixed from TIME_ERRATUM.
 
     Returns:
     - pd.DataFrame: DataFrame with new columns: 'stime', 'etime', 'meridium'.
@@ -141,26 +118,50 @@ def getting_start_end_times(df):
     time_cols = ("stime", "etime", "meridium")
     df.loc[:, time_cols] = split_interval
 
+    split_times = df.loc[:, ["stime", "etime"]]
     df.loc[:, "stime"] = df.stime.apply(clean)
     # no need of meridum in start time.  is deducted from etime meridum
     # and relative amplitude
     df.loc[:, "etime"] = df.etime.apply(clean)
+    for col in ("stime", "etime"):
+        mistyped = split_times[col].isin(list(TIME_ERRATUM))
+        record_anomalies(report, "erratum", mistyped, split_times[col], df[col], col)
     logger.info("Completed extraction of start and end times.")
     return df
 
 
-def add_duration(df):
-    """Calculate duration for each course based on start and end times.
+def add_timestamps(df, report=None):
+    """Build the sts and ets datetimes from 'stime', 'etime' and 'meridium'.
     Parameters:
     - df (pd.DataFrame): DataFrame containing 'stime', 'etime', and 'meridium'.
+    - report (dict): receives the rows whose meridium get_datetimes swaps.
     Returns:
-    - pd.DataFrame: DataFrame with additional duration columns.
+    - pd.DataFrame: DataFrame with 'sts' and 'ets' columns.
     """
-    logger.info("Calculating course durations.")
     time_cols = ("stime", "etime", "meridium")
+    if report is not None:
+        flipped = meridiem_flips(df.stime, df.etime, df.meridium)
+        swapped = df.meridium.map({"am": "pm", "pm": "am"})
+        record_anomalies(
+            report, "meridiem_flip", flipped, df.meridium, swapped, "meridium"
+        )
     _tmp = df.loc[:, time_cols].apply(get_datetimes, axis=1, result_type="expand")
     _tmp.columns = ("sts", "ets")
     df.loc[:, ("sts", "ets")] = _tmp
+    return df
+
+
+def add_duration(df):
+    """Calculate duration for each course based on start and end times.
+    Parameters:
+    - df (pd.DataFrame): DataFrame containing 'sts' and 'ets', or 'stime',
+      'etime', and 'meridium' to build them from.
+    Returns:
+    - pd.DataFrame: DataFrame with additional duration columns.
+    """
+    logger.info("Calculating course durations.")
+    if "sts" not in df.columns:
+        df = add_timestamps(df)
     df.loc[:, "duration_td"] = df.ets - df.sts
     df.loc[:, "duration_sec"] = df.duration_td.dt.seconds
     df.loc[:, "duration_str"] = df.duration_sec.apply(
@@ -170,10 +171,32 @@ def add_duration(df):
     return df
 
 
-def add_course_id_year_college(df, course_colleged=course_colleged):
+YEARS = {
+    "1": "Freshmen",
+    "2": "Sophomore",
+    "3": "Junior",
+    "4": "Senior",
+    "5": "Senior",
+}
+
+
+def infer_year(course_no):
+    """Map the first numeric digit of course_no to a year label."""
+    if pd.isna(course_no):
+        return "Unknown"
+    digits = [ch for ch in str(course_no) if ch.isdigit()]
+    if not digits:
+        return "Unknown"
+    return YEARS.get(digits[0], "Unknown")
+
+
+def add_course_id_year_college(df, catalog=None, report=None):
     """Generate unique course IDs, determine year level, and assign college.
     Parameters:
     - df (pd.DataFrame): Schedule DataFrame.
+    - catalog (CourseCatalog): defaults to catalog.get_catalog().
+    - report (dict): receives the catalog suggestions for the unmapped courses
+      under "course_suggestions".
     Returns:
     - pd.DataFrame: DataFrame with added columns for course ID, year, and college.
     """
@@ -187,42 +210,38 @@ def add_course_id_year_college(df, course_colleged=course_colleged):
     # keeping a id without sessname
     df.loc[:, "cidno_sess"] = df.cid.str.split("_s").apply(lambda x: x[0])
 
-    years = {
-        "1": "Freshmen",
-        "2": "Sophomore",
-        "3": "Junior",
-        "4": "Senior",
-        "5": "Senior",
-    }
-
-    def _infer_year(course_no):
-        """Map the first numeric digit of course_no to a year label."""
-        if pd.isna(course_no):
-            return "Unknown"
-        digits = [ch for ch in str(course_no) if ch.isdigit()]
-        if not digits:
-            return "Unknown"
-        return years.get(digits[0], "Unknown")
-
-    df.loc[:, "year"] = df.course_no.apply(_infer_year)
+    df.loc[:, "year"] = df.course_no.apply(infer_year)
+
+    college_dtype = df.college.dtype
+    if isinstance(college_dtype, pd.CategoricalDtype):
+        # new colleges are not among the categories yet
+        df["college"] = df.college.astype(object)
 
+    catalog = catalog or get_catalog()
     college_cols = ["cidno_sess", "course_title", "year"]
     not_in_curriculum_courses = []
     for idx, values in df[college_cols].iterrows():
         key = tuple(values.values)
-        try:
-            df.loc[idx, "college"] = course_colleged[key]
+        college = catalog.lookup(*key)
+        if college is not None:
+            df.loc[idx, "college"] = college
             continue
-        except KeyError:
-            prefix_value = df.loc[idx, "course_code"]
-            if isinstance(prefix_value, pd.Series):
-                prefix_value = prefix_value.iloc[0]
-            prefix = str(prefix_value).upper()
-            fallback_college = course_prefix_college.get(prefix)
-            if fallback_college:
-                df.loc[idx, "college"] = fallback_college
-                continue
-            not_in_curriculum_courses.append((key, prefix))
+        prefix_value = df.loc[idx, "course_code"]
+        if isinstance(prefix_value, pd.Series):
+            prefix_value = prefix_value.iloc[0]
+        prefix = str(prefix_value).upper()
+        fallback_college = catalog.prefix_colleges.get(prefix)
+        if fallback_college:
+            df.loc[idx, "college"] = fallback_college
+            continue
+        not_in_curriculum_courses.append((key, prefix))
+
+    if isinstance(college_dtype, pd.CategoricalDtype):
+        df["college"] = df.college.astype("category")
+    if uses_arrow_dtypes(df):
+        df = df.astype(
+            {"cid": "string[pyarrow]", "cidno_sess": "string[pyarrow]", "year": "category"}
+        )
 
     if not_in_curriculum_courses:
         logger.warning(
@@ -230,6 +249,9 @@ def add_course_id_year_college(df, course_colleged=course_colleged):
             " seen before.  We need to update the course_colleged variable in"
             " file settings.py <<"
         )
+        suggest_courses(
+            [(*key, prefix) for key, prefix in not_in_curriculum_courses], catalog, report
+        )
 
     logger.info("Completed generation of course IDs and assignment of colleges.")
     return df
@@ -247,38 +269,33 @@ def expand_days(df):
 
     logger.info("Expanding days into separate rows.")
 
-    tdf = pd.concat([expand_row(row) for _, row in df.iterrows()]).reset_index(drop=True)
+    days = [meeting_days(value) for value in df.days]
+    counts = [len(d) for d in days]
+    wday = np.fromiter(
+        (WEEKDAY_INDEX[day] for row_days in days for day in row_days), dtype=np.uint8
+    )
+    start = np.repeat(clock_minutes(df.sts), counts) + wday.astype(np.int16) * MINUTES_PER_DAY
+    end = np.repeat(clock_minutes(df.ets), counts) + wday.astype(np.int16) * MINUTES_PER_DAY
+
+    tdf = df.drop(columns=["sts", "ets"]).iloc[np.repeat(np.arange(len(df)), counts)]
+    tdf = tdf.assign(oldidx=tdf.index).reset_index(drop=True).infer_objects()
+    tdf.insert(0, "wday", wday)
+    tdf.insert(1, "start_mow", start.astype(np.int16))
+    tdf.insert(2, "end_mow", end.astype(np.int16))
     logger.info("Completed expansion of days.")
     return tdf
 
 
-def expand_row(row):
+def meeting_days(days) -> list[str]:
+    """Weekday codes of a Days value, in week order.
+
+    A missing or unreadable value gives two Sunday meetings so it's obvious.
     """
-    Transform a single row with a days combined into.
-    a dataframe with potentialy two rows where two new columns show
-    start and end times for one specific days"""
     try:
-        days = get_week_days(row.days)
+        codes = get_week_days(days) or []
     except Exception:
-        # in case of error is no days attributed then put them on sunday
-        # so it's obvious
-        days = ["S", "S"]
-
-    start_times = [build_date(day, row.sts) for day in days]
-    end_times = [build_date(day, row.ets) for day in days]
-
-    # drop this to avoid confusion
-    row = row.drop(["sts", "ets"])
-
-    data = {"sts": start_times, "ets": end_times}
-    n = len(start_times)
-    for i in row.index:
-        data[i] = [row[i]] * n
-    data["oldidx"] = row.name
-
-    tdf = pd.DataFrame(data)
-
-    return tdf
+        return ["S", "S"]
+    return sorted(codes, key=WEEKDAY_INDEX.__getitem__)
 
 
 def add_weekname(tdf):
@@ -292,14 +309,15 @@ def add_weekname(tdf):
     """
     logger.info("Adding weekday names.")
 
-    tdf.loc[:, "weekday"] = tdf.sts.dt.day_name()
-    tdf.loc[:, "time_start"] = tdf.sts.apply(lambda ts: ts.strftime("%H:%M"))
-    tdf.loc[:, "time_end"] = tdf.ets.apply(lambda ts: ts.strftime("%H:%M"))
+    clock = add_clock_columns(tdf)
+    tdf = tdf.assign(
+        weekday=clock.weekday, time_start=clock.start_time, time_end=clock.end_time
+    )
     logger.info("Completed expansion of days.")
     return tdf
 
 
-def special_applied_epidemiology_course(df: pd.DataFrame):
+def special_applied_epidemiology_course(df: pd.DataFrame, next_index=None):
     """
     Transform a single row with combined days into multiple rows, one per day.
 
@@ -316,6 +334,9 @@ def special_applied_epidemiology_course(df: pd.DataFrame):
     Parameters:
         df (pd.DataFrame): The DataFrame containing course offerings, which
                            must include 'time', 'days', and 'credit' columns.
+        next_index: index given to the added course.  Defaults to the one
+                    following the last row of df; pass it when df is only a
+                    slice of the schedule.
 
     Returns:
         pd.DataFrame: The updated DataFrame with the special case courses added.
@@ -332,7 +353,7 @@ def special_applied_epidemiology_course(df: pd.DataFrame):
 
     if len(special_course) == 1:
         new_course = pd.concat([special_course, special_course])
-        new_course.iloc[1, 0] = df.index[-1] + 1
+        new_course.iloc[1, 0] = df.index[-1] + 1 if next_index is None else next_index
         new_course = new_course.set_index("no")
         new_course.loc[:, "time"] = new_course.time.str.split("/").iloc[0]
         new_course.loc[:, "days"] = new_course.days.str.split("/").iloc[0]
@@ -340,22 +361,22 @@ def special_applied_epidemiology_course(df: pd.DataFrame):
         df.loc[new_course.index[0]] = new_course.iloc[0]
 
         _tmp = pd.DataFrame(new_course.iloc[1]).T
-        df = pd.concat([df, _tmp])
+        df = keep_extension_dtypes(pd.concat([df, _tmp]), df)
     else:
         logger.debug("no course are containing '/' ")
 
     return df
 
 
-def harmonize_course_codes(df, mapping=course_code_mapping):
+def harmonize_course_codes(df, mapping=None):
     """
     Given the mapping harmonize the course code to 4 letters codes
 
-    update the course_code_mapping if need to add other courses traduction
+    update the course_code_mapping of settings.py if need to add other courses
+    traduction; it is the default mapping.
     """
-    df.loc[:, "course_code"] = df.course_code.apply(
-        lambda x: course_code_mapping.get(x, x)
-    )
+    mapping = get_catalog().code_mapping if mapping is None else mapping
+    df.loc[:, "course_code"] = df.course_code.apply(lambda x: mapping.get(x, x))
     logger.info("Adding weekday names.")
 
     return df
@@ -0,0 +1,145 @@
+"""Find time clashes between courses taken by the same cohort of students.
+
+A cohort is the students of one college in one year level (Freshmen,
+Sophomore...).  Two different courses of a cohort meeting at the same time
+cannot both be attended by a student taking both.  The schedule does not
+say which courses are required, so every such pair is a potential clash.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import pandas as pd
+
+from class_schedule.class_schedule import infer_year
+from class_schedule.conflicts import PLACEHOLDER_SLOT
+
+logger = logging.getLogger(__name__)
+
+COHORT = ["college", "year"]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+CLASH_COLUMNS = [
+    "college",
+    "year",
+    "day",
+    "cid_a",
+    "cid_b",
+    "course_title_a",
+    "course_title_b",
+    "start_a",
+    "end_a",
+    "start_b",
+    "end_b",
+]
+
+
+def _cohort_meetings(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per dated meeting with its cohort, course and day label.
+
+    Exams without a date (their times fall on 1900-01-01) are left out.
+    """
+    sts = pd.to_datetime(df.sts)
+    ets = pd.to_datetime(df.ets)
+    if "year" in df.columns:
+        year = df.year
+    else:
+        year = df.course_no.map(infer_year)
+    if "course_code" in df.columns and "course_no" in df.columns:
+        course = df.course_code.astype(str) + "_" + df.course_no.astype(str)
+    else:
+        # cid is course_code_course_no_s<section>
+        course = df.cid.astype(str).str.split("_s").str[0]
+    if "exam_date" in df.columns:
+        day = sts.dt.strftime("%Y-%m-%d")
+    else:
+        day = df.weekday if "weekday" in df.columns else sts.dt.day_name()
+
+    meetings = pd.DataFrame(
+        {
+            "college": df.college.values,
+            "year": year.values,
+            "day": day.values,
+            "course": course.str.casefold().values,
+            "cid": df.cid.values,
+            "course_title": df.course_title.values,
+            "start": sts.values,
+            "end": ets.values,
+        }
+    )
+    placeholder = (sts.dt.strftime("%H:%M") == PLACEHOLDER_SLOT[0]).values & (
+        ets.dt.strftime("%H:%M") == PLACEHOLDER_SLOT[1]
+    ).values
+    keep = (
+        ~placeholder
+        & meetings.start.notna()
+        & meetings.end.notna()
+        & meetings.college.notna()
+        & (meetings.year != "Unknown")
+    )
+    if "exam_date" in df.columns:
+        keep &= df.exam_date.notna().values
+    return meetings.loc[keep].sort_values(COHORT + ["day", "start"], kind="stable")
+
+
+def _sweep(group: pd.DataFrame) -> list[tuple]:
+    """Overlapping pairs of different courses in one cohort-day, in start order."""
+    pairs: list[tuple] = []
+    # itertuples rows: namedtuples of the cohort-day columns
+    active: list[Any] = []
+    for meeting in group.itertuples(index=False):
+        active = [other for other in active if other.end > meeting.start]
+        pairs.extend(
+            (other, meeting) for other in active if other.course != meeting.course
+        )
+        active.append(meeting)
+    return pairs
+
+
+def find_cohort_clashes(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Return the cohort x day clash matrix and the potentially clashing pairs.
+
+    Every overlapping pair of different courses of a cohort is listed, as
+    the schedule does not tell required courses from electives.
+
+    Works on processed schedules (days are weekdays) and on processed exam
+    schedules (days are exam dates; the year comes from the course number).
+    """
+    meetings = _cohort_meetings(df)
+    records = []
+    for (college, year, day), group in meetings.groupby(COHORT + ["day"], sort=False):
+        for a, b in _sweep(group):
+            records.append(
+                {
+                    "college": college,
+                    "year": year,
+                    "day": day,
+                    "cid_a": a.cid,
+                    "cid_b": b.cid,
+                    "course_title_a": a.course_title,
+                    "course_title_b": b.course_title,
+                    "start_a": a.start.strftime("%H:%M"),
+                    "end_a": a.end.strftime("%H:%M"),
+                    "start_b": b.start.strftime("%H:%M"),
+                    "end_b": b.end.strftime("%H:%M"),
+                }
+            )
+    pairs = pd.DataFrame(records, columns=CLASH_COLUMNS)
+
+    seen = set(meetings.day)
+    days = [d for d in WEEKDAYS if d in seen] + sorted(seen.difference(WEEKDAYS))
+    matrix = (
+        pairs.groupby(COHORT + ["day"]).size().unstack("day", fill_value=0)
+        if len(pairs)
+        else pd.DataFrame(index=pd.MultiIndex.from_tuples([], names=COHORT))
+    )
+    matrix = matrix.reindex(columns=days, fill_value=0).reset_index()
+    matrix.columns.name = None
+    logger.info(
+        "Found %s potential cohort clashes in %s of %s cohorts",
+        len(pairs),
+        len(matrix),
+        meetings.groupby(COHORT).ngroups,
+    )
+    return matrix, pairs
@@ -0,0 +1,466 @@
+"""Detect room and instructor double-bookings and simulate schedule moves.
+
+Meetings are kept in one sorted interval list per (day, resource value), so a
+moved meeting only has to be checked against the few meetings sharing its new
+room or instructor on its new day.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from class_schedule.utilities import (
+    MINUTES_PER_DAY,
+    WEEK_START,
+    WEEK_TIME_COLUMNS,
+    build_date,
+)
+
+logger = logging.getLogger(__name__)
+
+RESOURCES = ("location", "instructor")
+# values that are placeholders rather than a real room or person
+IGNORED_VALUES = {
+    "location": {"", "tba", "nan", "none", "office", "online", "field"},
+    "instructor": {"", "tba", "staff", "nan", "none"},
+}
+# clean_and_harmonize_times gives unscheduled courses this slot
+PLACEHOLDER_SLOT = ("01:01", "02:02")
+PLACEHOLDER_MINUTES = (61, 122)
+NS_PER_MINUTE = 60 * 10**9
+
+WEEKDAY_CODES = {
+    "Monday": "m",
+    "Tuesday": "t",
+    "Wednesday": "w",
+    "Thursday": "th",
+    "Friday": "f",
+    "Saturday": "s",
+    "Sunday": "S",
+}
+
+CONFLICT_COLUMNS = [
+    "resource",
+    "value",
+    "day",
+    "row_a",
+    "row_b",
+    "cid_a",
+    "cid_b",
+    "start_a",
+    "end_a",
+    "start_b",
+    "end_b",
+]
+UNDATED_EXAM_COLUMNS = ["cid", "college", "location", "instructor", "start", "end"]
+
+EXAM_CONFLICT_COLUMNS = [
+    "resource",
+    "value",
+    "exam_date",
+    "cid_a",
+    "college_a",
+    "cid_b",
+    "college_b",
+    "start_a",
+    "end_a",
+    "start_b",
+    "end_b",
+]
+
+
+@dataclass
+class Meeting:
+    row: int
+    cid: str
+    day: pd.Timestamp
+    start: int
+    end: int
+    location: object
+    instructor: object
+
+
+def resource_key(value) -> str:
+    """A room or instructor as compared: "AC-30 " and "ac-30" are the same room."""
+    return str(value).strip().casefold()
+
+
+def usable_value(resource: str, value) -> bool:
+    """False for missing or placeholder rooms and instructors (TBA, Staff...)."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return False
+    return resource_key(value) not in IGNORED_VALUES[resource]
+
+
+class IntervalIndex:
+    """Sorted (start, end, row) intervals per (day, resource value)."""
+
+    def __init__(self, resource: str):
+        self.resource = resource
+        self.buckets: dict[tuple, list[tuple[int, int, int]]] = {}
+        self.longest: dict[tuple, int] = {}
+
+    def key(self, meeting: Meeting) -> Optional[tuple]:
+        value = getattr(meeting, self.resource)
+        if not usable_value(self.resource, value):
+            return None
+        return (meeting.day, resource_key(value))
+
+    def add(self, meeting: Meeting) -> None:
+        key = self.key(meeting)
+        if key is None:
+            return
+        bisect.insort(
+            self.buckets.setdefault(key, []), (meeting.start, meeting.end, meeting.row)
+        )
+        span = meeting.end - meeting.start
+        self.longest[key] = max(self.longest.get(key, 0), span)
+
+    def remove(self, meeting: Meeting) -> None:
+        key = self.key(meeting)
+        if key is None:
+            return
+        bucket = self.buckets[key]
+        bucket.pop(bisect.bisect_left(bucket, (meeting.start, meeting.end, meeting.row)))
+
+    def overlapping(self, meeting: Meeting) -> list[int]:
+        """Rows sharing the meeting's resource and day whose time overlaps it."""
+        key = self.key(meeting)
+        if key is None or key not in self.buckets:
+            return []
+        bucket = self.buckets[key]
+        # nothing starting before start - longest can still be running at start
+        lo = bisect.bisect_left(bucket, (meeting.start - self.longest[key],))
+        hi = bisect.bisect_left(bucket, (meeting.end,))
+        return [
+            row
+            for start, end, row in bucket[lo:hi]
+            if end > meeting.start and row != meeting.row
+        ]
+
+
+def _week_meetings(df: pd.DataFrame) -> pd.DataFrame:
+    """Meeting frame of compact week times, with integer arithmetic only."""
+    start = df.start_mow.to_numpy(dtype=np.int64)
+    end = df.end_mow.to_numpy(dtype=np.int64)
+    placeholder = (start % MINUTES_PER_DAY == PLACEHOLDER_MINUTES[0]) & (
+        end % MINUTES_PER_DAY == PLACEHOLDER_MINUTES[1]
+    )
+    day = (
+        WEEK_START.value
+        + df.wday.to_numpy(dtype=np.int64) * MINUTES_PER_DAY * NS_PER_MINUTE
+    )
+    return pd.DataFrame(
+        {
+            "cid": df.cid.values,
+            "day": day.astype("datetime64[ns]"),
+            "start": WEEK_START.value + start * NS_PER_MINUTE,
+            "end": WEEK_START.value + end * NS_PER_MINUTE,
+            "location": df.location.values,
+            "instructor": df.instructor.values,
+        },
+        index=df.index,
+    ).loc[~placeholder]
+
+
+def _to_meetings(df: pd.DataFrame) -> dict[int, Meeting]:
+    if set(WEEK_TIME_COLUMNS).issubset(df.columns):
+        frame = _week_meetings(df)
+        return {
+            row: Meeting(row, *values)
+            for row, *values in frame.itertuples(index=True, name=None)
+        }
+    sts = pd.to_datetime(df.sts)
+    ets = pd.to_datetime(df.ets)
+    placeholder = (sts.dt.strftime("%H:%M") == PLACEHOLDER_SLOT[0]) & (
+        ets.dt.strftime("%H:%M") == PLACEHOLDER_SLOT[1]
+    )
+    frame = pd.DataFrame(
+        {
+            "cid": df.cid.values,
+            "day": sts.dt.normalize().values,
+            "start": sts.astype("int64").values,
+            "end": ets.astype("int64").values,
+            "location": df.location.values,
+            "instructor": df.instructor.values,
+        },
+        index=df.index,
+    ).loc[~placeholder.values & sts.notna().values & ets.notna().values]
+    return {
+        row: Meeting(row, *values)
+        for row, *values in frame.itertuples(index=True, name=None)
+    }
+
+
+@dataclass
+class ConflictState:
+    """Meetings of a processed schedule, their interval indexes and current clashes."""
+
+    data: pd.DataFrame
+    meetings: dict[int, Meeting] = field(default_factory=dict)
+    indexes: dict[str, IntervalIndex] = field(default_factory=dict)
+    conflicts: set[tuple[str, int, int]] = field(default_factory=set)
+    by_row: dict[int, set[tuple[str, int, int]]] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ConflictState":
+        data = df.reset_index(drop=True)
+        state = cls(data=data, meetings=_to_meetings(data))
+        state.indexes = {resource: IntervalIndex(resource) for resource in RESOURCES}
+        for meeting in state.meetings.values():
+            for index in state.indexes.values():
+                index.add(meeting)
+        for meeting in state.meetings.values():
+            state._record(state._conflicts_of(meeting))
+        logger.info(
+            "Indexed %s meetings, %s conflicts", len(state.meetings), len(state.conflicts)
+        )
+        return state
+
+    def _conflicts_of(self, meeting: Meeting) -> set[tuple[str, int, int]]:
+        found: set[tuple[str, int, int]] = set()
+        for resource, index in self.indexes.items():
+            for other in index.overlapping(meeting):
+                first, second = sorted((meeting.row, other))
+                found.add((resource, first, second))
+        return found
+
+    def _record(self, conflicts: set[tuple[str, int, int]]) -> None:
+        self.conflicts |= conflicts
+        for conflict in conflicts:
+            for row in conflict[1:]:
+                self.by_row.setdefault(row, set()).add(conflict)
+
+    def _place(self, meeting: Meeting) -> None:
+        for index in self.indexes.values():
+            index.add(meeting)
+        self.meetings[meeting.row] = meeting
+        self._record(self._conflicts_of(meeting))
+
+    def _lift(self, meeting: Meeting) -> None:
+        for conflict in self.by_row.pop(meeting.row, set()):
+            self.conflicts.discard(conflict)
+            for row in conflict[1:]:
+                if row != meeting.row:
+                    self.by_row[row].discard(conflict)
+        for index in self.indexes.values():
+            index.remove(meeting)
+
+    def move(self, row: int, **changes) -> Meeting:
+        """Move one meeting, updating the indexes and the conflict set in place.
+
+        Returns the meeting as it was, to be given back to ``restore``.
+        """
+        old = self.meetings[row]
+        self.restore(Meeting(**{**old.__dict__, **changes}))
+        return old
+
+    def restore(self, meeting: Meeting) -> None:
+        """Put ``meeting`` back in place of the current meeting of the same row."""
+        self._lift(self.meetings[meeting.row])
+        self._place(meeting)
+
+    def conflict_records(self, conflicts: Iterable[tuple[str, int, int]]) -> pd.DataFrame:
+        records = []
+        for resource, a, b in sorted(conflicts):
+            ma, mb = self.meetings[a], self.meetings[b]
+            records.append(
+                {
+                    "resource": resource,
+                    "value": getattr(ma, resource),
+                    "day": ma.day.day_name(),
+                    "row_a": a,
+                    "row_b": b,
+                    "cid_a": ma.cid,
+                    "cid_b": mb.cid,
+                    "start_a": pd.Timestamp(ma.start).strftime("%H:%M"),
+                    "end_a": pd.Timestamp(ma.end).strftime("%H:%M"),
+                    "start_b": pd.Timestamp(mb.start).strftime("%H:%M"),
+                    "end_b": pd.Timestamp(mb.end).strftime("%H:%M"),
+                }
+            )
+        return pd.DataFrame(records, columns=CONFLICT_COLUMNS)
+
+
+def find_conflicts(df: pd.DataFrame) -> pd.DataFrame:
+    """List every pair of meetings sharing a room or an instructor at the same time."""
+    state = ConflictState.from_frame(df)
+    return state.conflict_records(state.conflicts)
+
+
+def _parse_clock(value: str) -> pd.Timedelta:
+    try:
+        hours, minutes = str(value).strip().split(":")
+        return pd.Timedelta(hours=int(hours), minutes=int(minutes))
+    except ValueError as exc:
+        raise ValueError(f"Invalid time {value!r}; use HH:MM (24h)") from exc
+
+
+def _moved_meeting(meeting: Meeting, move: dict) -> dict:
+    """Translate a move request into the new attributes of one meeting."""
+    changes: dict = {}
+    start, end = pd.Timestamp(meeting.start), pd.Timestamp(meeting.end)
+    duration = end - start
+    if move.get("to_weekday"):
+        to_weekday = str(move["to_weekday"]).strip().capitalize()
+        if to_weekday not in WEEKDAY_CODES:
+            raise ValueError(f"Unknown weekday {move['to_weekday']!r}")
+        start = pd.Timestamp(build_date(WEEKDAY_CODES[to_weekday], start))
+    if move.get("to_start"):
+        start = start.normalize() + _parse_clock(move["to_start"])
+    end = start + duration
+    if move.get("to_end"):
+        end = start.normalize() + _parse_clock(move["to_end"])
+    if end <= start:
+        raise ValueError(f"Move of {meeting.cid} ends before it starts")
+    changes.update(day=start.normalize(), start=start.value, end=end.value)
+    if move.get("to_location"):
+        changes["location"] = move["to_location"]
+    if move.get("to_instructor"):
+        changes["instructor"] = move["to_instructor"]
+    return changes
+
+
+def _rows_to_move(state: ConflictState, move: dict) -> list[int]:
+    cid = move.get("cid")
+    if not cid:
+        raise ValueError("Each move needs a 'cid'")
+    rows = [
+        r for r, m in state.meetings.items() if m.cid.casefold() == str(cid).casefold()
+    ]
+    if move.get("weekday"):
+        weekday = str(move["weekday"]).strip().capitalize()
+        rows = [r for r in rows if state.meetings[r].day.day_name() == weekday]
+    if not rows:
+        raise ValueError(f"No meeting of {cid!r} matches {move}")
+    if len(rows) > 1 and move.get("to_weekday"):
+        raise ValueError(
+            f"{cid} meets {len(rows)} times; give 'weekday' to pick the one to move"
+        )
+    return rows
+
+
+def simulate_moves(state: ConflictState, moves: list[dict]) -> dict:
+    """Evaluate a batch of moves and report the conflicts it creates and resolves.
+
+    Moves are applied in order on the indexes, compared with the starting
+    conflict set, then undone so ``state`` is left as it was.
+    """
+    with state.lock:
+        before = set(state.conflicts)
+        undo: list[Meeting] = []
+        try:
+            for move in moves:
+                for row in _rows_to_move(state, move):
+                    changes = _moved_meeting(state.meetings[row], move)
+                    undo.append(state.move(row, **changes))
+            after = set(state.conflicts)
+            created = state.conflict_records(after - before)
+        finally:
+            for old in reversed(undo):
+                state.restore(old)
+        resolved = state.conflict_records(before - after)
+
+    return {
+        "created": created,
+        "resolved": resolved,
+        "conflicts_before": len(before),
+        "conflicts_after": len(after),
+    }
+
+
+def find_exam_conflicts(df: pd.DataFrame) -> pd.DataFrame:
+    """List rooms and proctors booked twice on the same exam date and time.
+
+    ``df`` is the exam frame of one or several sheets.  Every (resource,
+    exam_date, value) interval is sorted once and swept in a single pass.
+    A course listed with the same slot on several sheets counts once.
+    Exams without a date (their times fall on 1900-01-01) cannot clash and
+    are skipped; see find_undated_exams.
+    """
+    exams = df.drop_duplicates(
+        subset=["cid", "sts", "ets", "location", "instructor"]
+    ).reset_index(drop=True)
+    undated = exams.exam_date.isna()
+    if undated.any():
+        logger.warning("Skipped %s exams without a date", int(undated.sum()))
+        exams = exams.loc[~undated].reset_index(drop=True)
+    sts = pd.to_datetime(exams.sts)
+    ets = pd.to_datetime(exams.ets)
+    intervals = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "resource": resource,
+                    "value": exams[resource],
+                    "key": exams[resource].map(resource_key),
+                    "exam_date": sts.dt.normalize(),
+                    "start": sts,
+                    "end": ets,
+                    "row": exams.index,
+                }
+            ).loc[lambda d: d.value.map(lambda v: usable_value(resource, v))]
+            for resource in RESOURCES
+        ]
+    )
+    intervals = intervals.loc[intervals.start.notna() & intervals.end.notna()]
+    intervals = intervals.sort_values(
+        ["resource", "exam_date", "key", "start"], kind="stable"
+    )
+
+    records = []
+    group: Optional[tuple] = None
+    active: list = []
+    for interval in intervals.itertuples(index=False):
+        if (interval.resource, interval.exam_date, interval.key) != group:
+            group, active = (interval.resource, interval.exam_date, interval.key), []
+        active = [other for other in active if other.end > interval.start]
+        for other in active:
+            a, b = exams.loc[other.row], exams.loc[interval.row]
+            records.append(
+                {
+                    "resource": interval.resource,
+                    "value": other.value,
+                    "exam_date": interval.exam_date.strftime("%Y-%m-%d"),
+                    "cid_a": a.cid,
+                    "college_a": a.college,
+                    "cid_b": b.cid,
+                    "college_b": b.college,
+                    "start_a": other.start.strftime("%H:%M"),
+                    "end_a": other.end.strftime("%H:%M"),
+                    "start_b": interval.start.strftime("%H:%M"),
+                    "end_b": interval.end.strftime("%H:%M"),
+                }
+            )
+        active.append(interval)
+
+    logger.info(
+        "Found %s exam room/proctor clashes in %s exams", len(records), len(exams)
+    )
+    return pd.DataFrame(records, columns=EXAM_CONFLICT_COLUMNS)
+
+
+def find_undated_exams(df: pd.DataFrame) -> pd.DataFrame:
+    """List the exams find_exam_conflicts skips because they have no exam date."""
+    undated = df.loc[df.exam_date.isna()].drop_duplicates(
+        subset=["cid", "sts", "ets", "location", "instructor"]
+    )
+    return pd.DataFrame(
+        {
+            "cid": undated.cid,
+            "college": undated.college,
+            "location": undated.location,
+            "instructor": undated.instructor,
+            "start": pd.to_datetime(undated.sts).dt.strftime("%H:%M"),
+            "end": pd.to_datetime(undated.ets).dt.strftime("%H:%M"),
+        },
+        columns=UNDATED_EXAM_COLUMNS,
+    ).reset_index(drop=True)
@@ -0,0 +1,98 @@
+"""Compare two processed schedules section by section."""
+
+from __future__ import annotations
+
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+KEY = ["cid", "weekday"]
+COMPARED = ["start_time", "end_time", "location", "instructor"]
+CHANGE_KINDS = ["added", "removed", "moved_time", "moved_room", "changed_instructor"]
+DIFF_COLUMNS = [
+    "change",
+    "cid",
+    "weekday",
+    "course_title",
+    "old_start_time",
+    "new_start_time",
+    "old_end_time",
+    "new_end_time",
+    "old_location",
+    "new_location",
+    "old_instructor",
+    "new_instructor",
+]
+
+
+def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+    """Keep the compared columns and number repeated (cid, weekday) meetings."""
+    df = df.copy()
+    if "start_time" not in df.columns:
+        df.loc[:, "start_time"] = pd.to_datetime(df.sts).dt.strftime("%H:%M")
+        df.loc[:, "end_time"] = pd.to_datetime(df.ets).dt.strftime("%H:%M")
+    if "course_title" not in df.columns:
+        df.loc[:, "course_title"] = pd.NA
+    df = df.loc[:, KEY + ["course_title"] + COMPARED]
+    df = df.sort_values(KEY + ["start_time"], kind="stable")
+    # a section meeting twice the same day pairs its meetings in time order
+    df.loc[:, "nth"] = df.groupby(KEY, sort=False).cumcount()
+    return df
+
+
+def _differs(joined: pd.DataFrame, col: str) -> pd.Series:
+    old, new = joined[f"old_{col}"], joined[f"new_{col}"]
+    return ~((old == new) | (old.isna() & new.isna()))
+
+
+def diff_schedules(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """List the sections added, removed, moved in time, moved room or re-staffed.
+
+    Meetings are matched with a hash join on cid + weekday, so the cost grows
+    linearly with the schedule size.  A meeting with several changes appears
+    once per change.
+    """
+    old, new = _prepare(old), _prepare(new)
+    joined = pd.merge(
+        old.add_prefix("old_").rename(columns={f"old_{k}": k for k in KEY + ["nth"]}),
+        new.add_prefix("new_").rename(columns={f"new_{k}": k for k in KEY + ["nth"]}),
+        on=KEY + ["nth"],
+        how="outer",
+        indicator=True,
+        validate="one_to_one",
+    )
+    joined.loc[:, "course_title"] = joined.new_course_title.fillna(
+        joined.old_course_title
+    )
+
+    both = joined._merge == "both"
+    masks = {
+        "added": joined._merge == "right_only",
+        "removed": joined._merge == "left_only",
+        "moved_time": both
+        & (_differs(joined, "start_time") | _differs(joined, "end_time")),
+        "moved_room": both & _differs(joined, "location"),
+        "changed_instructor": both & _differs(joined, "instructor"),
+    }
+    changes = [
+        joined.loc[mask].assign(change=kind) for kind, mask in masks.items() if mask.any()
+    ]
+    if not changes:
+        return pd.DataFrame(columns=DIFF_COLUMNS)
+
+    result = pd.concat(changes, ignore_index=True).loc[:, DIFF_COLUMNS]
+    logger.info(
+        "Schedule diff: %s",
+        ", ".join(f"{kind}={int(mask.sum())}" for kind, mask in masks.items()),
+    )
+    return result.sort_values(["cid", "weekday", "change"], kind="stable").reset_index(
+        drop=True
+    )
+
+
+def summarize_diff(diff: pd.DataFrame) -> dict[str, int]:
+    """Count the changes of each kind."""
+    counts = diff.change.value_counts()
+    return {kind: int(counts.get(kind, 0)) for kind in CHANGE_KINDS}
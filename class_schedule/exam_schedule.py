@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import logging
 import re
+import time
 from typing import Iterable, Optional
 
 import pandas as pd
@@ -14,7 +15,14 @@ except ImportError as exc:  # pragma: no cover
     raise RuntimeError("openpyxl is required to parse exam schedule workbooks") from exc
 
 from class_schedule.class_schedule import clean_and_harmonize_times
-from class_schedule.utilities import split_time_interval, get_datetimes
+from class_schedule.utilities import (
+    copy_on_write as copy_on_write_mode,
+    get_datetimes,
+    notify_stage,
+    run_stage,
+    to_arrow_dtypes,
+    uses_arrow_dtypes,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -34,6 +42,16 @@ COLUMN_MAP = {
     "time": "time",
 }
 
+EXAM_TIME_PATTERN = re.compile(
+    r"(\d{1,2}(?::\d{2})?\s*(?:am|pm)?\s*(?:-|to)\s*\d{1,2}(?::\d{2})?\s*(?:am|pm))",
+    re.IGNORECASE,
+)
+# the text before the first time range is the day
+DAY_TIME_PATTERN = re.compile(
+    r"^(?P<day>.*?)(?P<time>" + EXAM_TIME_PATTERN.pattern[1:-1] + ")",
+    re.IGNORECASE | re.DOTALL,
+)
+
 
 def _normalize_string_columns(df: pd.DataFrame) -> pd.DataFrame:
     """Apply strip + whitespace normalization to every string column."""
@@ -42,10 +60,10 @@ def _normalize_string_columns(df: pd.DataFrame) -> pd.DataFrame:
     if not len(string_cols):
         return df
 
-    df = df.copy()
-    df.loc[:, string_cols] = df.loc[:, string_cols].apply(
-        lambda s: s.str.strip().str.replace(r"\s+", " ", regex=True)
-    )
+    # a shallow copy: only the replaced columns are new
+    df = df.copy(deep=False)
+    for col in string_cols:
+        df[col] = df[col].str.strip().str.replace(r"\s+", " ", regex=True)
     return df
 
 
@@ -58,8 +76,12 @@ def get_no_index(raw: pd.DataFrame) -> pd.Series:
     return raw.apply(_contains_marker, axis=1)
 
 
-def load_exam_sheet(xl: pd.ExcelFile, sheet: str) -> pd.DataFrame:
-    """Load a sheet and slice the table, preferring native headers when present."""
+def load_exam_sheet(xl: pd.ExcelFile, sheet: str, arrow_dtypes: bool = False) -> pd.DataFrame:
+    """Load a sheet and slice the table, preferring native headers when present.
+
+    With ``arrow_dtypes`` text columns are string[pyarrow] (see
+    utilities.to_arrow_dtypes).
+    """
 
     def _looks_like_header(columns: Iterable) -> bool:
         normalized = [str(col).strip().lower() for col in columns]
@@ -73,7 +95,8 @@ def load_exam_sheet(xl: pd.ExcelFile, sheet: str) -> pd.DataFrame:
         direct = _normalize_string_columns(direct).dropna(how="all")
         if _looks_like_header(direct.columns):
             logger.info("Loaded %s rows from sheet %s using header row 0", len(direct), sheet)
-            return direct.reset_index(drop=True)
+            direct = direct.reset_index(drop=True)
+            return to_arrow_dtypes(direct) if arrow_dtypes else direct
     except Exception as exc:  # pragma: no cover
         logger.debug("Header-row load failed for %s: %s", sheet, exc)
 
@@ -95,7 +118,7 @@ def load_exam_sheet(xl: pd.ExcelFile, sheet: str) -> pd.DataFrame:
     df = df.loc[:, ~df.columns.duplicated()]
     df = _normalize_string_columns(df)
     logger.info("Loaded %s rows from sheet %s using fallback header detection", len(df), sheet)
-    return df
+    return to_arrow_dtypes(df) if arrow_dtypes else df
 
 
 def normalize_columns(df: pd.DataFrame, sheet: str) -> pd.DataFrame:
@@ -116,70 +139,64 @@ def normalize_columns(df: pd.DataFrame, sheet: str) -> pd.DataFrame:
 def parse_exam_times(df: pd.DataFrame) -> pd.DataFrame:
     """Split "Day & Time" into weekday/time and derive timestamp columns."""
 
-    time_pattern = re.compile(
-        r"(\d{1,2}(?::\d{2})?\s*(?:am|pm)?\s*(?:-|to)\s*\d{1,2}(?::\d{2})?\s*(?:am|pm))",
-        re.IGNORECASE,
-    )
-
-    def _split_day_time(value: Optional[str]) -> tuple[Optional[str], Optional[str]]:
-        if not isinstance(value, str):
-            return None, None
-        match = time_pattern.search(value)
-        if not match:
-            return value.strip(), None
-        day = value[: match.start()].strip(" ,") or None
-        time_str = match.group(1).strip().strip("()").replace(" ", "")
-        return day, time_str
-
-    df = df.copy()
     df = df.drop(columns=["time"], errors="ignore")
 
-    day_time_parts = df.loc[:, "day_time"].apply(
-        lambda v: pd.Series(_split_day_time(v))
-    )
-    day_time_parts.columns = ["weekday_text", "time"]
-    df = pd.concat([df, day_time_parts], axis=1)
+    day_time = df.loc[:, "day_time"]
+    day_time = day_time.where(day_time.map(lambda v: isinstance(v, str))).astype(object)
+    parts = day_time.str.extract(DAY_TIME_PATTERN)
+    df.loc[:, "weekday_text"] = parts.day.str.strip(" ,").replace("", None)
+    df.loc[:, "time"] = parts.time.str.strip().str.strip("()").str.replace(" ", "")
     df = df[df.loc[:, "time"].notna()].reset_index(drop=True)
 
     df = clean_and_harmonize_times(df)
 
-    time_parts = df.loc[:, "time"].apply(split_time_interval).apply(pd.Series)
-    time_parts.columns = ["stime", "etime", "meridium"]
-    df.loc[:, ["stime", "etime", "meridium"]] = time_parts
-
-    datetimes = df.loc[:, ["stime", "etime", "meridium"]].apply(
-        get_datetimes, axis=1, result_type="expand"
-    )
-    datetimes.columns = ["sts", "ets"]
-    df.loc[:, ["sts", "ets"]] = datetimes
-
-    df.loc[:, "exam_date"] = pd.to_datetime(df.loc[:, "exam_date"], errors="coerce").dt.date
-    df.loc[:, "sts"] = df.apply(
-        lambda row: pd.Timestamp.combine(row["exam_date"], row["sts"].time())
-        if pd.notna(row["exam_date"]) and pd.notna(row["sts"])
-        else row["sts"],
-        axis=1,
-    )
-    df.loc[:, "ets"] = df.apply(
-        lambda row: pd.Timestamp.combine(row["exam_date"], row["ets"].time())
-        if pd.notna(row["exam_date"]) and pd.notna(row["ets"])
-        else row["ets"],
-        axis=1,
+    intervals = df.loc[:, "time"].str.extract(r"^(?P<stime>[^-]*)-(?P<etime>[^-]*)$")
+    malformed = intervals.stime.isna()
+    if malformed.any():
+        raise ValueError(f"Malformed exam times: {df.time[malformed].tolist()}")
+    # same rules as utilities.split_time_interval
+    df.loc[:, "meridium"] = intervals.etime.str.contains("a").map({True: "am", False: "pm"})
+    df.loc[:, "stime"] = intervals.stime.str.replace(r"(?:a|p)?(m|n)?", "", regex=True)
+    df.loc[:, "etime"] = intervals.etime.str.replace(r"(?:a|p)?(m|n)?", "", regex=True)
+
+    clock = pd.DataFrame(
+        [get_datetimes(row) for row in zip(df.stime, df.etime, df.meridium)],
+        columns=["sts", "ets"],
+        index=df.index,
+        dtype="datetime64[ns]",
     )
+    exam_day = pd.to_datetime(df.loc[:, "exam_date"], errors="coerce").dt.normalize()
+    df.loc[:, "exam_date"] = exam_day.dt.date
+    for col in ("sts", "ets"):
+        time_of_day = clock[col] - clock[col].dt.normalize()
+        df[col] = (exam_day + time_of_day).fillna(clock[col])
     return df
 
 
 def build_exam_records(df: pd.DataFrame) -> pd.DataFrame:
     """Produce the Vega-friendly subset of columns for visualisation."""
 
-    df = df.copy()
-    df.loc[:, "start_time"] = df.loc[:, "sts"].dt.strftime("%H:%M")
-    df.loc[:, "end_time"] = df.loc[:, "ets"].dt.strftime("%H:%M")
-    df.loc[:, "weekday"] = df.loc[:, "sts"].dt.day_name()
-    df.loc[:, "cid"] = df.apply(
-        lambda row: f"{row.course_code}_{row.course_no}_exam_{row.section}".lower(),
-        axis=1,
+    df = df.assign(
+        start_time=df.sts.dt.strftime("%H:%M"),
+        end_time=df.ets.dt.strftime("%H:%M"),
+        weekday=df.sts.dt.day_name(),
+        cid=(
+            df.course_code.astype(str)
+            + "_"
+            + df.course_no.astype(str)
+            + "_exam_"
+            + df.section.astype(str)
+        ).str.lower(),
     )
+    if uses_arrow_dtypes(df):
+        df = df.astype(
+            {
+                "start_time": "string[pyarrow]",
+                "end_time": "string[pyarrow]",
+                "weekday": "category",
+                "cid": "string[pyarrow]",
+            }
+        )
     return df.loc[
         :,
         [
@@ -201,16 +218,73 @@ def build_exam_records(df: pd.DataFrame) -> pd.DataFrame:
     ]
 
 
-def process_exam_workbook(path: str, sheet: Optional[str] = None) -> pd.DataFrame:
-    """Process a single exam sheet into a Vega-ready DataFrame."""
+def _excel_file(path) -> pd.ExcelFile:
+    """``path`` (a file name, a binary file or an open pd.ExcelFile) as a pd.ExcelFile."""
+    return path if isinstance(path, pd.ExcelFile) else pd.ExcelFile(path)
+
+
+def process_exam_workbook(
+    path,
+    sheet: Optional[str] = None,
+    arrow_dtypes: bool = False,
+    copy_on_write: bool = False,
+    report: Optional[dict] = None,
+) -> pd.DataFrame:
+    """Process a single exam sheet into a Vega-ready DataFrame.
+
+    ``path`` may be an open pd.ExcelFile, shared with process_exam_sheets.
+    ``copy_on_write`` and ``report`` work as in helper.process_schedule.
+    """
 
     if not sheet:
         raise ValueError("A sheet name must be provided for exam processing.")
 
-    xl = pd.ExcelFile(path)
+    xl = _excel_file(path)
+    with copy_on_write_mode(copy_on_write):
+        return _process_exam_sheet(xl, sheet, arrow_dtypes, report)
+
+
+def _process_exam_sheet(
+    xl: pd.ExcelFile, sheet: str, arrow_dtypes: bool = False, report: Optional[dict] = None
+) -> pd.DataFrame:
     logger.info("Processing sheet: %s", sheet)
 
-    df = load_exam_sheet(xl, sheet)
-    df = normalize_columns(df, sheet)
-    df = parse_exam_times(df)
-    return build_exam_records(df)
+    start = time.perf_counter()
+    df = load_exam_sheet(xl, sheet, arrow_dtypes=arrow_dtypes)
+    notify_stage("loading the sheet", len(df), time.perf_counter() - start)
+    df = run_stage("normalizing columns", normalize_columns, df, report, sheet=sheet)
+    if arrow_dtypes:
+        # college comes from the sheet name; location is now named
+        df = run_stage("arrow dtypes", to_arrow_dtypes, df, report)
+    df = run_stage("parsing exam times", parse_exam_times, df, report)
+    return run_stage("building exam records", build_exam_records, df, report)
+
+
+def process_exam_sheets(
+    path,
+    arrow_dtypes: bool = False,
+    copy_on_write: bool = False,
+    report: Optional[dict] = None,
+) -> pd.DataFrame:
+    """Process every exam sheet of a workbook into one frame.
+
+    Sheets are those whose name contains "exam"; the college column tells
+    them apart.  A sheet that cannot be parsed is logged and left out.
+    ``path`` may be an open pd.ExcelFile.
+    """
+
+    xl = _excel_file(path)
+    frames = []
+    with copy_on_write_mode(copy_on_write):
+        for sheet in xl.sheet_names:
+            if "exam" not in sheet.lower():
+                continue
+            try:
+                frames.append(_process_exam_sheet(xl, sheet, arrow_dtypes, report))
+            except (ValueError, KeyError) as exc:
+                logger.warning("Skipping exam sheet %s: %s", sheet, exc)
+    if not frames:
+        raise ValueError("No exam sheet could be processed.")
+    merged = pd.concat(frames, ignore_index=True)
+    # categories differ from sheet to sheet, concat falls back to object
+    return to_arrow_dtypes(merged) if arrow_dtypes else merged
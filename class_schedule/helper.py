@@ -4,20 +4,42 @@
 ####################
 """
 
+import hashlib
 import logging
+import os
+import pickle
 import re
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Sequence
+
+import numpy as np
 import pandas as pd
 from class_schedule.class_schedule import (
     general_cleaning,
     clean_and_harmonize_times,
     getting_start_end_times,
+    add_timestamps,
     add_duration,
     add_course_id_year_college,
     expand_days,
-    add_weekname,
     special_applied_epidemiology_course,
     harmonize_course_codes,
 )
+from class_schedule.quality import ANOMALY_COLUMNS, anomaly_frame
+from class_schedule.utilities import (
+    WEEK_TIME_COLUMNS,
+    add_clock_columns,
+    copy_on_write as copy_on_write_mode,
+    normalize_text_columns,
+    notify_stage,
+    run_stage,
+    timed_stage,
+    to_arrow_dtypes,
+    uses_arrow_dtypes,
+)
 
 LOGFMT = "%(asctime)s %(threadName)s~%(levelno)s /%(filename)s@%(lineno)s@%(funcName)s/ %(message)s"
 LEVEL = "INFO"
@@ -25,6 +47,8 @@ LEVEL = "INFO"
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format=LOGFMT)
 
+PACKAGE_DIR = Path(__file__).resolve().parent
+
 
 EXPECTED_SCHEDULE_COLUMNS = [
     "no",
@@ -62,20 +86,53 @@ COLUMN_ALIASES = {
     "capacity": "capacity",
 }
 
+# one row per weekly meeting; times as minutes of the week (utilities.WEEK_START)
+COMPACT_COLUMNS = WEEK_TIME_COLUMNS + [
+    "instructor",
+    "location",
+    "cid",
+    "credit",
+    "course_title",
+    "college",
+    "year",
+    "oldidx",
+    "capacity",
+]
+# rows per chunk of iter_schedule_chunks
+STREAM_CHUNK_ROWS = 5000
+# what process_schedule returns, with the times derived for export and charts
+PROCESSED_COLUMNS = [
+    "sts",
+    "instructor",
+    "location",
+    "weekday",
+    "cid",
+    "credit",
+    "course_title",
+    "college",
+    "year",
+    "oldidx",
+    "ets",
+    "capacity",
+    "start_time",
+    "end_time",
+] + WEEK_TIME_COLUMNS
 
-def _normalize_string_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Clean the value of the df."""
 
-    def _clean_value(value):
-        if isinstance(value, str):
-            return re.sub(r"\s+", " ", value.strip())
-        return value
+def _parquet_types():
+    """Parquet types of the streamed columns; the others are stored as text."""
+    import pyarrow as pa
 
-    str_cols = df.columns[df.dtypes == "object"]
-    if len(str_cols):
-        for col in str_cols:
-            df.loc[:, col] = df.loc[:, col].map(_clean_value)
-    return df
+    return {
+        "wday": pa.uint8(),
+        "start_mow": pa.int16(),
+        "end_mow": pa.int16(),
+        "oldidx": pa.int64(),
+        "credit": pa.float64(),
+        "capacity": pa.float64(),
+        "sts": pa.timestamp("ns"),
+        "ets": pa.timestamp("ns"),
+    }
 
 
 def _canonical_column_name(value) -> str:
@@ -90,21 +147,44 @@ def _canonical_column_name(value) -> str:
     return COLUMN_ALIASES.get(normalized, normalized)
 
 
-def load_general_schedule(fname, sheet_name):
+def load_general_schedule(fname, sheet_name, arrow_dtypes=False, header_row=None):
+    """Read the general schedule sheet into one row per section.
+
+    With ``arrow_dtypes`` text columns are string[pyarrow], and college and
+    location are categories; the pipeline stages keep these dtypes.
+    ``header_row`` is the 1-based sheet row of the header found by
+    uploads.inspect_workbook; it is used if it holds the "No." cell, else
+    the header is searched for.
+    """
     raw = pd.read_excel(fname, sheet_name=sheet_name, header=None)
     raw = raw.dropna(axis=0, thresh=2)
     raw = raw.dropna(axis=1, thresh=2)
-    first_col = raw.iloc[:, 0].astype(str).str.strip().str.lower()
-    mask = first_col.str.match(r"n[o0]\.?")
-    if not mask.any():
-        raise ValueError(
-            f"Unable to locate header row labeled 'No.' in sheet {sheet_name!r}"
-        )
-    header_idx = mask[mask].index[0]
-    header = raw.iloc[header_idx]
-    data = raw.iloc[header_idx + 1 :,]
-    data.columns = header
-    data = _normalize_string_columns(data)
+    # the index of raw is the 0-based sheet row
+    header_idx = None
+    if header_row is not None and header_row - 1 in raw.index:
+        label = str(raw.at[header_row - 1, raw.columns[0]]).strip().lower()
+        if re.match(r"n[o0]\.?", label):
+            header_idx = header_row - 1
+    if header_idx is None:
+        first_col = raw.iloc[:, 0].astype(str).str.strip().str.lower()
+        mask = first_col.str.match(r"n[o0]\.?")
+        if not mask.any():
+            raise ValueError(
+                f"Unable to locate header row labeled 'No.' in sheet {sheet_name!r}"
+            )
+        header_idx = mask[mask].index[0]
+    # dropped blank rows make the sheet row differ from the position
+    position = raw.index.get_loc(header_idx)
+    header = raw.iloc[position]
+    # a copy, not a view: _tidy_schedule assigns into the columns
+    data = raw.iloc[position + 1 :,].copy()
+    data.columns = header.tolist()
+    return _tidy_schedule(data, sheet_name, arrow_dtypes)
+
+
+def _tidy_schedule(data, sheet_name, arrow_dtypes=False):
+    """Clean, rename and index the rows under the header of a schedule sheet."""
+    data = normalize_text_columns(data)
     rename_map = {col: _canonical_column_name(col) for col in data.columns}
     data = data.rename(columns=rename_map)
     missing = [col for col in EXPECTED_SCHEDULE_COLUMNS if col not in data.columns]
@@ -117,58 +197,526 @@ def load_general_schedule(fname, sheet_name):
         for col in missing:
             data.loc[:, col] = pd.NA
     data = data.loc[:, EXPECTED_SCHEDULE_COLUMNS]
-    data = data.dropna(subset=["course_code"]).copy()
+    data = data.dropna(subset=["course_code"])
     data = data.set_index("no")
     data.index.name = "no"
+    if arrow_dtypes:
+        data = to_arrow_dtypes(data)
     return data
 
 
-def process_schedule(fname, sheet_name):
+def _cell_value(value):
+    """An openpyxl cell value as pd.read_excel passes it to its parser."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def iter_schedule_chunks(
+    fname, sheet_name, chunk_rows=STREAM_CHUNK_ROWS, arrow_dtypes=False
+) -> Iterator[pd.DataFrame]:
+    """Yield the general schedule sheet as loaded frames of ``chunk_rows`` rows.
+
+    The chunks are what load_general_schedule returns for their rows, but the
+    workbook is read row by row (openpyxl read-only mode) so only one chunk
+    is in memory at a time.
+    """
+    from openpyxl import load_workbook
+    from pandas.io.parsers import TextParser
+
+    def _load(header, rows):
+        # parsed with the header row, as read_excel does, for the same types
+        raw = TextParser([header] + rows, header=None).read()
+        data = raw.iloc[1:].copy()
+        data.columns = raw.iloc[0].tolist()
+        return _tidy_schedule(data, sheet_name, arrow_dtypes)
+
+    workbook = load_workbook(fname, read_only=True, data_only=True)
+    try:
+        header, rows = None, []
+        for row in workbook[sheet_name].iter_rows(values_only=True):
+            row = [_cell_value(value) for value in row]
+            if sum(value != "" for value in row) < 2:
+                continue
+            if header is None:
+                if re.match(r"n[o0]\.?", str(row[0]).strip().lower()):
+                    header = row
+                continue
+            rows.append(row)
+            if len(rows) == chunk_rows:
+                yield _load(header, rows)
+                rows = []
+        if header is None:
+            raise ValueError(
+                f"Unable to locate header row labeled 'No.' in sheet {sheet_name!r}"
+            )
+        if rows:
+            yield _load(header, rows)
+    finally:
+        workbook.close()
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One pipeline step with the columns it reads and the columns it writes."""
+
+    name: str
+    func: Callable[..., pd.DataFrame]
+    needs: tuple[str, ...]
+    produces: tuple[str, ...]
+    # stages adding or repeating rows always run
+    changes_rows: bool = False
+    # keyword arguments the stage takes from the run
+    options: tuple[str, ...] = ()
+
+
+# row-local stages, in order
+STAGES = (
+    Stage("general cleaning", general_cleaning, ("days", "time"), ("days", "time")),
+    Stage(
+        "cleaning and harmonizing times",
+        clean_and_harmonize_times,
+        ("time", "instructor"),
+        ("time", "instructor"),
+        options=("report",),
+    ),
+    Stage(
+        "special applied epidemiology course",
+        special_applied_epidemiology_course,
+        ("time", "days", "credit"),
+        ("time", "days", "credit"),
+        changes_rows=True,
+        options=("next_index",),
+    ),
+    Stage(
+        "getting start and end times",
+        getting_start_end_times,
+        ("time",),
+        ("stime", "etime", "meridium"),
+        options=("report",),
+    ),
+    Stage(
+        "building start and end timestamps",
+        add_timestamps,
+        ("stime", "etime", "meridium"),
+        ("sts", "ets"),
+        options=("report",),
+    ),
+    Stage(
+        "adding duration",
+        add_duration,
+        ("sts", "ets"),
+        ("duration_td", "duration_sec", "duration_str"),
+    ),
+    Stage(
+        "harmonizing course codes",
+        harmonize_course_codes,
+        ("course_code",),
+        ("course_code",),
+    ),
+    Stage(
+        "adding course ID, year, and college",
+        add_course_id_year_college,
+        ("course_code", "course_no", "section", "course_title", "college"),
+        ("cid", "cidno_sess", "year", "college"),
+        options=("report",),
+    ),
+    Stage(
+        "expanding days",
+        expand_days,
+        ("days", "sts", "ets"),
+        tuple(WEEK_TIME_COLUMNS) + ("oldidx",),
+        changes_rows=True,
+    ),
+)
+# runs on the whole schedule, after cached rows are spliced in
+CLOCK_STAGE = Stage(
+    "deriving clock columns",
+    add_clock_columns,
+    tuple(WEEK_TIME_COLUMNS),
+    ("sts", "ets", "weekday", "start_time", "end_time"),
+)
+
+
+@dataclass(frozen=True)
+class Plan:
+    """Stages and columns needed to produce the requested output columns."""
+
+    columns: tuple[str, ...]
+    stages: tuple[Stage, ...]
+    final: tuple[Stage, ...]
+    # raw columns read, and columns kept after the row-local stages
+    inputs: frozenset[str]
+    row_columns: frozenset[str]
+
+
+def plan_pipeline(columns: Sequence[str]) -> Plan:
+    """Walk the stages backwards from ``columns`` and keep those that matter.
+
+    A stage runs when it changes the rows or when a later stage or the
+    output uses one of its columns; everything else is skipped.
+    """
+    needed = set(columns)
+    final = []
+    if needed & set(CLOCK_STAGE.produces):
+        final.append(CLOCK_STAGE)
+        needed = (needed - set(CLOCK_STAGE.produces)) | set(CLOCK_STAGE.needs)
+    row_columns = frozenset(needed | {"oldidx"})
+
+    stages = []
+    for stage in reversed(STAGES):
+        if stage.changes_rows or needed & set(stage.produces):
+            stages.append(stage)
+            needed = (needed - set(stage.produces)) | set(stage.needs)
+        else:
+            logger.debug("Skipping %s: no requested column depends on it", stage.name)
+
+    unknown = needed - set(EXPECTED_SCHEDULE_COLUMNS)
+    if unknown:
+        raise ValueError(f"No pipeline stage produces the columns {sorted(unknown)}")
+    return Plan(
+        tuple(columns),
+        tuple(reversed(stages)),
+        tuple(final),
+        frozenset(needed),
+        row_columns,
+    )
+
+
+def _process_rows(df, plan: Plan, next_index=None, report=None, engine="pandas"):
+    """Run the planned row-local stages and return one row per weekly meeting."""
+
+    if engine == "polars":
+        return _process_rows_polars(df, plan, next_index, report)
+    df = df.loc[:, [col for col in df.columns if col in plan.inputs]]
+    context = {"next_index": next_index, "report": report}
+    for stage in plan.stages:
+        options = {option: context[option] for option in stage.options}
+        df = run_stage(stage.name, stage.func, df, report, **options)
+        logger.info("Completed %s", stage.name)
+    return df.loc[:, [col for col in df.columns if col in plan.row_columns]]
+
 
-    df = load_general_schedule(fname, sheet_name)
+def _process_rows_polars(df, plan: Plan, next_index=None, report=None):
+    """_process_rows with the stages run by polars_engine.
 
-    df = general_cleaning(df)
-    logger.info("Completed general cleaning")
+    Rows for special_applied_epidemiology_course (a "/" in their time) go
+    through the pandas stages.
+    """
+    from class_schedule import polars_engine
 
-    df = clean_and_harmonize_times(df)
-    logger.info("Completed cleaning and harmonizing times")
+    inputs = plan.inputs | set(polars_engine.POLARS_INPUTS)
+    df = df.loc[:, [col for col in df.columns if col in inputs]]
+    special = df.time.astype(str).str.contains("/", regex=False).to_numpy()
+    if not special.any():
+        with timed_stage("polars engine", len(df)):
+            data = polars_engine.process_rows(df, report)
+    else:
+        next_index = df.index[-1] + 1 if next_index is None else next_index
+        parts = [_process_rows(df.loc[special], plan, next_index, report)]
+        if not special.all():
+            with timed_stage("polars engine", int((~special).sum())):
+                parts.insert(0, polars_engine.process_rows(df.loc[~special], report))
+        data = _in_sheet_order(pd.concat(parts, ignore_index=True), df.index)
+    return data.loc[:, [col for col in data.columns if col in plan.row_columns]]
 
-    logger.info("Starting with applied epidemiology a special course to split in 2")
-    df = special_applied_epidemiology_course(df)
-    logger.info("Completed special applied epidemiology course")
 
-    df = getting_start_end_times(df)
-    logger.info("Completed getting start and end times")
+def _in_sheet_order(data: pd.DataFrame, index: pd.Index) -> pd.DataFrame:
+    """Sort meetings by the position of their oldidx in ``index``; others go last."""
+    positions = pd.Series(np.arange(len(index)), index=index)
+    order = data.oldidx.map(positions).fillna(len(index))
+    return data.iloc[np.argsort(order.values, kind="stable")].reset_index(drop=True)
 
-    df = add_duration(df)
-    logger.info("Completed adding duration")
 
-    df = harmonize_course_codes(df)
-    logger.info("Completed harmonizing course codes")
+def with_clock_columns(data: pd.DataFrame) -> pd.DataFrame:
+    """Add sts/ets, weekday and start/end strings to compact meetings."""
+    return add_clock_columns(data).loc[:, PROCESSED_COLUMNS]
 
-    df = add_course_id_year_college(df)
-    logger.info("Completed adding course ID, year, and college")
 
-    tdf = expand_days(df)
-    tdf = add_weekname(tdf)
+def _check_engine(engine: str, plan: Plan) -> None:
+    if engine == "polars":
+        from class_schedule import polars_engine
 
-    data = tdf.loc[
-        :,
-        [
-            "sts",
-            "instructor",
-            "location",
-            "weekday",
-            "cid",
-            "credit",
-            "course_title",
-            "college",
-            "oldidx",
-            "ets",
-        ],
+        produced = set(EXPECTED_SCHEDULE_COLUMNS) | set(polars_engine.POLARS_COLUMNS)
+        missing = sorted(plan.row_columns - produced)
+        if missing:
+            raise ValueError(f"engine='polars' does not produce the columns {missing}")
+    elif engine != "pandas":
+        raise ValueError(f"Unknown engine {engine!r}; use 'pandas' or 'polars'")
+
+
+def _pipeline_fingerprint() -> str:
+    """Identify the code and catalog a cache was built with."""
+    sources = [
+        "class_schedule.py",
+        "utilities.py",
+        "settings.py",
+        "catalog.py",
+        "helper.py",
     ]
-    times = data.loc[:, ["sts", "ets"]]
-    data.loc[:, "start_time"] = data.sts.apply(lambda t: t.strftime("%H:%M"))
-    data.loc[:, "end_time"] = data.ets.apply(lambda t: t.strftime("%H:%M"))
+    stamps = [str((PACKAGE_DIR / name).stat().st_mtime_ns) for name in sources]
+    return hashlib.sha1("|".join(stamps).encode()).hexdigest()
+
+
+def hash_rows(df: pd.DataFrame) -> pd.Series:
+    """Hash the content of each raw row, ignoring its "no" label."""
+    return pd.util.hash_pandas_object(df, index=False).map("{:016x}".format)
+
+
+@dataclass
+class RowCache:
+    """Processed meetings of the previous upload, keyed by the hash of their raw row."""
+
+    rows: Optional[pd.DataFrame] = None
+    fingerprint: str = ""
+    # data-quality anomalies of the cached rows, with their row_hash
+    anomalies: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def load(cls, path) -> "RowCache":
+        try:
+            with open(path, "rb") as fh:
+                cache = pickle.load(fh)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return cls()
+        return cache if isinstance(cache, cls) else cls()
+
+    def save(self, path) -> None:
+        """Write the cache to a temporary file of its own, then move it to ``path``."""
+        fh = tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp", delete=False
+        )
+        try:
+            with fh:
+                pickle.dump(self, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(fh.name, path)
+        except BaseException:
+            Path(fh.name).unlink(missing_ok=True)
+            raise
+
+
+def _process_incrementally(
+    raw: pd.DataFrame, cache: RowCache, plan: Plan, report=None, engine="pandas"
+) -> pd.DataFrame:
+    """Reprocess only new or changed raw rows and splice the others from ``cache``.
+
+    Rows holding a "/" time (split by special_applied_epidemiology_course) are
+    always reprocessed since they yield an extra row numbered after the sheet.
+    """
+    fingerprint = _pipeline_fingerprint() + ",".join(sorted(plan.row_columns))
+    if report is not None:
+        # the anomalies of spliced rows are only known if they were collected
+        fingerprint += ",anomalies"
+    if cache.fingerprint != fingerprint:
+        cache.rows = cache.anomalies = None
+    cache.fingerprint = fingerprint
+    if not raw.index.is_unique:
+        logger.warning("Duplicated row numbers; reprocessing the whole sheet")
+        cache.rows = cache.anomalies = None
+        return _process_rows(raw, plan, report=report, engine=engine)
+
+    hashes = hash_rows(raw)
+    cached = cache.rows if cache.rows is not None else pd.DataFrame(columns=["row_hash"])
+    cached_groups = cached.groupby("row_hash", sort=False).indices
+    reprocess = ~hashes.isin(list(cached_groups)) | raw.time.astype(str).str.contains("/")
+    logger.info(
+        "Reprocessing %s of %s rows; %s spliced from the previous upload",
+        int(reprocess.sum()),
+        len(raw),
+        int((~reprocess).sum()),
+    )
+
+    parts = []
+    next_index = raw.index[-1] + 1 if len(raw) else 0
+    recorded = len(report.get("anomalies", [])) if report is not None else 0
+    if reprocess.any():
+        fresh = _process_rows(
+            raw.loc[reprocess.values],
+            plan,
+            next_index=next_index,
+            report=report,
+            engine=engine,
+        )
+        fresh["row_hash"] = fresh.oldidx.map(hashes)
+        parts.append(fresh)
+
+    kept = hashes.loc[~reprocess.values]
+    if len(kept):
+        take = np.concatenate([cached_groups[h] for h in kept.values])
+        counts = [len(cached_groups[h]) for h in kept.values]
+        spliced = cached.iloc[take].assign(
+            oldidx=pd.Series(np.repeat(kept.index.values, counts)).infer_objects().values
+        )
+        parts.append(spliced)
+
+    if not parts:
+        return _process_rows(raw, plan, report=report, engine=engine)
+
+    data = _in_sheet_order(pd.concat(parts), raw.index)
+
+    if uses_arrow_dtypes(raw):
+        # cached and fresh categories differ, concat falls back to object
+        data = to_arrow_dtypes(data)
+    cache.rows = data.loc[data.row_hash.notna()].reset_index(drop=True)
+    if report is not None:
+        _splice_anomalies(report, recorded, cache, hashes, kept)
+    return data.drop(columns=["row_hash"])
+
 
+def _splice_anomalies(report: dict, recorded: int, cache: RowCache, hashes, kept) -> None:
+    """Add the cached anomalies of the ``kept`` rows to the report; cache the new ones.
+
+    The report's anomalies from position ``recorded`` on are those of the
+    reprocessed rows.
+    """
+    anomalies = report.setdefault("anomalies", [])
+    fresh = anomaly_frame({"anomalies": anomalies[recorded:]})
+    # rows added by special_applied_epidemiology_course have no raw row
+    fresh = fresh.assign(row_hash=fresh.no.map(hashes)).dropna(subset=["row_hash"])
+    parts = [fresh]
+    if cache.anomalies is not None and len(kept):
+        rows = kept.rename("row_hash").rename_axis("no").reset_index()
+        spliced = rows.merge(cache.anomalies.drop(columns="no"), on="row_hash")
+        anomalies.append(spliced.loc[:, ANOMALY_COLUMNS])
+        parts.append(spliced)
+    # identical raw rows share their hash and their anomalies
+    cached = pd.concat(parts, ignore_index=True)
+    cache.anomalies = cached.drop_duplicates(
+        ["row_hash", "rule", "column"], ignore_index=True
+    )
+
+
+def process_schedule(
+    fname,
+    sheet_name,
+    cache: Optional[RowCache] = None,
+    arrow_dtypes: bool = False,
+    compact: bool = False,
+    columns: Optional[Sequence[str]] = None,
+    copy_on_write: bool = False,
+    report: Optional[dict] = None,
+    engine: str = "pandas",
+    header_row: Optional[int] = None,
+):
+    """Load and process a general schedule sheet.
+
+    ``fname`` is anything pd.read_excel reads, an open pd.ExcelFile included.
+    Only the stages needed for ``columns`` run (see plan_pipeline); they
+    default to PROCESSED_COLUMNS, or COMPACT_COLUMNS with ``compact``, where
+    the meetings keep only their integer week times.
+
+    With a ``cache`` from a previous upload only the rows that changed go
+    through the pipeline; the cache is updated for the next upload.
+    ``arrow_dtypes`` and ``header_row`` are passed to load_general_schedule.
+
+    ``copy_on_write`` runs the pipeline with pandas copy-on-write, so stages
+    share the columns they do not change instead of copying frames.  A
+    ``report`` dict receives the bytes each stage copied under
+    "copied_bytes", the catalog suggestions for the unmapped courses under
+    "course_suggestions" (see catalog.suggest_courses), and the corrections
+    made to the times under "anomalies" (see quality.anomaly_frame).
+
+    ``engine="polars"`` runs the row-local stages as one Polars query (see
+    polars_engine); it needs the optional polars package.
+    """
+
+    if columns is None:
+        columns = COMPACT_COLUMNS if compact else PROCESSED_COLUMNS
+    plan = plan_pipeline(columns)
+    _check_engine(engine, plan)
+
+    with copy_on_write_mode(copy_on_write):
+        start = time.perf_counter()
+        df = load_general_schedule(
+            fname, sheet_name, arrow_dtypes=arrow_dtypes, header_row=header_row
+        )
+        notify_stage("loading the sheet", len(df), time.perf_counter() - start)
+        if cache is None:
+            data = _process_rows(df, plan, report=report, engine=engine)
+        else:
+            data = _process_incrementally(df, cache, plan, report=report, engine=engine)
+        for stage in plan.final:
+            data = run_stage(stage.name, stage.func, data, report)
+            logger.info("Completed %s", stage.name)
+        data = data.loc[:, list(plan.columns)]
+    if report is not None:
+        # the polars engine copies outside run_stage, so its copied bytes are not counted
+        copied = sum(report.get("copied_bytes", {}).values())
+        logger.info("Copied %s bytes in the pipeline", copied)
     return data
+
+
+def _arrow_table(data: pd.DataFrame, schema):
+    """``data`` as a pyarrow table of ``schema``; text columns are stored as str."""
+    import pyarrow as pa
+
+    columns = {}
+    for field in schema:
+        values = data[field.name]
+        if pa.types.is_string(field.type):
+            values = values.astype("string")
+        elif pa.types.is_floating(field.type):
+            values = pd.to_numeric(values, errors="coerce")
+        columns[field.name] = values
+    return pa.Table.from_pandas(
+        pd.DataFrame(columns), schema=schema, preserve_index=False
+    )
+
+
+def stream_schedule(
+    fname,
+    sheet_name,
+    out_path,
+    columns: Optional[Sequence[str]] = None,
+    chunk_rows: int = STREAM_CHUNK_ROWS,
+    arrow_dtypes: bool = False,
+    engine: str = "pandas",
+) -> int:
+    """Process a general schedule sheet chunk by chunk into a Parquet file.
+
+    Each chunk of iter_schedule_chunks goes through the row-local stages and
+    its meetings (``columns``, COMPACT_COLUMNS by default) are appended to
+    ``out_path``, so memory stays bounded by the chunk size.  The global
+    steps (conflicts, charts...) run on the file read back with
+    pd.read_parquet.  Columns are typed as in _parquet_types.
+
+    Rows split by special_applied_epidemiology_course are processed last:
+    their extra row is numbered after the last row of the sheet.
+    Returns the number of meetings written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = list(COMPACT_COLUMNS if columns is None else columns)
+    plan = plan_pipeline(columns)
+    _check_engine(engine, plan)
+    types = _parquet_types()
+    schema = pa.schema([(col, types.get(col, pa.string())) for col in columns])
+
+    def _write(rows, next_index=None):
+        data = _process_rows(rows, plan, next_index=next_index, engine=engine)
+        for stage in plan.final:
+            data = stage.func(data)
+        writer.write_table(_arrow_table(data, schema))
+        return len(data)
+
+    written, held, last_index = 0, [], None
+    with pq.ParquetWriter(out_path, schema) as writer:
+        for chunk in iter_schedule_chunks(fname, sheet_name, chunk_rows, arrow_dtypes):
+            if chunk.empty:
+                continue
+            last_index = chunk.index[-1]
+            special = chunk.time.astype(str).str.contains("/", regex=False).to_numpy()
+            held.append(chunk.loc[special])
+            if not special.all():
+                written += _write(chunk.loc[~special])
+            logger.info("Streamed %s meetings", written)
+        held = [rows for rows in held if len(rows)]
+        if held:
+            # the expanded special rows are numbered after the last row read
+            next_index = None if last_index is None else last_index + 1
+            written += _write(pd.concat(held), next_index=next_index)
+    logger.info("Wrote %s meetings to %s", written, out_path)
+    return written
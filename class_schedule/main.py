@@ -2,19 +2,9 @@
 
 import logging
 import argparse
-import pandas as pd
-from class_schedule.class_schedule import (
-    general_cleaning,
-    clean_and_harmonize_times,
-    getting_start_end_times,
-    add_duration,
-    add_course_id_year_college,
-    expand_days,
-    add_weekname,
-    special_applied_epidemiology_course,
-)
-
-from class_schedule.helper import process_schedule
+
+# pandas and the pipeline are imported by the functions that use them, so that
+# --help and argument errors do not wait for them (see benchmarks/import_time.py)
 
 # from utilities import setup_logger
 
@@ -28,12 +18,24 @@ logging.basicConfig(level=logging.INFO, format=LOGFMT)
 # logger = logging.getLogger(__name__)
 # setup_logger()
 
+FNAME_DEF = "./Data/semI_final_exam_schedule_ay_25-26.xlsx"
+FOUT_DEF = f"{FNAME_DEF.split('.xlsx')[0]}_cleaned.xlsx"
+
 
 def main_prg():
     """Récupère les arguments et lance l'application principale."""
     args = get_args()
     logger.setLevel(args.logLevel)
-    main(args.fname, args.sname, args.fout)
+    if args.diff:
+        old, new = args.diff
+        diff_main(old, new, args.sname, args.fout or f"{new.split('.xlsx')[0]}_diff.xlsx")
+        return None
+    if args.stream:
+        from class_schedule.helper import stream_schedule
+
+        stream_schedule(args.fname, args.sname, args.stream)
+        return None
+    main(args.fname, args.sname, args.fout or FOUT_DEF)
     return None
 
 
@@ -43,7 +45,7 @@ def main(
     fout="./Data/class_schedule_v4_cleaned.xlsx",
 ):
     """Application principale."""
-    tdf = process_schedule(fname, sheet_name)
+    from class_schedule.helper import process_schedule
 
     col_reorder = [
         "college",
@@ -59,13 +61,38 @@ def main(
         "sts",
         "oldidx",
     ]
-    tdf = tdf.loc[:, col_reorder]
+    tdf = process_schedule(fname, sheet_name, columns=col_reorder)
     logger.info(f">>> Saving the df:\n{tdf.head(5)}\nto  {fout}")
 
     tdf.to_excel(fout)
     return tdf
 
 
+def load_processed(fname, sheet_name="GENERAL SCHEDULE"):
+    """Read an already processed workbook, or process a raw schedule workbook."""
+    import pandas as pd
+    from class_schedule.helper import process_schedule
+
+    processed = pd.read_excel(fname)
+    if {"cid", "weekday"}.issubset(processed.columns):
+        return processed
+    return process_schedule(fname, sheet_name)
+
+
+def diff_main(old_fname, new_fname, sheet_name="GENERAL SCHEDULE", fout=None):
+    """Compare two versions of a schedule and list what changed."""
+    from class_schedule.diff import diff_schedules, summarize_diff
+
+    diff = diff_schedules(
+        load_processed(old_fname, sheet_name), load_processed(new_fname, sheet_name)
+    )
+    logger.info(f">>> {old_fname} -> {new_fname}: {summarize_diff(diff)}")
+    print(diff.to_string(index=False))
+    if fout:
+        diff.to_excel(fout, index=False)
+    return diff
+
+
 def get_args():
     """Parse the function's arguments."""
     description = (
@@ -79,7 +106,7 @@ def get_args():
         "--logLevel", "-l", type=str, default=logLevel_def, help=logLevel_doc
     )
 
-    fname_def = "./Data/semI_final_exam_schedule_ay_25-26.xlsx"
+    fname_def = FNAME_DEF
     fname_doc = f"name of the file to update.  ({fname_def})"
     parser.add_argument(
         "--fname",
@@ -97,13 +124,32 @@ def get_args():
         default=sname_def,
     )
 
-    fout_def = f"{fname_def.split('.xlsx')[0]}_cleaned.xlsx"
-    fout_doc = f"Name of the output file. ({fout_def})"
+    fout_doc = f"Name of the output file. ({FOUT_DEF}, or NEW_diff.xlsx with --diff)"
     parser.add_argument(
         "--fout",
         "-o",
         help=fout_doc,
-        default=fout_def,
+    )
+
+    diff_doc = (
+        "Compare two schedule versions (raw or processed workbooks) instead of"
+        " processing one; writes the changes to --fout."
+    )
+    parser.add_argument(
+        "--diff",
+        nargs=2,
+        metavar=("OLD", "NEW"),
+        help=diff_doc,
+    )
+
+    stream_doc = (
+        "Process the sheet in chunks of rows, with bounded memory, and write the"
+        " compact meetings to this Parquet file instead of --fout."
+    )
+    parser.add_argument(
+        "--stream",
+        metavar="PARQUET",
+        help=stream_doc,
     )
 
     return parser.parse_args()
@@ -0,0 +1,417 @@
+"""Polars version of the row-local schedule stages (``engine="polars"``).
+
+The stages of helper.STAGES from the time cleaning to the day expansion run
+as one lazy Polars query, on all cores, and the result is handed back as the
+pandas frame the pandas stages would have produced.  Columns the stages do
+not change are taken from the input frame as they are.
+
+polars is optional; it is imported when the engine is used.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from class_schedule.class_schedule import YEARS
+from class_schedule.catalog import (
+    CourseCatalog,
+    get_catalog,
+    normalize_title,
+    suggest_courses,
+)
+from class_schedule.quality import record_anomalies
+from class_schedule.utilities import (
+    MINUTES_PER_DAY,
+    TIME_ERRATUM,
+    TIME_RULES,
+    WEEK_TIME_COLUMNS,
+    WEEKDAY_INDEX,
+    keep_extension_dtypes,
+    uses_arrow_dtypes,
+)
+
+logger = logging.getLogger(__name__)
+
+# input columns the query reads
+POLARS_INPUTS = (
+    "time",
+    "days",
+    "instructor",
+    "course_code",
+    "course_no",
+    "section",
+    "course_title",
+    "college",
+)
+# columns computed by the query, on top of the (cleaned) input columns
+POLARS_COLUMNS = ("cid", "cidno_sess", "year", *WEEK_TIME_COLUMNS, "oldidx")
+# the quality rules TIME_RULES flags, each computed into a boolean column
+TIME_FLAGS = tuple(dict.fromkeys(rule for kind, _, rule in TIME_RULES if kind == "flag"))
+# strptime's "%I:%M" (see utilities.get_datetimes)
+CLOCK_PATTERN = r"^(1[0-2]|0[1-9]|[1-9]):([0-5]\d|\d)$"
+# joins the parts of a catalog key into one string
+KEY_SEP = "\x1f"
+# day codes of lowercased days values, in week order; "t" is a t not followed by h
+DAY_CODES = [
+    ("m", "m"),
+    ("t", r"t($|[^h])"),
+    ("w", "w"),
+    ("th", "th"),
+    ("f", "f"),
+    ("s", "s"),
+]
+
+
+def _import_polars():
+    try:
+        import polars as pl
+    except ImportError as exc:
+        raise ImportError(
+            "engine='polars' needs the polars package (pip install polars)"
+        ) from exc
+    return pl
+
+
+def _strings(values: pd.Series) -> list:
+    """Values as a list of str, with None for anything else."""
+    return [v if isinstance(v, str) else None for v in values.to_numpy(dtype=object)]
+
+
+def _normalize_times(pl, lf):
+    """``lf`` with its time column through utilities.TIME_RULES and the TIME_FLAGS.
+
+    The time is kept in a column at each flag, so the expressions do not
+    repeat the replacements made before it.
+    """
+    time = pl.col("time").str.to_lowercase()
+    flagged: set = set()
+    for kind, pattern, replacement in TIME_RULES:
+        if kind == "replace":
+            time = time.str.replace_all(pattern, replacement, literal=True)
+        elif kind == "regex":
+            # re.sub's \1 is ${1} in polars
+            time = time.str.replace_all(pattern, re.sub(r"\\(\d)", r"${\1}", replacement))
+        elif kind == "flag":
+            found = time.str.contains(pattern)
+            if replacement in flagged:
+                found = pl.col(replacement) | found
+            lf = lf.with_columns(time=time, **{replacement: found})
+            flagged.add(replacement)
+            time = pl.col("time")
+        else:
+            raise ValueError(f"Unknown time rule kind {kind!r}")
+    return lf.with_columns(time=time)
+
+
+def _clock(pl, hhmm, meridium):
+    """Minutes since midnight of an "H:MM" expression read with a meridium."""
+    parts = hhmm.str.extract_groups(CLOCK_PATTERN)
+    hour = parts.struct.field("1").cast(pl.Int32) % 12
+    minute = parts.struct.field("2").cast(pl.Int32)
+    # no meridium: get_datetimes could not tell the half of the day
+    return (
+        hour + pl.when(meridium == "pm").then(12).when(meridium == "am").then(0)
+    ) * 60 + minute
+
+
+def _query(pl, frame, catalog: CourseCatalog):
+    """The lazy query: one row per meeting with its position in the input."""
+    lf = _normalize_times(pl, frame.lazy())
+    time = pl.col("time")
+    lf = lf.with_columns(
+        staff=(pl.col("instructor").str.to_lowercase() == "staff").fill_null(False),
+        days=pl.col("days").str.to_lowercase(),
+    )
+
+    # getting_start_end_times
+    parts = time.str.split("-")
+    interval = parts.list.len() == 2
+    lf = (
+        lf.with_columns(
+            stime=pl.when(interval).then(parts.list.get(0, null_on_oob=True)),
+            etime=pl.when(interval).then(parts.list.get(1, null_on_oob=True)),
+        )
+        .with_columns(
+            meridium=pl.when(pl.col("etime").str.contains("a", literal=True))
+            .then(pl.lit("am"))
+            .otherwise(pl.lit("pm")),
+            # same as split_time_interval's (?:a|p)?(m|n)?
+            split_stime=pl.col("stime").str.replace_all("[apmn]", ""),
+            split_etime=pl.col("etime").str.replace_all("[apmn]", ""),
+        )
+        .with_columns(
+            stime=pl.col("split_stime").replace(TIME_ERRATUM),
+            etime=pl.col("split_etime").replace(TIME_ERRATUM),
+            split_meridium=pl.col("meridium"),
+        )
+    )
+
+    # get_datetimes
+    shour = (
+        pl.col("stime")
+        .str.split(":")
+        .list.get(0, null_on_oob=True)
+        .cast(pl.Int32, strict=False)
+    )
+    sminute = (
+        pl.col("stime")
+        .str.split(":")
+        .list.get(1, null_on_oob=True)
+        .cast(pl.Int32, strict=False)
+    )
+    ehour = (
+        pl.col("etime")
+        .str.split(":")
+        .list.get(0, null_on_oob=True)
+        .cast(pl.Int32, strict=False)
+    )
+    meridium = pl.col("meridium")
+    lf = lf.with_columns(
+        meridium=pl.when((ehour > 8) & (meridium == "pm"))
+        .then(pl.lit("am"))
+        .otherwise(meridium)
+    ).with_columns(
+        meridium=pl.when(
+            (ehour < 8)
+            & (meridium == "am")
+            & ~((shour == 1) & (sminute == 1)).fill_null(False)
+        )
+        .then(pl.lit("pm"))
+        .otherwise(meridium)
+    )
+    # as utilities.meridiem_flips: the swaps the timestamps use
+    lf = lf.with_columns(
+        meridiem_flip=(
+            (meridium != pl.col("split_meridium")) & (shour < ehour) & (ehour != 12)
+        ).fill_null(False)
+    )
+    start_meridium = (
+        pl.when(shour == 12)
+        .then(pl.lit("pm"))
+        .when(((ehour == 12) & (shour < 12)) | (shour > ehour))
+        .then(pl.lit("am"))
+        .when(shour < ehour)
+        .then(meridium)
+    )
+    end_meridium = (
+        pl.when(shour == 12)
+        .then(pl.lit("pm"))
+        .when(((ehour == 12) & (shour < 12)) | (shour > ehour))
+        .then(pl.lit("pm"))
+        .when(shour < ehour)
+        .then(meridium)
+    )
+    lf = lf.with_columns(
+        start=_clock(pl, pl.col("stime"), start_meridium),
+        end=_clock(pl, pl.col("etime"), end_meridium),
+    )
+
+    # harmonize_course_codes and add_course_id_year_college
+    course_code = pl.col("course_code").replace(catalog.code_mapping)
+    cid = pl.concat_str(
+        [course_code, pl.lit("_"), pl.col("course_no"), pl.lit("_s"), pl.col("section")]
+    )
+    lf = lf.with_columns(
+        course_code=course_code,
+        cid=cid,
+        year=pl.col("course_no")
+        .str.extract(r"(\d)")
+        .replace_strict(YEARS, default=None, return_dtype=pl.String)
+        .fill_null("Unknown"),
+    ).with_columns(cidno_sess=pl.col("cid").str.split("_s").list.first())
+    # catalog.lookup: the settings.py entry as written, else by catalog.course_key
+    # (with the titles normalized beforehand)
+    entries = {KEY_SEP.join(key): college for key, college in catalog.entries.items()}
+    colleges = {KEY_SEP.join(key): college for key, college in catalog.colleges.items()}
+    exact_key = pl.concat_str(
+        [pl.col("cidno_sess"), pl.col("course_title"), pl.col("year")],
+        separator=KEY_SEP,
+    )
+    key = pl.concat_str(
+        [
+            pl.col("cidno_sess").str.strip_chars().str.to_lowercase(),
+            pl.col("title_key"),
+            pl.col("year"),
+        ],
+        separator=KEY_SEP,
+    )
+    lf = lf.with_columns(
+        curriculum_college=exact_key.replace_strict(
+            entries, default=None, return_dtype=pl.String
+        ).fill_null(key.replace_strict(colleges, default=None, return_dtype=pl.String)),
+        prefix_college=pl.col("course_code")
+        .str.to_uppercase()
+        .replace_strict(catalog.prefix_colleges, default=None, return_dtype=pl.String),
+    )
+
+    # expand_days
+    days = pl.col("days").str.strip_chars()
+    valid = days.str.contains(r"^(m|t|w|th|f|s)+$").fill_null(False)
+    codes = pl.concat_list(
+        [
+            pl.when(days.str.contains(pattern)).then(
+                pl.lit(WEEKDAY_INDEX[code], pl.UInt8)
+            )
+            for code, pattern in DAY_CODES
+        ]
+    ).list.drop_nulls()
+    # unreadable days give two Sunday meetings, as meeting_days does
+    lf = lf.with_columns(
+        wday=pl.when(valid)
+        .then(codes)
+        .otherwise(pl.lit([WEEKDAY_INDEX["S"]] * 2, pl.List(pl.UInt8)))
+    ).explode("wday")
+    return lf.with_columns(
+        start_mow=(
+            pl.col("start") + pl.col("wday").cast(pl.Int32) * MINUTES_PER_DAY
+        ).cast(pl.Int16),
+        end_mow=(pl.col("end") + pl.col("wday").cast(pl.Int32) * MINUTES_PER_DAY).cast(
+            pl.Int16
+        ),
+    )
+
+
+def _record_anomalies(df: pd.DataFrame, per_row, report: Optional[dict]) -> None:
+    """Record the rules flagged in the one-meeting-per-row ``per_row`` (quality.RULES)."""
+    positions = per_row.get_column("pos").to_numpy()
+
+    def values(column):
+        by_row = np.full(len(df), None, dtype=object)
+        by_row[positions] = per_row.get_column(column).to_numpy()
+        return pd.Series(by_row, index=df.index)
+
+    def flagged(column):
+        return values(column).to_numpy(dtype=bool, na_value=False)
+
+    # the time as general_cleaning leaves it for clean_and_harmonize_times
+    try:
+        original = df.time.str.lower()
+    except AttributeError:
+        original = df.time
+    time = values("time")
+    for rule in TIME_FLAGS:
+        record_anomalies(report, rule, flagged(rule), original, time)
+    for col in ("stime", "etime"):
+        split = values(f"split_{col}")
+        mistyped = split.isin(list(TIME_ERRATUM)).to_numpy()
+        record_anomalies(report, "erratum", mistyped, split, values(col), col)
+    meridium = values("split_meridium")
+    swapped = meridium.map({"am": "pm", "pm": "am"})
+    record_anomalies(
+        report, "meridiem_flip", flagged("meridiem_flip"), meridium, swapped, "meridium"
+    )
+
+
+def process_rows(df: pd.DataFrame, report=None) -> pd.DataFrame:
+    """Clean, parse and expand the loaded rows of ``df`` with Polars.
+
+    ``report`` is as for add_course_id_year_college, and receives the
+    data-quality anomalies as the pandas stages record them.
+
+    Rows whose time holds a "/" are for special_applied_epidemiology_course
+    and are left to the pandas stages (see helper._process_rows).
+    """
+    pl = _import_polars()
+
+    # sections are formatted as add_course_id_year_college does, once per value
+    codes, sections = pd.factorize(df.section, use_na_sentinel=False)
+    section = [f"{value:.0f}" for value in sections]
+    codes_title, titles = pd.factorize(df.course_title)
+    title_keys = [normalize_title(title) for title in titles]
+    frame = pl.DataFrame(
+        {
+            "pos": np.arange(len(df)),
+            "time": df.time.astype(str).tolist(),
+            "days": _strings(df.days),
+            "instructor": _strings(df.instructor),
+            "course_code": df.course_code.astype(str).tolist(),
+            "course_no": df.course_no.astype(str).tolist(),
+            "section": [section[code] for code in codes],
+            "course_title": _strings(df.course_title),
+            "title_key": [
+                title_keys[code] if code >= 0 else None for code in codes_title
+            ],
+        },
+        schema_overrides={
+            "days": pl.String,
+            "instructor": pl.String,
+            "course_title": pl.String,
+            "title_key": pl.String,
+        },
+    )
+    catalog = get_catalog()
+    meetings = _query(pl, frame, catalog).collect()
+
+    per_row = meetings.unique("pos", keep="first", maintain_order=True)
+    _record_anomalies(df, per_row, report)
+    for col in ("start", "end"):
+        unparsed = per_row.filter(pl.col(col).is_null()).get_column("pos").to_numpy()
+        if len(unparsed):
+            raise ValueError(
+                f"Meetings without a parsed time in rows {df.index[unparsed].tolist()}"
+            )
+    unmapped = per_row.filter(
+        pl.col("curriculum_college").is_null() & pl.col("prefix_college").is_null()
+    )
+    if unmapped.height:
+        courses = list(
+            unmapped.select(
+                "cidno_sess",
+                "course_title",
+                "year",
+                pl.col("course_code").str.to_uppercase(),
+            ).iter_rows()
+        )
+        logger.warning(
+            "Unmapped course encountered: %s\n>> It is not a course that was seen before."
+            "  We need to update the course_colleged variable in file settings.py <<",
+            courses,
+        )
+        suggest_courses(courses, catalog, report)
+
+    take = meetings.get_column("pos").to_numpy()
+    data = df.iloc[take].reset_index(drop=True)
+    college = meetings.get_column("curriculum_college").fill_null(
+        meetings.get_column("prefix_college")
+    )
+    has_college = college.is_not_null().to_numpy()
+    data["time"] = meetings.get_column("time").to_numpy()
+    days = meetings.get_column("days").to_numpy()
+    data["days"] = np.where(pd.isna(days), np.nan, days)
+    data["instructor"] = np.where(
+        meetings.get_column("staff").to_numpy(),
+        "Staff",
+        data.instructor.to_numpy(dtype=object),
+    )
+    data["course_code"] = np.where(
+        df.course_code.isin(list(catalog.code_mapping)).to_numpy()[take],
+        meetings.get_column("course_code").to_numpy(),
+        data.course_code.to_numpy(dtype=object),
+    )
+    data["college"] = np.where(
+        has_college, college.to_numpy(), data.college.to_numpy(dtype=object)
+    )
+    for col in ("cid", "cidno_sess", "year"):
+        data[col] = meetings.get_column(col).to_numpy()
+    data["oldidx"] = df.index[take]
+    data = data.infer_objects()
+    for col in WEEK_TIME_COLUMNS:
+        data.insert(
+            WEEK_TIME_COLUMNS.index(col), col, meetings.get_column(col).to_numpy()
+        )
+
+    if uses_arrow_dtypes(df):
+        data = keep_extension_dtypes(data, df).astype(
+            {
+                "cid": "string[pyarrow]",
+                "cidno_sess": "string[pyarrow]",
+                "year": "category",
+            }
+        )
+    logger.info("Completed the polars stages")
+    return data
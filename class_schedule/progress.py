@@ -0,0 +1,152 @@
+"""Progress of upload jobs, streamed to the browser as Server-Sent Events.
+
+The upload request appends one JSON line per finished stage to a job file;
+the events request follows that file.  Going through the file system lets
+the two requests be served by different gunicorn workers.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+# the steps shown to the user, in the order they complete
+STEPS = ("load", "clean", "times", "college", "expand", "excel", "charts")
+STEP_OF_STAGE = {
+    "loading the sheet": "load",
+    "general cleaning": "clean",
+    "cleaning and harmonizing times": "clean",
+    "special applied epidemiology course": "clean",
+    "normalizing columns": "clean",
+    "arrow dtypes": "clean",
+    "getting start and end times": "times",
+    "building start and end timestamps": "times",
+    "adding duration": "times",
+    "parsing exam times": "times",
+    "harmonizing course codes": "college",
+    "adding course ID, year, and college": "college",
+    "expanding days": "expand",
+    "deriving clock columns": "expand",
+    "building exam records": "expand",
+    # cleans, parses, maps colleges and expands in one query
+    "polars engine": "expand",
+    "writing the workbook": "excel",
+    "drawing the charts": "charts",
+}
+JOB_ID = re.compile(r"[A-Za-z0-9_-]{8,64}")
+POLL_SECONDS = 0.25
+# how long the events wait for the upload to start, or to go on; a rejected
+# upload writes its error event at once
+START_SECONDS = 60
+STALL_SECONDS = 300
+KEEP_ALIVE_SECONDS = 15
+# job files of uploads nobody followed
+MAX_JOB_AGE = 24 * 3600
+
+
+def job_path(folder, job: str) -> Path:
+    """File of the job ``job``; ValueError if it is not a valid job id."""
+    if not isinstance(job, str) or not JOB_ID.fullmatch(job):
+        raise ValueError("A job id is 8 to 64 letters, digits, '-' or '_'.")
+    return Path(folder) / f"{job}.events"
+
+
+@dataclass
+class JobProgress:
+    """Writer of the events of one upload job."""
+
+    path: Path
+    started: float = field(default_factory=time.perf_counter)
+
+    @classmethod
+    def start(cls, folder, job: str) -> "JobProgress":
+        path = job_path(folder, job)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        prune_jobs(path.parent)
+        path.write_text("", encoding="utf-8")
+        progress = cls(path)
+        progress.emit("start", steps=list(STEPS))
+        return progress
+
+    def emit(self, event: str, **data) -> None:
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps({"event": event, **data}) + "\n")
+
+    def stage(self, name: str, rows: int, seconds: float) -> None:
+        """A utilities.stage_listener callback."""
+        self.emit(
+            "stage",
+            stage=name,
+            step=STEP_OF_STAGE.get(name),
+            rows=int(rows),
+            seconds=round(seconds, 3),
+        )
+
+    def done(self, **data) -> None:
+        self.emit("done", seconds=round(time.perf_counter() - self.started, 3), **data)
+
+    def error(self, message: str) -> None:
+        self.emit("error", message=message)
+
+
+def prune_jobs(folder, max_age=MAX_JOB_AGE) -> None:
+    """Remove the job files older than ``max_age`` seconds."""
+    limit = time.time() - max_age
+    for path in Path(folder).glob("*.events"):
+        try:
+            if path.stat().st_mtime < limit:
+                path.unlink()
+        except OSError:
+            pass
+
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def follow_job(path: Path, poll=POLL_SECONDS) -> Iterator[str]:
+    """SSE messages of the job file at ``path``, until its done or error event.
+
+    The file is removed after its last event.  Each stream holds a server
+    thread until then; the keep-alive comments also let the server notice,
+    within KEEP_ALIVE_SECONDS, a browser that went away.
+    """
+    started = last_sent = time.monotonic()
+    while not path.exists():
+        now = time.monotonic()
+        if now - started > START_SECONDS:
+            yield sse("error", {"message": "No upload started for this job."})
+            return
+        if now - last_sent > KEEP_ALIVE_SECONDS:
+            yield ": waiting\n\n"
+            last_sent = now
+        time.sleep(poll)
+
+    with open(path, encoding="utf-8") as fh:
+        pending = ""
+        last_event = last_sent = time.monotonic()
+        while True:
+            pending += fh.readline()
+            if not pending.endswith("\n"):
+                now = time.monotonic()
+                if now - last_event > STALL_SECONDS:
+                    yield sse("error", {"message": "The upload stopped reporting."})
+                    return
+                if now - last_sent > KEEP_ALIVE_SECONDS:
+                    # a comment line keeps proxies from closing the stream
+                    yield ": waiting\n\n"
+                    last_sent = now
+                time.sleep(poll)
+                continue
+            data = json.loads(pending)
+            pending = ""
+            last_event = last_sent = time.monotonic()
+            event = data.pop("event")
+            yield sse(event, data)
+            if event in ("done", "error"):
+                break
+    path.unlink(missing_ok=True)
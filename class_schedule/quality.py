@@ -0,0 +1,92 @@
+"""Data-quality report: the corrections the pipeline made to each row of a schedule.
+
+The stages given a ``report`` dict compute one boolean mask per rule and add
+the rows it selects, with their value before and after the correction, to
+``report["anomalies"]``.  anomaly_frame gathers them for the report sheet
+and anomaly_summary counts them for the JSON summary.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# rule -> what the pipeline corrected, in the order the stages apply them
+RULES = {
+    "repeated_pm": "'pm' written twice in the time",
+    "dots": "'.' written for ':' in the time",
+    "semicolons": "';' written for ':' in the time",
+    "tba_default": "time missing or TBA, set to the 01:01-02:02am placeholder",
+    "meridiem_flip": "am/pm contradicting the end hour, swapped",
+    "erratum": "start or end time mistyped, fixed from utilities.TIME_ERRATUM",
+}
+ANOMALY_COLUMNS = ["no", "rule", "column", "value", "corrected"]
+# rows listed per rule in the summary
+SUMMARY_ROWS = 20
+
+
+def record_anomalies(
+    report: Optional[dict],
+    rule: str,
+    mask,
+    value: pd.Series,
+    corrected: pd.Series,
+    column: str = "time",
+) -> int:
+    """Add the rows of ``mask`` to the report's anomalies; return how many there are.
+
+    ``value`` and ``corrected`` are the column before and after the stage, on
+    the index of ``mask``.  Without a report nothing is recorded.
+    """
+    if rule not in RULES:
+        raise ValueError(f"Unknown data-quality rule {rule!r}")
+    if isinstance(mask, pd.Series):
+        mask = mask.to_numpy(dtype=bool, na_value=False)
+    count = int(np.count_nonzero(mask))
+    if report is None or not count:
+        return count
+    rows = pd.DataFrame(
+        {
+            "no": value.index[mask],
+            "rule": rule,
+            "column": column,
+            "value": value.to_numpy(dtype=object)[mask],
+            "corrected": corrected.to_numpy(dtype=object)[mask],
+        }
+    )
+    report.setdefault("anomalies", []).append(rows)
+    logger.info("%s: %s rows (%s)", rule, count, RULES[rule])
+    return count
+
+
+def anomaly_frame(report: Optional[dict]) -> pd.DataFrame:
+    """The recorded anomalies, one row per corrected cell, by rule."""
+    parts = (report or {}).get("anomalies", [])
+    if not parts:
+        return pd.DataFrame(columns=ANOMALY_COLUMNS)
+    frame = pd.concat(parts, ignore_index=True).loc[:, ANOMALY_COLUMNS]
+    order = frame.rule.map({rule: i for i, rule in enumerate(RULES)})
+    return frame.iloc[np.argsort(order.to_numpy(), kind="stable")].reset_index(drop=True)
+
+
+def anomaly_summary(report: Optional[dict]) -> dict:
+    """Counts of the anomalies by rule, with the first rows of each, as JSON data."""
+    frame = anomaly_frame(report)
+    rules = {}
+    for rule, description in RULES.items():
+        rows = frame.no.loc[frame.rule == rule]
+        rules[rule] = {
+            "description": description,
+            "count": len(rows),
+            "rows": [_json_value(no) for no in rows.iloc[:SUMMARY_ROWS]],
+        }
+    return {"rows": int(frame.no.nunique()), "anomalies": len(frame), "rules": rules}
+
+
+def _json_value(value):
+    return value.item() if isinstance(value, np.generic) else value
@@ -0,0 +1,171 @@
+"""Suggest conflict-free room reassignments for double-booked rooms."""
+
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+import pandas as pd
+
+from class_schedule.conflicts import ConflictState, Meeting, usable_value
+
+logger = logging.getLogger(__name__)
+
+SUGGESTION_COLUMNS = [
+    "rank",
+    "cid",
+    "weekday",
+    "start_time",
+    "end_time",
+    "college",
+    "from_location",
+    "to_location",
+    "same_college",
+    "section_capacity",
+    "room_capacity",
+    "clashed_with",
+    "alternatives",
+]
+
+
+def room_profiles(df: pd.DataFrame) -> pd.DataFrame:
+    """Observed capacity (largest section seen) and main college of every room."""
+    rooms = df.loc[df.location.map(lambda v: usable_value("location", v))]
+    capacity = (
+        pd.to_numeric(rooms.capacity, errors="coerce")
+        if "capacity" in rooms.columns
+        else pd.Series(float("nan"), index=rooms.index)
+    )
+    profiles = pd.DataFrame(
+        {
+            "capacity": capacity.groupby(rooms.location).max(),
+            "college": rooms.groupby("location").college.agg(
+                lambda s: s.mode().iat[0] if s.notna().any() else None
+            ),
+        }
+    )
+    return profiles
+
+
+def _section_info(state: ConflictState) -> tuple[dict, dict]:
+    data = state.data
+    capacity = (
+        pd.to_numeric(data.capacity, errors="coerce")
+        if "capacity" in data.columns
+        else pd.Series(float("nan"), index=data.index)
+    )
+    return capacity.to_dict(), data.college.to_dict()
+
+
+def _candidates(
+    state: ConflictState,
+    meeting: Meeting,
+    profiles: list[tuple],
+    need: float,
+    college: Optional[str],
+) -> list[tuple]:
+    """Free rooms able to host ``meeting``, best first.
+
+    Rooms of the section's college come first, then the tightest fit so large
+    rooms stay available for large sections.
+    """
+    index = state.indexes["location"]
+    ranked = []
+    for room, room_capacity, room_college in profiles:
+        if room == meeting.location:
+            continue
+        if pd.notna(need) and pd.notna(room_capacity) and room_capacity < need:
+            continue
+        if index.overlapping(Meeting(**{**meeting.__dict__, "location": room})):
+            continue
+        same_college = college is not None and room_college == college
+        slack = (
+            room_capacity - need
+            if pd.notna(need) and pd.notna(room_capacity)
+            else float("inf")
+        )
+        ranked.append((not same_college, slack, room, room_capacity, same_college))
+    ranked.sort()
+    return ranked
+
+
+def _pick_mover(state: ConflictState, a: int, b: int, capacity: dict) -> int:
+    """Move the meeting involved in more room clashes, else the smaller, later one."""
+
+    def _key(row):
+        clashes = sum(1 for c in state.by_row.get(row, ()) if c[0] == "location")
+        need = capacity.get(row)
+        need = need if pd.notna(need) else 0
+        return (-clashes, need, -state.meetings[row].start)
+
+    return min((a, b), key=_key)
+
+
+def suggest_room_reassignments(df: pd.DataFrame, n_alternatives: int = 2) -> pd.DataFrame:
+    """Propose one room change per meeting so that no room is double-booked.
+
+    Clashes are handled in time order per day, like a greedy interval-graph
+    colouring: each moved meeting takes the best free room given the moves
+    already proposed, so the fixes are consistent with each other.  The
+    result is ranked, best fixes (same college, tightest fit) first.
+    """
+    state = ConflictState.from_frame(df)
+    profiles = list(room_profiles(state.data).itertuples(name=None))
+    capacity, colleges = _section_info(state)
+
+    room_clashes = sorted(
+        (c for c in state.conflicts if c[0] == "location"),
+        key=lambda c: (state.meetings[c[1]].day, state.meetings[c[1]].start, c),
+    )
+    suggestions = []
+    unresolved = 0
+    for clash in room_clashes:
+        if clash not in state.conflicts:
+            continue  # an earlier move already solved it
+        _, a, b = clash
+        mover = _pick_mover(state, a, b, capacity)
+        other = b if mover == a else a
+        meeting = state.meetings[mover]
+        college = colleges.get(mover)
+        college = college if isinstance(college, str) else None
+        need = capacity.get(mover, float("nan"))
+        candidates = _candidates(state, meeting, profiles, need, college)
+        if not candidates:
+            unresolved += 1
+            continue
+        _, _, room, room_capacity, same_college = candidates[0]
+        state.move(mover, location=room)
+        suggestions.append(
+            {
+                "cid": meeting.cid,
+                "weekday": meeting.day.day_name(),
+                "start_time": pd.Timestamp(meeting.start).strftime("%H:%M"),
+                "end_time": pd.Timestamp(meeting.end).strftime("%H:%M"),
+                "college": college,
+                "from_location": meeting.location,
+                "to_location": room,
+                "same_college": same_college,
+                "section_capacity": capacity.get(mover),
+                "room_capacity": room_capacity,
+                "clashed_with": state.meetings[other].cid,
+                "alternatives": ", ".join(
+                    c[2] for c in candidates[1 : 1 + n_alternatives]
+                ),
+                "_score": candidates[0][:2],
+            }
+        )
+
+    logger.info(
+        "Suggested %s room changes for %s room clashes (%s without a free room)",
+        len(suggestions),
+        len(room_clashes),
+        unresolved,
+    )
+    if not suggestions:
+        return pd.DataFrame(columns=SUGGESTION_COLUMNS)
+    result = pd.DataFrame(suggestions)
+    result = result.iloc[
+        sorted(range(len(result)), key=lambda i: result.at[i, "_score"])
+    ].reset_index(drop=True)
+    result.loc[:, "rank"] = range(1, len(result) + 1)
+    return result.loc[:, SUGGESTION_COLUMNS]
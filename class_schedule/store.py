@@ -0,0 +1,236 @@
+"""Persist processed schedules of every term in a local SQLite database."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_BYTES = 1 << 20
+MEETING_COLUMNS = [
+    "cid",
+    "course_title",
+    "college",
+    "instructor",
+    "location",
+    "weekday",
+    "credit",
+    "sts",
+    "ets",
+    "start_time",
+    "end_time",
+    "minutes",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    term TEXT NOT NULL,
+    upload_id TEXT NOT NULL,
+    sheet TEXT,
+    filename TEXT,
+    created_at TEXT NOT NULL,
+    n_rows INTEGER NOT NULL,
+    PRIMARY KEY (term, upload_id)
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_term ON uploads (term, created_at);
+
+CREATE TABLE IF NOT EXISTS meetings (
+    term TEXT NOT NULL,
+    upload_id TEXT NOT NULL,
+    cid TEXT,
+    course_title TEXT,
+    college TEXT,
+    instructor TEXT,
+    location TEXT,
+    weekday TEXT,
+    credit REAL,
+    sts TEXT,
+    ets TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    minutes INTEGER,
+    FOREIGN KEY (term, upload_id) REFERENCES uploads (term, upload_id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_meetings_slot ON meetings (term, weekday, location, sts);
+CREATE INDEX IF NOT EXISTS idx_meetings_instructor ON meetings (term, instructor);
+CREATE INDEX IF NOT EXISTS idx_meetings_upload ON meetings (upload_id, term);
+
+-- the most recent upload of each term is the one queries look at
+CREATE VIEW IF NOT EXISTS current_uploads AS
+SELECT u.term, u.upload_id, u.created_at
+FROM uploads u
+WHERE u.created_at = (
+    SELECT MAX(created_at) FROM uploads WHERE term = u.term
+);
+"""
+
+
+def content_hash(data) -> str:
+    """Identify an upload by the sha256 of its bytes, or of a binary file read to its end."""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(data).hexdigest()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: data.read(HASH_CHUNK_BYTES), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def connect(db_path) -> sqlite3.Connection:
+    """Open the store, creating the schema on first use."""
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _meeting_rows(df: pd.DataFrame, term: str, upload_id: str):
+    """Yield one parameter tuple per meeting, NULL for columns the frame lacks."""
+    data = df.reindex(columns=MEETING_COLUMNS)
+    if "sts" in df.columns and "ets" in df.columns:
+        sts = pd.to_datetime(df.sts, errors="coerce")
+        ets = pd.to_datetime(df.ets, errors="coerce")
+        data = data.assign(
+            minutes=((ets - sts).dt.total_seconds() // 60).astype("Int64"),
+            sts=sts.dt.strftime("%Y-%m-%d %H:%M"),
+            ets=ets.dt.strftime("%Y-%m-%d %H:%M"),
+        )
+    data = data.astype(object).where(data.notna(), None)
+    for values in data.itertuples(index=False, name=None):
+        yield (term, upload_id, *values)
+
+
+def save_schedule(
+    conn: sqlite3.Connection,
+    df: pd.DataFrame,
+    term: str,
+    upload_id: str,
+    sheet: Optional[str] = None,
+    filename: Optional[str] = None,
+) -> int:
+    """Store a processed schedule as the latest upload of ``term``.
+
+    Re-uploading identical content for the same term replaces the earlier
+    copy instead of duplicating it.  Returns the number of meetings written.
+    """
+    placeholders = ", ".join("?" * (len(MEETING_COLUMNS) + 2))
+    insert = (
+        f"INSERT INTO meetings (term, upload_id, {', '.join(MEETING_COLUMNS)}) "
+        f"VALUES ({placeholders})"
+    )
+    with conn:
+        conn.execute(
+            "DELETE FROM uploads WHERE term = ? AND upload_id = ?", (term, upload_id)
+        )
+        conn.execute(
+            "INSERT INTO uploads (term, upload_id, sheet, filename, created_at, n_rows)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                term,
+                upload_id,
+                sheet,
+                filename,
+                datetime.now().isoformat(timespec="microseconds"),
+                len(df),
+            ),
+        )
+        conn.executemany(insert, _meeting_rows(df, term, upload_id))
+    logger.info(
+        "Stored %s meetings for term %r (upload %s)", len(df), term, upload_id[:12]
+    )
+    return len(df)
+
+
+def list_terms(conn: sqlite3.Connection) -> list[str]:
+    """Return the stored terms, most recently uploaded first."""
+    rows = conn.execute(
+        "SELECT term FROM current_uploads ORDER BY created_at DESC"
+    ).fetchall()
+    return [term for (term,) in rows]
+
+
+def list_uploads(conn: sqlite3.Connection, term: Optional[str] = None) -> pd.DataFrame:
+    query = "SELECT * FROM uploads"
+    params: tuple = ()
+    if term:
+        query += " WHERE term = ?"
+        params = (term,)
+    return pd.read_sql_query(query + " ORDER BY created_at DESC", conn, params=params)
+
+
+def resolve_upload(conn: sqlite3.Connection, prefix: str) -> str:
+    """Expand an upload id prefix (e.g. the first 12 hex digits) to the full id."""
+    # compared literally: LIKE would read "%" and "_" in the prefix as wildcards
+    rows = conn.execute(
+        "SELECT DISTINCT upload_id FROM uploads"
+        " WHERE substr(upload_id, 1, length(?1)) = ?1",
+        (prefix,),
+    ).fetchall()
+    if not rows:
+        raise KeyError(f"No upload matches {prefix!r}")
+    if len(rows) > 1:
+        raise KeyError(f"Upload id {prefix!r} is ambiguous")
+    upload_id: str = rows[0][0]
+    return upload_id
+
+
+def load_schedule(
+    conn: sqlite3.Connection,
+    term: Optional[str] = None,
+    upload_id: Optional[str] = None,
+) -> pd.DataFrame:
+    """Load one upload, by default the current upload of ``term``.
+
+    With ``upload_id`` alone, content stored under several terms is read from
+    the term it was last uploaded for.
+    """
+    if upload_id is None:
+        if term is None:
+            raise ValueError("Either a term or an upload_id is required.")
+        row = conn.execute(
+            "SELECT upload_id FROM current_uploads WHERE term = ?", (term,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"No upload stored for term {term!r}")
+        upload_id = row[0]
+    elif term is None:
+        row = conn.execute(
+            "SELECT term FROM uploads WHERE upload_id = ? ORDER BY created_at DESC",
+            (upload_id,),
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"No upload {upload_id!r}")
+        term = row[0]
+    df = pd.read_sql_query(
+        f"SELECT {', '.join(MEETING_COLUMNS)} FROM meetings"
+        " WHERE upload_id = ? AND term = ?",
+        conn,
+        params=(upload_id, term),
+        parse_dates=["sts", "ets"],
+    )
+    return df.drop(columns=["minutes"])
+
+
+def instructor_load(conn: sqlite3.Connection, last_terms: int = 4) -> pd.DataFrame:
+    """Sections and weekly teaching hours per instructor over the last terms."""
+    query = """
+    SELECT m.term, m.instructor,
+           COUNT(DISTINCT m.cid) AS sections,
+           ROUND(SUM(m.minutes) / 60.0, 2) AS weekly_hours
+    FROM meetings m
+    JOIN (
+        SELECT term, upload_id FROM current_uploads
+        ORDER BY created_at DESC LIMIT ?
+    ) c ON c.term = m.term AND c.upload_id = m.upload_id
+    GROUP BY m.term, m.instructor
+    ORDER BY m.instructor, m.term
+    """
+    return pd.read_sql_query(query, conn, params=(last_terms,))
@@ -0,0 +1,160 @@
+"""Checks and sheet listing of uploaded workbooks, made before their sheets are parsed."""
+
+from __future__ import annotations
+
+import difflib
+import json
+import os
+import re
+import time
+import zipfile
+from pathlib import Path
+from typing import IO, Optional
+
+# first bytes of an .xlsx (a zip archive) and of an .xls (an OLE2 compound file)
+XLSX_SIGNATURE = b"PK\x03\x04"
+XLS_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+WORKBOOK_PART = "xl/workbook.xml"
+# rows read from the top of each sheet to find its header
+HEAD_ROWS = 30
+HEADER_MARKER = re.compile(r"n[o0]\.?")
+INSPECTION_VERSION = 1
+# inspections serve the upload that follows them; older ones are removed
+MAX_INSPECTION_AGE = 24 * 3600
+
+
+def check_workbook(stream: IO[bytes], filename: str, max_unpacked: int) -> None:
+    """Raise ValueError unless ``stream`` holds the kind of workbook ``filename`` says.
+
+    An .xlsx must be a zip archive with a workbook part whose members unpack
+    to at most ``max_unpacked`` bytes; only the zip directory is read.  The
+    stream is left at its start.
+    """
+    stream.seek(0)
+    head = stream.read(len(XLS_SIGNATURE))
+    stream.seek(0)
+    if filename.lower().endswith(".xls"):
+        if not head.startswith(XLS_SIGNATURE):
+            raise ValueError("The .xls file is not an Excel 97-2003 workbook.")
+        return
+    if not head.startswith(XLSX_SIGNATURE):
+        raise ValueError("The .xlsx file is not a zip archive, so not an Excel workbook.")
+    try:
+        with zipfile.ZipFile(stream) as archive:
+            members = archive.infolist()
+    except zipfile.BadZipFile as exc:
+        raise ValueError(f"The .xlsx file is a damaged zip archive: {exc}") from exc
+    finally:
+        stream.seek(0)
+    if WORKBOOK_PART not in {member.filename for member in members}:
+        raise ValueError(f"The .xlsx file has no {WORKBOOK_PART}, so no sheets.")
+    unpacked = sum(member.file_size for member in members)
+    if unpacked > max_unpacked:
+        raise ValueError(
+            f"The workbook unpacks to {unpacked / 2**20:.1f} MB, more than the"
+            f" {max_unpacked / 2**20:.1f} MB allowed."
+        )
+
+
+def _header_row(rows) -> Optional[int]:
+    """Position of the first "No."/"N0." row, or the first with course code and title."""
+    for position, row in enumerate(rows):
+        cells = [str(value).strip().lower() for value in row if value is not None]
+        if any(HEADER_MARKER.fullmatch(cell) for cell in cells):
+            return position
+        if any("course" in cell and "code" in cell for cell in cells) and any(
+            "course" in cell and "title" in cell for cell in cells
+        ):
+            return position
+    return None
+
+
+def inspect_workbook(stream: IO[bytes], head_rows: int = HEAD_ROWS) -> dict:
+    """Sheet names, estimated row counts and header rows of an .xlsx workbook.
+
+    The workbook is opened read-only: the row counts come from the sheets'
+    dimension records and only their first ``head_rows`` rows are read.
+    ``header_row`` is the 1-based sheet row of the header, or None, and
+    ``rows`` the rows below it (below the first row without a header).
+    """
+    import openpyxl
+
+    stream.seek(0)
+    workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        sheets = []
+        for sheet in workbook.worksheets:
+            head = list(sheet.iter_rows(max_row=head_rows, values_only=True))
+            header = _header_row(head)
+            last_row = sheet.max_row
+            if last_row is None:
+                # no dimension record: count the rows read
+                last_row = len(head)
+            sheets.append(
+                {
+                    "name": sheet.title,
+                    "kind": "exam" if "exam" in sheet.title.lower() else "general",
+                    "header_row": None if header is None else header + 1,
+                    "columns": (
+                        []
+                        if header is None
+                        else [
+                            str(value).strip()
+                            for value in head[header]
+                            if value is not None
+                        ]
+                    ),
+                    "rows": max(last_row - (1 if header is None else header + 1), 0),
+                }
+            )
+    finally:
+        workbook.close()
+        stream.seek(0)
+    return {"version": INSPECTION_VERSION, "sheets": sheets}
+
+
+def missing_sheet(sheet: str, sheet_names) -> Optional[str]:
+    """Why ``sheet`` cannot be processed, or None if the workbook has it."""
+    sheet_names = list(sheet_names)
+    if sheet in sheet_names:
+        return None
+    message = f"The workbook has no sheet {sheet!r}; its sheets are {sheet_names}."
+    close = difflib.get_close_matches(sheet, sheet_names, n=1, cutoff=0.6)
+    if close:
+        message += f"  Did you mean {close[0]!r}?"
+    return message
+
+
+def inspection_path(folder, upload_id: str) -> Path:
+    return Path(folder) / f"{upload_id}.json"
+
+
+def load_inspection(folder, upload_id: str) -> Optional[dict]:
+    """The saved inspect_workbook result of the upload ``upload_id``, if any."""
+    try:
+        with open(inspection_path(folder, upload_id), encoding="utf-8") as fh:
+            info = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return info if info.get("version") == INSPECTION_VERSION else None
+
+
+def save_inspection(folder, upload_id: str, info: dict) -> None:
+    path = inspection_path(folder, upload_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    prune_inspections(path.parent)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(info, fh)
+    os.replace(tmp, path)
+
+
+def prune_inspections(folder, max_age=MAX_INSPECTION_AGE) -> None:
+    """Remove the inspections older than ``max_age`` seconds."""
+    limit = time.time() - max_age
+    for path in Path(folder).glob("*.json"):
+        try:
+            if path.stat().st_mtime < limit:
+                path.unlink()
+        except OSError:
+            pass
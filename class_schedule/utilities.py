@@ -1,19 +1,174 @@
 """Des utilities pour gérer le passage du fichier schedule en format traitable et standardisé."""
 
-from typing import List
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import lru_cache, partial
+from operator import methodcaller
+from typing import Callable, List, Optional
 import re
+import time
 import datetime as dt
+import numpy as np
 import pandas as pd
 import logging
 
 logger = logging.getLogger(__name__)
 
+# RE2 (pyarrow) spelling of a run of Python's unicode \s
+WHITESPACE_RUN = r"[\s\v\x{1c}-\x{1f}\x{85}\p{Z}]+"
+# pandas.api.types.infer_dtype labels of columns holding some strings
+TEXT_DTYPES = {"string", "mixed", "mixed-integer", "mixed-integer-float"}
+# text columns with few distinct values, stored as category in arrow mode
+ARROW_CATEGORY_COLUMNS = ("college", "location", "weekday", "year")
 
-def log_offending_rows(df: pd.DataFrame, mask: pd.Series, msg: str) -> None:
-    """Log indices of rows matching a boolean mask."""
-    if mask.any():
-        off_rows = df.loc[mask.fillna(False)]
-        logger.info("%s in rows %s", msg, off_rows.index.tolist())
+
+def normalize_text_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Strip string values and collapse their inner whitespace, column by column.
+
+    Text columns are found by inferred dtype and cleaned with pyarrow compute
+    kernels; in mixed columns only the string cells change.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    for col in df.columns:
+        values = df[col]
+        inferred = pd.api.types.infer_dtype(values, skipna=True)
+        if inferred not in TEXT_DTYPES:
+            continue
+        if inferred == "string":
+            is_text = values.notna().to_numpy()
+        else:
+            is_text = values.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+        text = pa.array(values.to_numpy(dtype=object)[is_text], type=pa.string())
+        text = pc.utf8_trim(pc.replace_substring_regex(text, WHITESPACE_RUN, " "), " ")
+        cleaned = values.to_numpy(dtype=object, copy=True)
+        cleaned[is_text] = text.to_numpy(zero_copy_only=False)
+        df[col] = pd.Series(cleaned, index=values.index, dtype=values.dtype)
+    return df
+
+
+def to_arrow_dtypes(df: pd.DataFrame, categories=ARROW_CATEGORY_COLUMNS) -> pd.DataFrame:
+    """Store pure text columns as string[pyarrow], or category for ``categories``."""
+    for col in df.columns:
+        if pd.api.types.infer_dtype(df[col], skipna=True) != "string":
+            continue
+        df[col] = df[col].astype("category" if col in categories else "string[pyarrow]")
+    return df
+
+
+def uses_arrow_dtypes(df: pd.DataFrame) -> bool:
+    """True for frames loaded with ``arrow_dtypes=True``."""
+    return any(
+        isinstance(dtype, pd.StringDtype) and dtype.storage == "pyarrow"
+        for dtype in df.dtypes
+    )
+
+
+def keep_extension_dtypes(df: pd.DataFrame, source: pd.DataFrame) -> pd.DataFrame:
+    """Give ``df`` back the string/category dtypes its columns had in ``source``."""
+    dtypes = {}
+    for col, dtype in source.dtypes.items():
+        if col not in df.columns or isinstance(df[col].dtype, type(dtype)):
+            continue
+        if isinstance(dtype, pd.StringDtype):
+            dtypes[col] = dtype
+        elif isinstance(dtype, pd.CategoricalDtype):
+            dtypes[col] = "category"
+    return df.astype(dtypes) if dtypes else df
+
+
+def copy_on_write(enabled: bool = True):
+    """Context in which pandas copies data only when a shared frame is written.
+
+    pandas options are process-wide, so the context is not thread-safe: a
+    threaded server sets ``mode.copy_on_write`` once at startup instead.
+    """
+    return pd.option_context("mode.copy_on_write", True) if enabled else nullcontext()
+
+
+def _column_buffer(values) -> tuple[int, int]:
+    """Address and size of the memory holding one column's values."""
+    if isinstance(values, pd.Categorical):
+        values = values.codes
+    elif hasattr(values, "__arrow_array__"):
+        chunks = values.__arrow_array__().chunks
+        if not chunks:
+            return 0, 0
+        data = chunks[0].buffers()[-1]
+        return data.address, values.nbytes
+    data = np.asarray(values)
+    return data.__array_interface__["data"][0], data.nbytes
+
+
+def buffer_spans(df: pd.DataFrame) -> list[tuple[int, int]]:
+    """Memory ranges of the columns of ``df``, to compare with a later frame."""
+    spans = []
+    for _, values in df.items():
+        address, nbytes = _column_buffer(values.array)
+        spans.append((address, address + nbytes))
+    return spans
+
+
+def copied_bytes(spans: list[tuple[int, int]], df: pd.DataFrame) -> int:
+    """Bytes of the columns of ``df`` not lying in any of ``spans``.
+
+    Columns a stage left untouched, or only sliced, share the memory of its
+    input; new columns and copied ones count.
+    """
+    total = 0
+    for _, values in df.items():
+        address, nbytes = _column_buffer(values.array)
+        if not any(start <= address and address + nbytes <= end for start, end in spans):
+            total += nbytes
+    return total
+
+
+# callback(name, rows, seconds) of the stages run in the current context
+_stage_listener: ContextVar = ContextVar("stage_listener", default=None)
+
+
+@contextmanager
+def stage_listener(callback):
+    """Context in which ``callback(name, rows, seconds)`` follows each finished stage."""
+    token = _stage_listener.set(callback)
+    try:
+        yield
+    finally:
+        _stage_listener.reset(token)
+
+
+def notify_stage(name: str, rows: int, seconds: float) -> None:
+    """Tell the stage listener, if any, that the stage ``name`` is done."""
+    callback = _stage_listener.get()
+    if callback is not None:
+        callback(name, rows, seconds)
+
+
+@contextmanager
+def timed_stage(name: str, rows: int):
+    """Time the block and notify it as the stage ``name``, of ``rows`` rows."""
+    start = time.perf_counter()
+    yield
+    notify_stage(name, rows, time.perf_counter() - start)
+
+
+def run_stage(
+    name: str, func, df: pd.DataFrame, report=None, /, **kwargs
+) -> pd.DataFrame:
+    """Run one pipeline stage; with a ``report`` dict add the bytes it copied.
+
+    ``kwargs`` go to ``func``, which may take a ``report`` of its own.  The
+    stage listener is told the rows of the result.
+    """
+    spans = buffer_spans(df) if report is not None else None
+    start = time.perf_counter()
+    df = func(df, **kwargs)
+    notify_stage(name, len(df), time.perf_counter() - start)
+    if spans is not None:
+        copies = report.setdefault("copied_bytes", {})
+        copies[name] = copies.get(name, 0) + copied_bytes(spans, df)
+    return df
 
 
 def conv__hours(tdelta):
@@ -30,6 +185,120 @@ def conv__dt(time_str):
         return False
 
 
+# time given to sections without one (TBA); get_datetimes leaves its meridium alone
+TIME_PLACEHOLDER = "01:01-02:02am"
+# a lowercased time string holding no time: blank, or str() of a missing value
+MISSING_TIME = r"^\s*(?:nan|none|<na>)?\s*$"
+# the normalization of lowercased time strings, applied in order to each string:
+# (kind, pattern, replacement) with kind "replace" (literal), "regex" (re.sub),
+# or "flag", which replaces nothing but marks the strings the regex finds with
+# the data-quality rule in the third column (see quality.RULES).  The polars
+# engine builds its expressions from these rules too, so regexes avoid \A and \Z
+TIME_RULES = (
+    # blank cells and str() of missing values, before "noon" rewrites their n
+    ("flag", MISSING_TIME, "tba_default"),
+    ("regex", MISSING_TIME, TIME_PLACEHOLDER),
+    ("replace", "\u2013", "-"),
+    ("replace", "\u2014", "-"),
+    # "noon" is read as pm to ease the conversion to datetimes
+    ("regex", "no?o?n?", "pm"),
+    # stray duplicates like "pmpm" or "ampm"
+    ("replace", "pmpm", "pm"),
+    ("replace", "ampm", "am"),
+    ("regex", r"(\d) (\d)", r"\1-\2"),
+    ("flag", "pm.*pm", "repeated_pm"),
+    ("flag", r"\.", "dots"),
+    ("flag", ";", "semicolons"),
+    ("replace", " ", ""),
+    ("replace", ".", ":"),
+    ("replace", ";", ":"),
+    ("flag", "tba", "tba_default"),
+    ("replace", "tba", TIME_PLACEHOLDER),
+    ("regex", "(.*)p$", r"\1pm"),
+)
+# distinct time strings whose normalization is remembered
+TIME_MEMO_SIZE = 8192
+
+
+def compile_time_rules(rules=TIME_RULES) -> tuple:
+    """Steps (function, flag) running ``rules``; flag is None for replacements.
+
+    Regexes are compiled once, and runs of one-character literal replacements
+    become one str.translate, unless a character comes out of an earlier one.
+    """
+    steps: list[tuple[Callable, Optional[str]]] = []
+    chars: dict[str, str] = {}
+    for kind, pattern, replacement in rules:
+        if kind == "replace" and len(pattern) == 1:
+            if pattern in chars or any(pattern in new for new in chars.values()):
+                steps.append((methodcaller("translate", str.maketrans(chars)), None))
+                chars = {}
+            chars[pattern] = replacement
+            continue
+        if chars:
+            steps.append((methodcaller("translate", str.maketrans(chars)), None))
+            chars = {}
+        if kind == "replace":
+            steps.append((methodcaller("replace", pattern, replacement), None))
+        elif kind == "regex":
+            steps.append((partial(re.compile(pattern).sub, replacement), None))
+        elif kind == "flag":
+            steps.append((re.compile(pattern).search, replacement))
+        else:
+            raise ValueError(f"Unknown time rule kind {kind!r}")
+    if chars:
+        steps.append((methodcaller("translate", str.maketrans(chars)), None))
+    return tuple(steps)
+
+
+TIME_STEPS = compile_time_rules()
+
+
+def normalize_time(text: str, steps=TIME_STEPS) -> tuple[str, tuple]:
+    """The lowercased ``text`` through the time rules, and the rules it was flagged by."""
+    text = text.lower()
+    flags: tuple[str, ...] = ()
+    for step, flag in steps:
+        if flag is None:
+            text = step(text)
+        elif flag not in flags and step(text):
+            flags += (flag,)
+    return text, flags
+
+
+_memo_normalize_time = lru_cache(maxsize=TIME_MEMO_SIZE)(normalize_time)
+
+
+def normalize_times(times: pd.Series, memoize: bool = True):
+    """Normalized str() of the ``times`` (TIME_RULES) and the mask of each flag.
+
+    Each distinct string goes through the rules once; with ``memoize`` the
+    results are also remembered across calls, for the next upload.
+    """
+    codes, uniques = pd.factorize(times.astype(str))
+    normalize = _memo_normalize_time if memoize else normalize_time
+    results = [normalize(text) for text in uniques]
+    values = np.array([text for text, _ in results], dtype=object)
+    masks: dict[str, np.ndarray] = {}
+    for number, (_, flags) in enumerate(results):
+        for flag in flags:
+            masks.setdefault(flag, np.zeros(len(uniques), dtype=bool))[number] = True
+    masks = {flag: mask[codes] for flag, mask in masks.items()}
+    return pd.Series(values[codes], index=times.index), masks
+
+
+TIME_ERRATUM = {
+    "8:00:": "8:00",
+    "12": "12:00",
+    "12:": "12:00",
+    "930": "9:30",
+    "30": "9:30",
+    ":40": "3:40",
+    "4:": "4:00",
+    "5:4:10": "4:10",
+}
+
+
 def clean(se_time):
     """
     Take care of common mistyped errors in times.
@@ -57,17 +326,7 @@ def clean(se_time):
     stime etime meridium       time
     290  9:00    12       pm  9:00-12pm
     """
-    erratum = {
-        "8:00:": "8:00",
-        "12": "12:00",
-        "12:": "12:00",
-        "930": "9:30",
-        "30": "9:30",
-        ":40": "3:40",
-        "4:": "4:00",
-        "5:4:10": "4:10",
-    }
-    return erratum.get(se_time, se_time)
+    return TIME_ERRATUM.get(se_time, se_time)
 
 
 def split_time_interval(time_inter: str):
@@ -162,6 +421,20 @@ def get_datetimes(row):
     return (stimedt, etimedt)
 
 
+def meridiem_flips(stime: pd.Series, etime: pd.Series, meridium: pd.Series) -> pd.Series:
+    """Mask of the rows whose timestamps get_datetimes builds with a swapped meridium.
+
+    A swap it makes but does not use, as for times reaching 12, is left out.
+    """
+    shour = pd.to_numeric(stime.str.split(":").str[0], errors="coerce")
+    sminute = pd.to_numeric(stime.str.split(":").str[1], errors="coerce")
+    ehour = pd.to_numeric(etime.str.split(":").str[0], errors="coerce")
+    tba = (shour == 1) & (sminute == 1)
+    swapped = ((ehour > 8) & (meridium == "pm")) | ((ehour < 8) & (meridium == "am") & ~tba)
+    # the meridium only counts when both hours are in the same half of the day
+    return swapped & (shour < ehour) & (ehour != 12)
+
+
 def get_week_days(days: str) -> list[str] | None:
     """Given the value of a Days column value return a list of weekdays."""
     # cleaning
@@ -175,6 +448,54 @@ def get_week_days(days: str) -> list[str] | None:
     return week_days
 
 
+# the fake week of build_date starts on Sunday 2025-02-02
+WEEK_START = pd.Timestamp("2025-02-02")
+WEEKDAY_INDEX = {"S": 0, "m": 1, "t": 2, "w": 3, "th": 4, "f": 5, "s": 6}
+WEEKDAY_NAMES = np.array(
+    ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+)
+MINUTES_PER_DAY = 24 * 60
+# compact meeting times: uint8 day of the fake week, int16 minutes since WEEK_START
+WEEK_TIME_COLUMNS = ["wday", "start_mow", "end_mow"]
+
+
+def clock_minutes(times: pd.Series) -> np.ndarray:
+    """Minutes since midnight of datetime-like values."""
+    times = pd.to_datetime(times)
+    if times.isna().any():
+        unparsed = times.index[times.isna()].tolist()
+        raise ValueError(f"Meetings without a parsed time in rows {unparsed}")
+    minutes: np.ndarray = (times.dt.hour * 60 + times.dt.minute).to_numpy(dtype=np.int16)
+    return minutes
+
+
+def _hhmm(minutes: np.ndarray) -> pd.Series:
+    minutes = minutes % MINUTES_PER_DAY
+    hours = pd.Series(minutes // 60).astype(str).str.zfill(2)
+    return hours + ":" + pd.Series(minutes % 60).astype(str).str.zfill(2)
+
+
+def add_clock_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Derive sts/ets, weekday and HH:MM strings from the compact week times."""
+    start = df.start_mow.to_numpy(dtype=np.int64)
+    end = df.end_mow.to_numpy(dtype=np.int64)
+    clock = pd.DataFrame(
+        {
+            "sts": WEEK_START + pd.to_timedelta(start, unit="min"),
+            "ets": WEEK_START + pd.to_timedelta(end, unit="min"),
+            "weekday": WEEKDAY_NAMES[df.wday.to_numpy()],
+            "start_time": _hhmm(start).to_numpy(),
+            "end_time": _hhmm(end).to_numpy(),
+        },
+        index=df.index,
+    )
+    if uses_arrow_dtypes(df):
+        clock = clock.astype(
+            {"weekday": "category", "start_time": "string[pyarrow]", "end_time": "string[pyarrow]"}
+        )
+    return df.assign(**clock)
+
+
 # à finir
 def build_date(week_day: str, ts: pd.Timestamp):
     """
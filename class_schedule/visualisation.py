@@ -1,17 +1,37 @@
-import altair as alt
-from class_schedule.helper import process_schedule
+from __future__ import annotations
+
+import hashlib
+from typing import TYPE_CHECKING
+
+from class_schedule.helper import with_clock_columns
+from class_schedule.utilities import WEEK_TIME_COLUMNS
 import pandas as pd
 
-alt.renderers.set_embed_options(renderer="svg")
+if TYPE_CHECKING:
+    import altair as alt
+
+# (chart kind, weekday) -> (digest of that day's rows, compiled vega-lite spec).
+# Re-uploads only recompile the days whose rows changed.
+_DAY_SPEC_CACHE: dict[tuple[str, str], tuple[str, dict]] = {}
 
 domain = {"start": {}, "end": {}}
 
-room_order = alt.EncodingSortField(field="location", order="ascending")
-instructor_order = alt.EncodingSortField(field="instructor", order="ascending")
+# alt.EncodingSortField specs
+room_order = {"field": "location", "order": "ascending"}
+instructor_order = {"field": "instructor", "order": "ascending"}
 BASE_CHART_WIDTH = 420
 CATEGORY_STEP = 22
 
 
+def _altair():
+    """altair, imported and configured with the first chart rather than with this module."""
+    import altair
+
+    if altair.renderers.options.get("embed_options") is None:
+        altair.renderers.set_embed_options(renderer="svg")
+    return altair
+
+
 def create_visualizations(data, dout="templates"):
     """
     Generates visualizations for class schedules based on instructors, rooms, and weekdays.
@@ -31,12 +51,21 @@ def create_visualizations(data, dout="templates"):
         1. `instructor_final_chart.html` (Instructor-based schedules)
         2. `room_final_chart.html` (Room-based schedules)
     """
+    alt = _altair()
     data = data.copy()
+    if "sts" not in data.columns:
+        # compact meetings: the chart times are derived here
+        data = with_clock_columns(data)
+    data = data.drop(columns=WEEK_TIME_COLUMNS, errors="ignore")
     # > Do I have unknown college ?
     # > give me the cmd to list the lines with na or unknown
+    if isinstance(data.college.dtype, pd.CategoricalDtype) and (
+        "Unknown" not in data.college.cat.categories
+    ):
+        data["college"] = data.college.cat.add_categories(["Unknown"])
     data.loc[:, "college"] = data.college.fillna("Unknown")
 
-    day_gps = data.groupby(["weekday"]).groups
+    day_gps = data.groupby(["weekday"], observed=True).groups
 
     colleges = sorted(data.college.unique())
     weekdays = [
@@ -49,8 +78,8 @@ def create_visualizations(data, dout="templates"):
         "Sunday",
     ]
 
-    clg_instructor_charts = []
-    day_room_charts = []
+    clg_instructor_specs = []
+    day_room_specs = []
 
     # Reference: Altair parameter bindings allow dropdown filters (see official docs
     # https://altair-viz.github.io/user_guide/parameters.html#binding-parameters-to-input-elements)
@@ -63,45 +92,105 @@ def create_visualizations(data, dout="templates"):
     for day in weekdays:
 
         day_df = data.loc[day_gps[day]]
+        digest = _frame_digest(day_df)
 
         # Reference: Explicit time-scale domains keep per-day charts aligned
         # (Altair scale docs: https://altair-viz.github.io/user_guide/customization.html#scales)
         time_scale = alt.Scale(domain=[day_df.sts.min(), day_df.ets.max()], nice=False)
 
-        day_room_chart = make_day_room_chart(day_df, time_scale, title=day)
-        day_room_charts.append(day_room_chart)
+        day_room_specs.append(
+            _day_spec(
+                "room",
+                day,
+                digest,
+                lambda: make_day_room_chart(day_df, time_scale, title=day),
+            )
+        )
+
+        def _clg_instructor_chart():
+            clg_day_charts = []
+            clg_day_gps = day_df.groupby("college", observed=True).groups
 
-        clg_day_charts = []
-        clg_day_gps = day_df.groupby("college").groups
+            for cllg in colleges:
 
-        for cllg in colleges:
+                gp_idx = clg_day_gps.get(cllg, [])
+                if len(gp_idx) != 0:
+                    clg_day_df = data.loc[gp_idx]
 
-            gp_idx = clg_day_gps.get(cllg, [])
-            if len(gp_idx) != 0:
-                clg_day_df = data.loc[gp_idx]
+                    clg_day_chart = make_clg_day_instructor_chart(
+                        clg_day_df, time_scale, title=cllg
+                    )
+                    clg_day_charts.append(clg_day_chart)
 
-                clg_day_chart = make_clg_day_instructor_chart(
-                    clg_day_df, time_scale, title=cllg
-                )
-                clg_day_charts.append(clg_day_chart)
+            return (
+                alt.vconcat(*clg_day_charts)
+                .properties(title=day)
+                .resolve_scale(x="independent")
+            )
 
-        clg_instructor_chart = (
-            alt.vconcat(*clg_day_charts)
-            .properties(title=day)
-            .resolve_scale(x="independent")
+        clg_instructor_specs.append(
+            _day_spec("instructor", day, digest, _clg_instructor_chart)
         )
-        clg_instructor_charts.append(clg_instructor_chart)
         # college_chart.save(f"{day}-colleges_chart.html")
-        instructor_final_chart = alt.hconcat(*clg_instructor_charts)
 
-    instructor_final_chart = instructor_final_chart.resolve_scale(x="independent")
+    _save_hconcat(clg_instructor_specs, f"{dout}/instructor_final_chart.html")
+    _save_hconcat(day_room_specs, f"{dout}/room_final_chart.html")
 
-    instructor_final_chart.save(f"{dout}/instructor_final_chart.html")
+    pass
 
-    room_final_chart = alt.hconcat(*day_room_charts).resolve_scale(x="independent")
-    room_final_chart.save(f"{dout}/room_final_chart.html")
 
-    pass
+def _frame_digest(df: pd.DataFrame) -> str:
+    """Fingerprint the rows and columns a day chart is drawn from."""
+    hashed = pd.util.hash_pandas_object(df, index=False).values
+    h = hashlib.blake2b(hashed.tobytes(), digest_size=16)
+    h.update("|".join(map(str, df.columns)).encode())
+    return h.hexdigest()
+
+
+def _day_spec(kind: str, day: str, digest: str, build) -> dict:
+    """Return the compiled spec of a day chart, rebuilding it only if its rows changed."""
+    cached = _DAY_SPEC_CACHE.get((kind, day))
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+    spec: dict = build().to_dict()
+    _DAY_SPEC_CACHE[(kind, day)] = (digest, spec)
+    return spec
+
+
+def _save_hconcat(specs: list[dict], fout: str):
+    """Write the day specs side by side, each day with its own time axis."""
+    alt = _altair()
+    from altair.utils.mimebundle import spec_to_mimebundle
+
+    datasets = {}
+    children = []
+    schema, config = alt.SCHEMA_URL, None
+    for spec in specs:
+        child = dict(spec)
+        datasets.update(child.pop("datasets", {}))
+        schema = child.pop("$schema", schema)
+        config = child.pop("config", config)
+        children.append(child)
+
+    final_spec = {
+        "$schema": schema,
+        "hconcat": children,
+        "resolve": {"scale": {"x": "independent"}},
+        "datasets": datasets,
+    }
+    if config is not None:
+        final_spec["config"] = config
+
+    html = spec_to_mimebundle(
+        spec=final_spec,
+        format="html",
+        mode="vega-lite",
+        vega_version=alt.VEGA_VERSION,
+        vegaembed_version=alt.VEGAEMBED_VERSION,
+        vegalite_version=alt.VEGALITE_VERSION,
+    )["text/html"]
+    with open(fout, "w", encoding="utf-8") as fh:
+        fh.write(html)
 
 
 def make_day_room_chart(
@@ -109,6 +198,7 @@ def make_day_room_chart(
     time_scale: alt.Scale,
     title: str,
 ):
+    alt = _altair()
     chart_instructors = (
         alt.Chart(day_data_df)
         .mark_bar(opacity=0.5)
@@ -163,6 +253,7 @@ def make_clg_day_instructor_chart(
       data (pd.DataFrame): DataFrame
       time_scale: Earliest and Latest start time and end_time  for this day's data
     """
+    alt = _altair()
     # 2) A chart layer for the instructor’s time-blocks
     chart_instructor = (
         alt.Chart(data)
@@ -0,0 +1,38 @@
+"""Gunicorn settings of the production server.
+
+    gunicorn -c conf/gunicorn.conf.py online_schedule_checker:app
+
+The app is imported once, in the master, and warmed up there (see
+online_schedule_checker.warm_up); the workers are forked from it and share
+its memory pages until they write to them.
+"""
+
+import gc
+import os
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8080')}")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+# Requests served at once: workers * threads (32).  Each upload uses two of
+# them, the POST and its /upload/<job>/events stream, for as long as the
+# upload runs, so at most 16 uploads are followed at a time; the streams of
+# rejected uploads end at once.  The threads mostly wait (on the client or
+# the job file), so raise GUNICORN_THREADS rather than the workers, which
+# each hold a copy of the app.
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+# processing a large schedule and drawing its charts takes a while
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "180"))
+preload_app = True
+accesslog = "-"
+errorlog = "-"
+
+
+def when_ready(server):
+    """Warm the preloaded app up before the workers are forked."""
+    from online_schedule_checker import warm_up
+
+    warm_up()
+    # move the warmed objects out of the collector's generations, so that its
+    # passes in the workers do not write to (and copy) the pages they share
+    gc.collect()
+    gc.freeze()
+    server.log.info("App warmed up; %s objects frozen", gc.get_freeze_count())
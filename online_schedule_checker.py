@@ -1,16 +1,67 @@
+import io
+import json
 import logging
 import os
+import sqlite3
 import sys
+import tempfile
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass, field
 from pathlib import Path
 from datetime import datetime
+from typing import Callable, Generic, Optional, TypeVar
 
-import altair as alt
 import pandas as pd
 from dotenv import load_dotenv
-from flask import Flask, redirect, render_template, request, url_for, send_file
-
-from class_schedule.exam_schedule import process_exam_workbook
-from class_schedule.helper import process_schedule
+from werkzeug.exceptions import RequestEntityTooLarge
+from flask import (
+    Flask,
+    Request,
+    Response,
+    current_app,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    url_for,
+    send_file,
+)
+
+from class_schedule.api import (
+    FILTER_COLUMNS,
+    DEFAULT_PAGE_SIZE,
+    RecordSet,
+    load_record_set,
+    query_records,
+    records_to_arrow,
+    records_to_json,
+    remember_record_set,
+)
+from class_schedule.conflicts import (
+    ConflictState,
+    find_exam_conflicts,
+    find_undated_exams,
+    simulate_moves,
+)
+from class_schedule.diff import diff_schedules, summarize_diff
+from class_schedule.cohorts import find_cohort_clashes
+from class_schedule.exam_schedule import process_exam_sheets, process_exam_workbook
+from class_schedule.helper import RowCache, process_schedule
+from class_schedule.progress import JobProgress, follow_job, job_path
+from class_schedule.quality import anomaly_frame, anomaly_summary
+from class_schedule.rooms import suggest_room_reassignments
+from class_schedule.uploads import (
+    check_workbook,
+    inspect_workbook,
+    load_inspection,
+    missing_sheet,
+    save_inspection,
+)
+from class_schedule.utilities import stage_listener, timed_stage
+from class_schedule import store
+from class_schedule import visualisation
 from class_schedule.visualisation import create_visualizations
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -19,13 +70,148 @@ if str(BASE_DIR) not in sys.path:
 
 load_dotenv()  
 
+
+class UploadRequest(Request):
+    """Request keeping file uploads in memory up to UPLOAD_SPOOL_BYTES, then in a temp file."""
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None, content_length=None
+    ):
+        return tempfile.SpooledTemporaryFile(max_size=current_app.config["UPLOAD_SPOOL_BYTES"])
+
+
 app = Flask(__name__, static_folder="static")
+app.request_class = UploadRequest
 app.config["PROCESSED_FOLDER"] = "./processed"
 app.config["ENV"] = os.getenv("FLASK_ENV", "production")  # Default to production
 app.config["DEBUG"] = app.config["ENV"] == "development"
+# string[pyarrow]/category columns instead of Python objects
+app.config["ARROW_DTYPES"] = os.getenv("ARROW_DTYPES", "0").lower() in ("1", "true", "yes")
+# pandas copy-on-write in the processing pipelines
+app.config["COPY_ON_WRITE"] = os.getenv("COPY_ON_WRITE", "0").lower() in ("1", "true", "yes")
+# pandas options are process-wide: set once here, as the request threads would race
+# on utilities.copy_on_write
+if app.config["COPY_ON_WRITE"]:
+    pd.set_option("mode.copy_on_write", True)
+app.config["SCHEDULE_DB"] = os.getenv(
+    "SCHEDULE_DB", os.path.join(app.config["PROCESSED_FOLDER"], "schedules.sqlite3")
+)
+# larger requests get a 413 before their body is read
+app.config["MAX_CONTENT_LENGTH"] = int(float(os.getenv("MAX_UPLOAD_MB", "32")) * 2**20)
+app.config["UPLOAD_SPOOL_BYTES"] = int(float(os.getenv("UPLOAD_SPOOL_MB", "4")) * 2**20)
+# size of the unzipped parts of an .xlsx, against zip bombs
+app.config["MAX_WORKBOOK_BYTES"] = int(float(os.getenv("MAX_WORKBOOK_MB", "256")) * 2**20)
 
 logging.basicConfig(filename="app.log", level=logging.INFO)
-ACTIVE_TERM = "AY 2025-26 · Semester 2"
+logger = logging.getLogger(__name__)
+# Term used when an upload does not name one; the store remembers every term.
+DEFAULT_TERM = os.getenv("ACTIVE_TERM", "AY 2025-26 · Semester 2")
+
+
+def _open_store():
+    return store.connect(app.config["SCHEDULE_DB"])
+
+
+def _jobs_folder():
+    return os.path.join(app.config["PROCESSED_FOLDER"], "jobs")
+
+
+def _data_quality_path():
+    return os.path.join(app.config["PROCESSED_FOLDER"], "data_quality.json")
+
+
+def _workbooks_folder():
+    """Inspections of uploaded workbooks, by content hash."""
+    return os.path.join(app.config["PROCESSED_FOLDER"], "workbooks")
+
+
+def _get_active_term():
+    """Return the term of the latest stored upload, or the configured default."""
+    try:
+        with closing(_open_store()) as conn:
+            terms = store.list_terms(conn)
+    except sqlite3.Error:
+        logging.exception("Unable to read the schedule store")
+        terms = []
+    return terms[0] if terms else DEFAULT_TERM
+
+
+T = TypeVar("T")
+
+
+@dataclass
+class _DerivedCache(Generic[T]):
+    """A value built from the record set of the processed schedule, shared by threads."""
+
+    record_set: Optional[RecordSet] = None
+    value: Optional[T] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def get(self, record_set: RecordSet, build: Callable[[pd.DataFrame], T]) -> T:
+        """The value of ``record_set``, built once while it is the current one."""
+        with self.lock:
+            if self.record_set is not record_set or self.value is None:
+                self.record_set, self.value = record_set, build(record_set.data)
+            return self.value
+
+    def set(self, record_set: RecordSet, value: T) -> None:
+        """Keep ``value``, already built from ``record_set``."""
+        with self.lock:
+            self.record_set, self.value = record_set, value
+
+
+# conflict state of the processed schedule last simulated on
+_conflict_cache: _DerivedCache[ConflictState] = _DerivedCache()
+
+
+def _get_conflict_state() -> Optional[ConflictState]:
+    """Return the interval indexes of the processed schedule, rebuilt when it changes."""
+    processed_path = os.path.join(app.config["PROCESSED_FOLDER"], "processed_schedule.xlsx")
+    record_set = load_record_set(processed_path)
+    if record_set is None:
+        return None
+    return _conflict_cache.get(record_set, ConflictState.from_frame)
+
+
+# room suggestions of the processed schedule last solved
+_suggestion_cache: _DerivedCache[pd.DataFrame] = _DerivedCache()
+
+
+def _get_room_suggestions() -> Optional[pd.DataFrame]:
+    processed_path = os.path.join(app.config["PROCESSED_FOLDER"], "processed_schedule.xlsx")
+    record_set = load_record_set(processed_path)
+    if record_set is None:
+        return None
+    return _suggestion_cache.get(record_set, suggest_room_reassignments)
+
+
+# one upload at a time writes the processed workbook, the row cache and the charts
+_processing_lock = threading.Lock()
+
+
+def _write_processed_workbook(path, processed_df, extra_sheets):
+    """Save the processed schedule on the first sheet and the reports after it.
+
+    The workbook is written beside ``path`` and moved over it, so the API
+    never reads a half-written file.
+    """
+    fh = tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(path), suffix=".xlsx", delete=False
+    )
+    fh.close()
+    try:
+        with pd.ExcelWriter(fh.name) as writer:
+            processed_df.to_excel(writer, sheet_name="Sheet1", index=False)
+            for sheet_name, frame in extra_sheets.items():
+                frame.to_excel(writer, sheet_name=sheet_name, index=False)
+        os.replace(fh.name, path)
+    except BaseException:
+        Path(fh.name).unlink(missing_ok=True)
+        raise
+
+
+def _records(df):
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
 
 
 def _get_last_generated_timestamp():
@@ -48,6 +234,50 @@ def _get_last_generated_timestamp():
 
     return datetime.fromtimestamp(latest_mtime).strftime("%Y-%m-%d %H:%M")
 
+# a few sections of the general schedule, in the layout of the upload sheet
+WARM_UP_SHEET = [
+    ["No.", "Course Code", "College", "Course No.", "Course Title", "Credit", "Section",
+     "Instructor", "Location/Room", "Days", "Time", "Capacity"],
+    [1, "ACCT", "COBA", 102, "Introduction to Accounting", 3, 1, "Bedell, Gabriel",
+     "AC-30", "MWF", "1:00-2:30pm", 30],
+    [2, "ACCT", "COBA", 202, "Principles of Accounting II", 3, 1, "Moulba, A.P.",
+     "AC-34", "TTH", "8:00-9:30am", 30],
+    [3, "ACCT", "COBA", 201, "Principles of Accounting I", 3, 1, "Staff", "AC-34", "S",
+     "9:30-12:30pm", 30],
+    # TBA meetings are drawn on Sunday; the charts expect every weekday
+    [4, "ACCT", "COBA", 201, "Principles of Accounting I", 3, 2, "Staff", "TBA", "TBA",
+     "TBA", 30],
+]
+
+
+def warm_up():
+    """Run a tiny schedule through the upload pipeline and draw its charts.
+
+    The gunicorn master calls this before forking its workers (see
+    conf/gunicorn.conf.py): the workers then share the imported modules,
+    compiled regexes, course catalog and altair schemas instead of building
+    them on their first upload.  Nothing is written to PROCESSED_FOLDER.
+    """
+    start = time.perf_counter()
+    workbook = io.BytesIO()
+    pd.DataFrame(WARM_UP_SHEET).to_excel(
+        workbook, sheet_name="GENERAL SCHEDULE", header=False, index=False
+    )
+    workbook.seek(0)
+    processed_df = process_schedule(
+        workbook,
+        "GENERAL SCHEDULE",
+        arrow_dtypes=app.config["ARROW_DTYPES"],
+    )
+    suggest_room_reassignments(processed_df)
+    find_cohort_clashes(processed_df)
+    with tempfile.TemporaryDirectory() as dout:
+        create_visualizations(processed_df, dout=dout)
+    # the dummy day charts would never be reused
+    visualisation._DAY_SPEC_CACHE.clear()
+    logger.info("Warmed up in %.2f s", time.perf_counter() - start)
+
+
 ################
 # ROUTE VIEWS  #
 ################
@@ -57,47 +287,218 @@ def index():
     return render_template(
         "index.html",
         titre="William V.S. Tubman Online Schedule Checker",
-        active_term=ACTIVE_TERM,
+        active_term=_get_active_term(),
         last_generated=last_generated,
     )
 
 
+def _process_upload(
+    workbook, filename, normalized_sheet, term, upload_id, header_row=None
+):
+    """Process the uploaded workbook (a pd.ExcelFile), save its reports and draw its charts.
+
+    ``header_row`` is the header row of the general schedule sheet found by /inspect.
+    """
+    reports = {}
+    quality = None
+    if normalized_sheet and "exam" in normalized_sheet.lower():
+        processed_df = process_exam_workbook(
+            workbook,
+            sheet=normalized_sheet,
+            arrow_dtypes=app.config["ARROW_DTYPES"],
+        )
+        # rooms and proctors are shared by the colleges' exam sheets
+        exams = process_exam_sheets(workbook, arrow_dtypes=app.config["ARROW_DTYPES"])
+        reports["exam_clashes"] = find_exam_conflicts(exams)
+        reports["undated_exams"] = find_undated_exams(exams)
+    else:
+        # rows unchanged since the previous upload are spliced from this cache
+        row_cache_path = os.path.join(app.config["PROCESSED_FOLDER"], "row_cache.pkl")
+        row_cache = RowCache.load(row_cache_path)
+        report: dict[str, dict] = {}
+        processed_df = process_schedule(
+            workbook,
+            normalized_sheet or "GENERAL SCHEDULE",
+            cache=row_cache,
+            arrow_dtypes=app.config["ARROW_DTYPES"],
+            report=report,
+            header_row=header_row,
+        )
+        row_cache.save(row_cache_path)
+        # the corrections made to the times, per row and as counts
+        reports["data_quality"] = anomaly_frame(report)
+        quality = anomaly_summary(report)
+
+    # Optionally save the processed file
+    processed_path = os.path.join(app.config["PROCESSED_FOLDER"], "processed_schedule.xlsx")
+
+    with timed_stage("writing the workbook", len(processed_df)):
+        room_suggestions = suggest_room_reassignments(processed_df)
+        clash_matrix, cohort_clashes = find_cohort_clashes(processed_df)
+        _write_processed_workbook(
+            processed_path,
+            processed_df,
+            {
+                "room_suggestions": room_suggestions,
+                "cohort_clash_matrix": clash_matrix,
+                "cohort_clashes": cohort_clashes,
+                **reports,
+            },
+        )
+        if quality is None:
+            Path(_data_quality_path()).unlink(missing_ok=True)
+        else:
+            with open(_data_quality_path(), "w", encoding="utf-8") as fh:
+                json.dump({"upload_id": upload_id, **quality}, fh)
+        _suggestion_cache.set(
+            remember_record_set(processed_path, processed_df), room_suggestions
+        )
+        with closing(_open_store()) as conn:
+            store.save_schedule(
+                conn,
+                processed_df,
+                term=term,
+                upload_id=upload_id,
+                sheet=normalized_sheet,
+                filename=filename,
+            )
+
+    # Generate the charts (and save them as HTML in templates or static)
+    with timed_stage("drawing the charts", len(processed_df)):
+        create_visualizations(processed_df, dout="templates")
+
+
 @app.route("/upload", methods=["POST"])
 def upload_file():
-    """Handles the file upload and triggers processing."""
+    """Handles the file upload and triggers processing.
+
+    With a ``job`` form field the stages are reported, as they finish, to
+    the events of /upload/<job>/events.  A rejected upload ends them with an
+    error event, so the events request does not wait for a job that never
+    starts.
+    """
+    progress: Optional[JobProgress] = None
+
+    def reject(message, code=400):
+        if progress is not None:
+            progress.error(message)
+        return message, code
+
     try:
+        job = request.form.get("job")
+        if job:
+            try:
+                progress = JobProgress.start(_jobs_folder(), job)
+            except ValueError as e:
+                return str(e), 400
+
         fname = request.files.get("file")
         sheet_name = request.form.get("sheet", "GENERAL SCHEDULE")
+        term = (request.form.get("term") or "").strip() or _get_active_term()
 
         if not fname:
-            return "No file uploaded", 400
+            return reject("No file uploaded")
 
         # Validate file type (e.g., ensure it's Excel)
-        if not fname.filename.endswith((".xlsx", ".xls")):
-            return "Invalid file type. Please upload an Excel file.", 400
+        filename = fname.filename or ""
+        if not filename.endswith((".xlsx", ".xls")):
+            return reject("Invalid file type. Please upload an Excel file.")
+        # the upload is in memory, or spooled to a temp file (UploadRequest)
+        try:
+            check_workbook(fname.stream, filename, app.config["MAX_WORKBOOK_BYTES"])
+        except ValueError as e:
+            return reject(str(e))
 
         normalized_sheet = (sheet_name or "").strip()
-
-        if normalized_sheet and "exam" in normalized_sheet.lower():
-            processed_df = process_exam_workbook(fname, sheet=normalized_sheet)
-        else:
-            processed_df = process_schedule(fname, normalized_sheet or "GENERAL SCHEDULE")
-
-        # Optionally save the processed file
-        processed_path = os.path.join(app.config["PROCESSED_FOLDER"], "processed_schedule.xlsx")
-
-        processed_df.to_excel(processed_path, index=False)
-
-        # Generate the charts (and save them as HTML in templates or static)
-
-        create_visualizations(processed_df, dout="templates")
+        sheet = normalized_sheet or "GENERAL SCHEDULE"
+        upload_id = store.content_hash(fname.stream)
+        fname.stream.seek(0)
+        # a workbook sent to /inspect first is not opened to find its sheet missing
+        inspection = load_inspection(_workbooks_folder(), upload_id)
+        header_row = None
+        if inspection is not None:
+            sheet_names = [entry["name"] for entry in inspection["sheets"]]
+            problem = missing_sheet(sheet, sheet_names)
+            if problem:
+                return reject(problem)
+            header_row = inspection["sheets"][sheet_names.index(sheet)]["header_row"]
+
+        # one parsed workbook for the header search and every sheet read
+        listener = progress.stage if progress else None
+        with pd.ExcelFile(fname.stream) as workbook, stage_listener(listener):
+            if inspection is None:
+                problem = missing_sheet(sheet, workbook.sheet_names)
+                if problem:
+                    return reject(problem)
+            # concurrent uploads share the processed files and the caches
+            with _processing_lock:
+                _process_upload(
+                    workbook, filename, normalized_sheet, term, upload_id, header_row
+                )
+        if progress is not None:
+            progress.done(upload_id=upload_id)
 
         # Return a simple text response for the fetch() call
         # (The front-end will interpret this as success and display a link)
-        return "File successfully processed!", 200
+        return "File successfully processed!", 200, {"X-Upload-Id": upload_id}
 
+    except RequestEntityTooLarge:
+        limit = app.config["MAX_CONTENT_LENGTH"] / 2**20
+        return reject(f"The file is larger than the {limit:.1f} MB allowed.", 413)
     except Exception as e:
         logging.exception(f"An error occured: {str(e)}")
+        if progress is not None:
+            progress.error(str(e))
+
+
+@app.route("/inspect", methods=["POST"])
+def inspect_upload():
+    """Sheets of an uploaded .xlsx workbook: names, estimated rows and header rows.
+
+    Only the first rows of each sheet are read.  The result is kept by the
+    workbook's content hash, which /upload then uses to check the sheet asked for.
+    """
+    try:
+        fname = request.files.get("file")
+        if not fname:
+            return "No file uploaded", 400
+        filename = fname.filename or ""
+        if not filename.lower().endswith(".xlsx"):
+            return "Only .xlsx workbooks can be inspected.", 400
+        try:
+            check_workbook(fname.stream, filename, app.config["MAX_WORKBOOK_BYTES"])
+        except ValueError as e:
+            return str(e), 400
+
+        upload_id = store.content_hash(fname.stream)
+        inspection = load_inspection(_workbooks_folder(), upload_id)
+        cached = inspection is not None
+        if inspection is None:
+            try:
+                inspection = inspect_workbook(fname.stream)
+            except Exception as e:
+                # openpyxl raises many kinds of errors on malformed parts
+                return f"The workbook could not be read: {e}", 400
+            save_inspection(_workbooks_folder(), upload_id, inspection)
+        return jsonify(upload_id=upload_id, cached=cached, sheets=inspection["sheets"])
+
+    except RequestEntityTooLarge:
+        limit = app.config["MAX_CONTENT_LENGTH"] / 2**20
+        return f"The file is larger than the {limit:.1f} MB allowed.", 413
+
+
+@app.route("/upload/<job>/events", methods=["GET"])
+def upload_events(job):
+    """Server-Sent Events of the stages of the upload sent with this ``job`` id."""
+    try:
+        path = job_path(_jobs_folder(), job)
+    except ValueError as e:
+        return str(e), 400
+    return Response(
+        follow_job(path),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.route("/view_instructor_chart")
@@ -130,6 +531,198 @@ def download_processed_file():
     )
 
 
+@app.route("/api/schedule", methods=["GET"])
+def api_schedule():
+    """
+    Return the processed schedule as filtered, paginated records.
+
+    Query parameters: any of college, weekday, instructor, location, cid
+    (repeat or comma-separate for several values), fields=a,b to project,
+    limit, cursor (from the previous page) and format=json|arrow.
+    """
+    processed_path = os.path.join(app.config["PROCESSED_FOLDER"], "processed_schedule.xlsx")
+    record_set = load_record_set(processed_path)
+    if record_set is None:
+        return jsonify(error="No processed schedule available."), 404
+
+    filters = {}
+    for col in FILTER_COLUMNS:
+        values = [v for arg in request.args.getlist(col) for v in arg.split(",") if v]
+        if values:
+            filters[col] = values
+    fields = [f for f in request.args.get("fields", "").split(",") if f] or None
+
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+        page, next_cursor, total = query_records(
+            record_set,
+            filters=filters,
+            fields=fields,
+            cursor=request.args.get("cursor"),
+            limit=limit,
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    if request.args.get("format", "json") == "arrow":
+        response = Response(
+            records_to_arrow(page), mimetype="application/vnd.apache.arrow.stream"
+        )
+        response.headers["X-Total-Count"] = str(total)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response
+
+    return jsonify(records=records_to_json(page), next_cursor=next_cursor, total=total)
+
+
+@app.route("/api/data_quality", methods=["GET"])
+def api_data_quality():
+    """Counts of the corrections made to the times of the last general schedule upload.
+
+    The corrected rows are on the data_quality sheet of /download_processed.
+    """
+    try:
+        with open(_data_quality_path(), encoding="utf-8") as fh:
+            return jsonify(json.load(fh))
+    except FileNotFoundError:
+        return jsonify(error="No data-quality report available."), 404
+
+
+@app.route("/api/terms", methods=["GET"])
+def api_terms():
+    """List the stored terms, most recent first."""
+    with closing(_open_store()) as conn:
+        return jsonify(terms=store.list_terms(conn))
+
+
+@app.route("/api/uploads", methods=["GET"])
+def api_uploads():
+    """List stored uploads (content hash, term, sheet, date), optionally for one term."""
+    with closing(_open_store()) as conn:
+        uploads = store.list_uploads(conn, term=request.args.get("term"))
+    return jsonify(uploads=uploads.to_dict(orient="records"))
+
+
+@app.route("/diff", methods=["GET"])
+def diff_uploads():
+    """
+    Compare two stored uploads given by (a prefix of) their content hash:
+    /diff?from=<upload>&to=<upload>
+    """
+    old_id, new_id = request.args.get("from"), request.args.get("to")
+    if not old_id or not new_id:
+        return jsonify(error="Both 'from' and 'to' upload ids are required."), 400
+
+    with closing(_open_store()) as conn:
+        try:
+            old_id = store.resolve_upload(conn, old_id)
+            new_id = store.resolve_upload(conn, new_id)
+        except KeyError as e:
+            return jsonify(error=str(e.args[0])), 404
+        old = store.load_schedule(conn, upload_id=old_id)
+        new = store.load_schedule(conn, upload_id=new_id)
+
+    diff = diff_schedules(old, new)
+    return jsonify(
+        {
+            "from": old_id,
+            "to": new_id,
+            "summary": summarize_diff(diff),
+            "changes": _records(diff),
+        }
+    )
+
+
+@app.route("/api/conflicts", methods=["GET"])
+def api_conflicts():
+    """Room and instructor double-bookings in the processed schedule."""
+    state = _get_conflict_state()
+    if state is None:
+        return jsonify(error="No processed schedule available."), 404
+    return jsonify(conflicts=_records(state.conflict_records(state.conflicts)))
+
+
+@app.route("/api/room_suggestions", methods=["GET"])
+def api_room_suggestions():
+    """Ranked room changes that would remove every room double-booking."""
+    suggestions = _get_room_suggestions()
+    if suggestions is None:
+        return jsonify(error="No processed schedule available."), 404
+    return jsonify(suggestions=_records(suggestions))
+
+
+@app.route("/api/cohort_clashes", methods=["GET"])
+def api_cohort_clashes():
+    """Potential clashes: courses of one college and year level at the same time."""
+    processed_path = os.path.join(app.config["PROCESSED_FOLDER"], "processed_schedule.xlsx")
+    record_set = load_record_set(processed_path)
+    if record_set is None:
+        return jsonify(error="No processed schedule available."), 404
+    matrix, pairs = find_cohort_clashes(record_set.data)
+    return jsonify(matrix=_records(matrix), clashes=_records(pairs))
+
+
+@app.route("/api/exam_conflicts", methods=["GET"])
+def api_exam_conflicts():
+    """Rooms and proctors double-booked across all exam sheets of the last exam upload."""
+    processed_path = os.path.join(app.config["PROCESSED_FOLDER"], "processed_schedule.xlsx")
+    if not os.path.exists(processed_path):
+        return jsonify(error="No processed schedule available."), 404
+    try:
+        clashes = pd.read_excel(processed_path, sheet_name="exam_clashes")
+    except ValueError:
+        return jsonify(error="The processed schedule is not an exam schedule."), 404
+    return jsonify(conflicts=_records(clashes))
+
+
+@app.route("/simulate", methods=["POST"])
+def simulate():
+    """
+    Evaluate proposed moves without touching the processed schedule.
+
+    Body: {"moves": [{"cid": "ACCT_302_s1", "weekday": "Tuesday",
+    "to_weekday": "Thursday", "to_start": "14:00", "to_location": "B12"}]}.
+    Optional move keys: to_end, to_instructor.  A single move object is accepted too.
+    """
+    state = _get_conflict_state()
+    if state is None:
+        return jsonify(error="No processed schedule available."), 404
+
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict) and "moves" in payload:
+        moves = payload["moves"]
+    elif isinstance(payload, dict):
+        moves = [payload]
+    else:
+        moves = payload
+    if not isinstance(moves, list) or not all(isinstance(m, dict) for m in moves):
+        return jsonify(error="Expected a JSON move or a list of moves."), 400
+
+    try:
+        result = simulate_moves(state, moves)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(
+        created=_records(result["created"]),
+        resolved=_records(result["resolved"]),
+        conflicts_before=result["conflicts_before"],
+        conflicts_after=result["conflicts_after"],
+    )
+
+
+@app.route("/api/instructor_load", methods=["GET"])
+def api_instructor_load():
+    """Sections and weekly hours per instructor over the last ``terms`` terms."""
+    try:
+        last_terms = int(request.args.get("terms", 4))
+    except ValueError:
+        return jsonify(error="terms must be an integer"), 400
+    with closing(_open_store()) as conn:
+        load = store.instructor_load(conn, last_terms=last_terms)
+    return jsonify(records=load.to_dict(orient="records"))
+
+
 if __name__ == "__main__":
     # app.run(debug=True)
     app.run(host="0.0.0.0", port=9090)
@@ -6,7 +6,10 @@ APP_MODULE="online_schedule_checker.py"
 IMAGE_NAME="schedule_checker_app:latest"
 
 usage() {
-    echo "Usage: $0 <dev|prod>" >&2
+    echo "Usage: $0 <dev|prod|serve>" >&2
+    echo "  dev    Flask development server on http://127.0.0.1:5000" >&2
+    echo "  prod   build the docker image and run it on port 8080" >&2
+    echo "  serve  gunicorn production server (what the docker image runs)" >&2
     exit 1
 }
 
@@ -38,6 +41,11 @@ case "$MODE" in
         docker build -t "$IMAGE_NAME" .
         docker run --rm -p 8080:8080 "$IMAGE_NAME"
         ;;
+    serve)
+        export PYTHONPATH="$PROJECT_ROOT"
+        cd "$PROJECT_ROOT"
+        exec gunicorn --config conf/gunicorn.conf.py "${APP_MODULE%.py}:app"
+        ;;
     *)
         usage
         ;;
@@ -1,14 +1,106 @@
+function newJobId() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return Date.now().toString(36) + Math.random().toString(36).slice(2, 10);
+}
+
+// Follow the stages of an upload (/upload/<job>/events) on the progress bar.
+function followProgress(job, progressBar, progressLabel) {
+    const events = new EventSource(`/upload/${job}/events`);
+    let steps = [];
+    let reached = 0;
+
+    const show = (fraction) => {
+        const percent = Math.round(100 * fraction);
+        progressBar.style.width = `${percent}%`;
+        progressBar.setAttribute("aria-valuenow", percent);
+    };
+
+    events.addEventListener("start", (event) => {
+        steps = JSON.parse(event.data).steps;
+    });
+    events.addEventListener("stage", (event) => {
+        const stage = JSON.parse(event.data);
+        reached = Math.max(reached, steps.indexOf(stage.step) + 1);
+        if (steps.length) {
+            show(reached / steps.length);
+        }
+        progressLabel.textContent =
+            `${stage.stage}: ${stage.rows} rows in ${stage.seconds.toFixed(2)} s`;
+    });
+    events.addEventListener("done", (event) => {
+        show(1);
+        progressLabel.textContent =
+            `Done in ${JSON.parse(event.data).seconds.toFixed(1)} s`;
+        events.close();
+    });
+    // the job's error event, or a lost connection: the upload response tells the rest
+    events.addEventListener("error", () => events.close());
+
+    show(0);
+    progressLabel.textContent = "Uploading...";
+    return events;
+}
+
+// List the sheets of the chosen workbook (/inspect) as choices of the sheet field.
+function inspectWorkbook(file, sheetInput, sheetNames, sheetHint) {
+    sheetNames.innerHTML = "";
+    sheetHint.textContent = "";
+    if (!file || !file.name.toLowerCase().endsWith(".xlsx")) {
+        return;
+    }
+    const formData = new FormData();
+    formData.append("file", file);
+    fetch("/inspect", { method: "POST", body: formData })
+        .then((response) => (response.ok ? response.json() : null))
+        .then((workbook) => {
+            if (!workbook) {
+                return;
+            }
+            for (const sheet of workbook.sheets) {
+                const option = document.createElement("option");
+                option.value = sheet.name;
+                option.label = `about ${sheet.rows} rows`;
+                sheetNames.appendChild(option);
+            }
+            const names = workbook.sheets.map((sheet) => sheet.name);
+            if (names.length && !names.includes(sheetInput.value.trim())) {
+                sheetInput.value = names[0];
+            }
+            sheetHint.textContent = `Sheets: ${names.join(", ")}`;
+        })
+        .catch(() => {}); // the upload reports what is wrong with the file
+}
+
 document.addEventListener("DOMContentLoaded", function () {
     const form = document.getElementById("uploadForm");
+    const submitButton = form.querySelector("button[type=submit]");
     const spinnerContainer = document.getElementById("spinner-container");
+    const progressBar = document.getElementById("progress-bar");
+    const progressLabel = document.getElementById("progress-label");
     const messageArea = document.getElementById("message-area");
+    const sheetInput = document.getElementById("sheet");
+
+    document.getElementById("file").addEventListener("change", (event) => {
+        inspectWorkbook(
+            event.target.files[0],
+            sheetInput,
+            document.getElementById("sheet-names"),
+            document.getElementById("sheet-hint"),
+        );
+    });
 
     form.addEventListener("submit", function (event) {
         event.preventDefault();
 
+        const job = newJobId();
         const formData = new FormData(form);
+        formData.append("job", job);
         spinnerContainer.style.display = "block"; // show spinner
+        submitButton.disabled = true; // one upload at a time
         messageArea.innerHTML = ""; // clear messages
+        const events = followProgress(job, progressBar, progressLabel);
 
         fetch("/upload", {
             method: "POST",
@@ -38,6 +130,10 @@ document.addEventListener("DOMContentLoaded", function () {
             There was an error uploading the file: ${error}
           </div>
         `;
+            })
+            .finally(() => {
+                events.close();
+                submitButton.disabled = false;
             });
     });
 });
@@ -0,0 +1,106 @@
+"""Small schedule workbooks and the app client shared by the tests."""
+
+import io
+import os
+
+import pandas as pd
+import pytest
+
+SCHEDULE_HEADER = [
+    "No.",
+    "Course Code",
+    "College",
+    "Course No.",
+    "Course Title",
+    "Credit",
+    "Section",
+    "Instructor",
+    "Location/Room",
+    "Days",
+    "Time",
+    "Capacity",
+]
+# one row per spelling of the times the pipeline corrects
+# fmt: off
+SCHEDULE_ROWS = [
+    [1, "ACCT", "COBA", 102, "Introduction to Accounting", 3, 1, "Bedell, Gabriel",
+     "AC-30", "MWF", "1:00-2:30pm", 30],
+    [2, "ACCT", "COBA", 202, "Principles of Accounting II", 3, 1, "Moulba, A.P.",
+     "AC-34", "TTH", "8.00-9:30am", 30],
+    [3, "ACCT", "COBA", 201, "Principles of Accounting I", 3, 1, "staff", "AC-34", "S",
+     "9:30-12:30pm", 30],
+    [4, "ACCT", "COBA", 201, "Principles of Accounting I", 3, 2, "Staff", "TBA", "TBA",
+     "TBA", 30],
+    [5, "ACCT", "COBA", 102, "Introduction to Accounting", 3, 2, "Bedell, Gabriel",
+     "AC-31", "TTH", "11:20-12:50pm", 30],
+    [6, "ACCT", "COBA", 202, "Principles of Accounting II", 3, 2, "Moulba, A.P.",
+     "AC-30", "MW", "4:00-5:20pm pm", 30],
+    [7, "ACCT", "COBA", 102, "Introduction to Accounting", 3, 3, "Bedell, Gabriel",
+     "AC-30", "F", "8;00-9:30am", 30],
+    [8, "ACCT", "COBA", 201, "Principles of Accounting I", 3, 3, "Moulba, A.P.",
+     "AC-31", "MW", "8:00-930am", 30],
+    [9, "ACCT", "COBA", 202, "Principles of Accounting II", 3, 3, "Bedell, Gabriel",
+     "AC-34", "TH", "2:40-4:00 pm", 30],
+    [10, "ACCT", "COBA", 102, "Introduction to Accounting", 3, 4, "Moulba, A.P.",
+     "AC-31", "MWF", "10:00-11:00pm", 30],
+]
+# fmt: on
+
+
+def write_schedule(path, rows, sheet_name="GENERAL SCHEDULE"):
+    """Write ``rows`` under the header of a general schedule sheet at ``path``."""
+    pd.DataFrame([SCHEDULE_HEADER] + rows).to_excel(
+        path, sheet_name=sheet_name, header=False, index=False
+    )
+    return path
+
+
+@pytest.fixture
+def schedule_xlsx(tmp_path):
+    return write_schedule(tmp_path / "schedule.xlsx", SCHEDULE_ROWS)
+
+
+# Monday: AC-30 double-booked (rows 1, 2), Smith teaching rows 1 and 3 at once,
+# and two Freshmen COBA courses (rows 1, 2) overlapping; AC-32 is free
+# fmt: off
+CLASH_ROWS = [
+    [1, "ACCT", "COBA", 101, "Accounting Basics", 3, 1, "Smith, A.", "AC-30", "MW",
+     "8:00-9:30am", 30],
+    [2, "ACCT", "COBA", 102, "Introduction to Accounting", 3, 1, "Jones, B.", "AC-30",
+     "M", "9:00-10:00am", 25],
+    [3, "ACCT", "COBA", 201, "Principles of Accounting I", 3, 1, "Smith, A.", "AC-31",
+     "M", "8:30-9:00am", 20],
+    [4, "ACCT", "COBA", 301, "Cost Accounting", 3, 1, "Staff", "AC-32", "T",
+     "8:00-9:00am", 40],
+]
+# fmt: on
+
+
+@pytest.fixture
+def clash_schedule(tmp_path):
+    """The processed CLASH_ROWS."""
+    from class_schedule.helper import process_schedule
+
+    path = write_schedule(tmp_path / "clashes.xlsx", CLASH_ROWS)
+    return process_schedule(path, "GENERAL SCHEDULE")
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """A test client of the app, writing its files and charts under tmp_path."""
+    import online_schedule_checker
+
+    app = online_schedule_checker.app
+    monkeypatch.setitem(app.config, "PROCESSED_FOLDER", str(tmp_path))
+    monkeypatch.setitem(app.config, "SCHEDULE_DB", str(tmp_path / "s.sqlite3"))
+    # the charts are drawn into ./templates
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "templates").mkdir()
+    return app.test_client()
+
+
+def upload(client, path, **form):
+    """POST the workbook at ``path`` to /upload."""
+    with open(path, "rb") as fh:
+        data = {"file": (io.BytesIO(fh.read()), os.path.basename(path)), **form}
+    return client.post("/upload", data=data)
@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from class_schedule.api import (
+    decode_cursor,
+    encode_cursor,
+    make_record_set,
+    query_records,
+    records_to_arrow,
+    records_to_json,
+)
+
+
+def test_filters_casefold_and_intersect(clash_schedule):
+    record_set = make_record_set(clash_schedule)
+    page, cursor, total = query_records(
+        record_set, {"college": ["coba"], "weekday": ["monday", "Tuesday"]}
+    )
+    assert cursor is None
+    assert total == 4
+    assert set(page.weekday) == {"Monday", "Tuesday"}
+
+    page, _, total = query_records(
+        record_set, {"instructor": ["smith, a.", "nobody"], "location": ["AC-31"]}
+    )
+    assert total == 1
+    assert page.cid.tolist() == ["ACCT_201_s1"]
+
+
+def test_cursor_pages_through_the_matches(clash_schedule):
+    record_set = make_record_set(clash_schedule)
+    filters = {"location": ["ac-30"]}
+    cids, cursor, pages = [], None, 0
+    while True:
+        page, cursor, total = query_records(
+            record_set, filters, fields=["cid"], cursor=cursor, limit=2
+        )
+        cids += page.cid.tolist()
+        pages += 1
+        if cursor is None:
+            break
+    assert (pages, total) == (2, 3)
+    expected = clash_schedule.loc[clash_schedule.location == "AC-30", "cid"].tolist()
+    assert cids == expected
+    assert decode_cursor(encode_cursor(41)) == 41
+    assert decode_cursor(None) == -1
+
+
+def test_invalid_queries(clash_schedule):
+    record_set = make_record_set(clash_schedule)
+    with pytest.raises(ValueError, match="Cannot filter"):
+        query_records(record_set, {"capacity": ["30"]})
+    with pytest.raises(ValueError, match="Unknown fields"):
+        query_records(record_set, fields=["cid", "room"])
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor("not a cursor")
+
+
+def test_serialised_pages(clash_schedule):
+    pa = pytest.importorskip("pyarrow")
+    page, _, _ = query_records(make_record_set(clash_schedule), fields=["cid", "sts"])
+    records = records_to_json(page)
+    assert records[0]["cid"] == "ACCT_101_s1"
+    assert records[0]["sts"].startswith("2025-02-03T08:00:00")
+    table = pa.ipc.open_stream(records_to_arrow(page)).read_all()
+    pd.testing.assert_frame_equal(table.to_pandas(), page.reset_index(drop=True))
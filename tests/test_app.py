@@ -0,0 +1,46 @@
+import threading
+
+import pandas as pd
+
+import online_schedule_checker
+from class_schedule.helper import RowCache, process_schedule
+from conftest import SCHEDULE_ROWS, upload, write_schedule
+
+
+def test_conflict_state_is_built_once_per_schedule(client, schedule_xlsx):
+    assert upload(client, schedule_xlsx, term="T1").status_code == 200
+    first = client.get("/api/conflicts").get_json()
+    state = online_schedule_checker._get_conflict_state()
+    assert state is not None
+    assert client.get("/api/conflicts").get_json() == first
+    assert online_schedule_checker._get_conflict_state() is state
+
+
+def test_room_suggestions_of_the_upload_are_kept(client, schedule_xlsx):
+    assert upload(client, schedule_xlsx, term="T1").status_code == 200
+    suggestions = online_schedule_checker._get_room_suggestions()
+    assert suggestions is not None
+    assert online_schedule_checker._get_room_suggestions() is suggestions
+    assert client.get("/api/room_suggestions").status_code == 200
+
+
+def test_concurrent_uploads(client, schedule_xlsx, tmp_path):
+    other = write_schedule(tmp_path / "other.xlsx", SCHEDULE_ROWS[:-1])
+    codes = []
+
+    def post(path):
+        codes.append(upload(client.application.test_client(), path).status_code)
+
+    threads = [threading.Thread(target=post, args=(p,)) for p in (schedule_xlsx, other)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert codes == [200, 200]
+    # each file is the whole output of one upload, with no temporary file left
+    lengths = {
+        len(process_schedule(p, "GENERAL SCHEDULE")) for p in (schedule_xlsx, other)
+    }
+    assert len(pd.read_excel(tmp_path / "processed_schedule.xlsx")) in lengths
+    assert RowCache.load(tmp_path / "row_cache.pkl").rows is not None
+    assert not list(tmp_path.glob("*.tmp")) and not list(tmp_path.glob("tmp*"))
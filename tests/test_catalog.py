@@ -0,0 +1,28 @@
+import logging
+
+from class_schedule.catalog import CourseCatalog
+
+SETTINGS = """
+course_prefix_college = {"ACCT": "COBA"}
+course_code_mapping = {}
+course_colleged = {
+    ("ACCT101", "Introduction to Accounting", "Freshmen"): "COBA",
+    ("ACCT102", None, "Freshmen"): "COBA",
+    (None, "Cell Biology", "Junior"): "CST",
+}
+"""
+
+
+def test_entries_without_a_key_are_skipped(tmp_path, caplog):
+    path = tmp_path / "settings.py"
+    path.write_text(SETTINGS, encoding="utf-8")
+    with caplog.at_level(logging.WARNING, logger="class_schedule.catalog"):
+        catalog = CourseCatalog.from_settings(path)
+    assert not caplog.records
+    assert list(catalog.colleges) == [
+        ("acct101", "introduction to accounting", "Freshmen")
+    ]
+    assert catalog.lookup("acct101 ", "Introduction  to Accounting", "Freshmen") == "COBA"
+    # an untitled course only matches its own entry, not every untitled entry
+    assert catalog.lookup("ACCT102", None, "Freshmen") == "COBA"
+    assert catalog.lookup("MATH101", None, "Freshmen") is None
@@ -0,0 +1,128 @@
+import datetime
+
+import pandas as pd
+
+from class_schedule.cohorts import find_cohort_clashes
+from class_schedule.conflicts import (
+    ConflictState,
+    find_conflicts,
+    find_exam_conflicts,
+    find_undated_exams,
+    simulate_moves,
+)
+from class_schedule.rooms import suggest_room_reassignments
+
+
+def test_room_and_instructor_conflicts(clash_schedule):
+    conflicts = find_conflicts(clash_schedule)
+    found = {
+        (c.resource, c.value, c.day, c.cid_a, c.cid_b) for c in conflicts.itertuples()
+    }
+    assert found == {
+        ("instructor", "Smith, A.", "Monday", "ACCT_101_s1", "ACCT_201_s1"),
+        ("location", "AC-30", "Monday", "ACCT_101_s1", "ACCT_102_s1"),
+    }
+
+
+def test_simulated_moves_leave_the_state_unchanged(clash_schedule):
+    state = ConflictState.from_frame(clash_schedule)
+    before = set(state.conflicts)
+    result = simulate_moves(state, [{"cid": "ACCT_102_s1", "to_location": "AC-32"}])
+    assert (result["conflicts_before"], result["conflicts_after"]) == (2, 1)
+    assert result["resolved"].resource.tolist() == ["location"]
+    assert result["created"].empty
+    assert state.conflicts == before
+
+
+def test_room_reassignment(clash_schedule):
+    suggestions = suggest_room_reassignments(clash_schedule)
+    assert len(suggestions) == 1
+    fix = suggestions.iloc[0]
+    # the smaller section moves, to the only room free and large enough
+    assert (fix.cid, fix.from_location, fix.to_location) == (
+        "ACCT_102_s1",
+        "AC-30",
+        "AC-32",
+    )
+    assert fix.same_college
+    moved = clash_schedule.copy()
+    moved.loc[moved.cid == fix.cid, "location"] = fix.to_location
+    assert "location" not in set(find_conflicts(moved).resource)
+
+
+def test_cohort_sweep(clash_schedule):
+    matrix, pairs = find_cohort_clashes(clash_schedule)
+    assert pairs.loc[:, ["year", "day", "cid_a", "cid_b"]].values.tolist() == [
+        ["Freshmen", "Monday", "ACCT_101_s1", "ACCT_102_s1"]
+    ]
+    assert matrix.columns.tolist() == [
+        "college",
+        "year",
+        "Monday",
+        "Tuesday",
+        "Wednesday",
+    ]
+    assert matrix.loc[:, ["Monday", "Tuesday", "Wednesday"]].values.tolist() == [
+        [1, 0, 0]
+    ]
+
+
+def test_rooms_and_instructors_are_compared_casefolded(clash_schedule):
+    respelled = clash_schedule.copy()
+    respelled.loc[respelled.cid == "ACCT_102_s1", "location"] = " ac-30"
+    respelled.loc[respelled.cid == "ACCT_201_s1", "instructor"] = "SMITH, A. "
+    conflicts = find_conflicts(respelled)
+    assert sorted(conflicts.resource) == ["instructor", "location"]
+
+
+def _exam(cid, exam_date, start, end, location):
+    day = exam_date or datetime.date(1900, 1, 1)
+    return {
+        "cid": cid,
+        "college": "COBA",
+        "location": location,
+        "instructor": "Staff",
+        "exam_date": exam_date or pd.NaT,
+        "sts": pd.Timestamp.combine(day, datetime.time.fromisoformat(start)),
+        "ets": pd.Timestamp.combine(day, datetime.time.fromisoformat(end)),
+    }
+
+
+def test_undated_exams_do_not_clash():
+    day = datetime.date(2025, 5, 5)
+    exams = pd.DataFrame(
+        [
+            _exam("acct_101_exam_1", day, "09:00", "11:00", "AC-30"),
+            _exam("acct_102_exam_1", day, "10:00", "12:00", "AC-30"),
+            # no date: their times all fall on 1900-01-01
+            _exam("acct_201_exam_1", None, "09:00", "11:00", "AC-30"),
+            _exam("acct_202_exam_1", None, "09:00", "11:00", "AC-30"),
+        ]
+    )
+    clashes = find_exam_conflicts(exams)
+    assert clashes.loc[:, ["exam_date", "cid_a", "cid_b"]].values.tolist() == [
+        ["2025-05-05", "acct_101_exam_1", "acct_102_exam_1"]
+    ]
+    undated = find_undated_exams(exams)
+    assert undated.cid.tolist() == ["acct_201_exam_1", "acct_202_exam_1"]
+    assert undated.start.tolist() == ["09:00", "09:00"]
+
+
+def test_undated_exams_are_left_out_of_the_cohorts():
+    day = datetime.date(2025, 5, 5)
+    rows = [
+        _exam("acct_101_exam_1", day, "09:00", "11:00", "AC-30"),
+        _exam("acct_102_exam_1", day, "10:00", "12:00", "AC-31"),
+        _exam("acct_103_exam_1", None, "09:00", "11:00", "AC-32"),
+        _exam("acct_104_exam_1", None, "09:00", "11:00", "AC-33"),
+    ]
+    exams = pd.DataFrame(rows).assign(
+        course_code="ACCT",
+        course_no=[101, 102, 103, 104],
+        course_title=["Basics", "Introduction", "Payroll", "Ethics"],
+    )
+    matrix, pairs = find_cohort_clashes(exams)
+    assert pairs.loc[:, ["day", "cid_a", "cid_b"]].values.tolist() == [
+        ["2025-05-05", "acct_101_exam_1", "acct_102_exam_1"]
+    ]
+    assert matrix.columns.tolist() == ["college", "year", "2025-05-05"]
@@ -0,0 +1,17 @@
+import pandas as pd
+import pytest
+
+from class_schedule.exam_schedule import parse_exam_times
+
+
+def test_malformed_times_raise_a_value_error():
+    exams = pd.DataFrame(
+        {
+            "day_time": ["Monday (9:00-11:00am)", "Tuesday 9 to 11am"],
+            "exam_date": ["2025-05-05", "2025-05-06"],
+            "instructor": ["Staff", "Smith, A."],
+        }
+    )
+    # process_exam_sheets skips a sheet on a ValueError
+    with pytest.raises(ValueError, match="9to11am"):
+        parse_exam_times(exams)
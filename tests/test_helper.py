@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+from class_schedule.helper import (
+    COMPACT_COLUMNS,
+    iter_schedule_chunks,
+    load_general_schedule,
+    process_schedule,
+)
+
+
+def test_report_collects_copied_bytes(schedule_xlsx):
+    report = {}
+    data = process_schedule(schedule_xlsx, "GENERAL SCHEDULE", report=report)
+    assert data.equals(process_schedule(schedule_xlsx, "GENERAL SCHEDULE"))
+    assert "general cleaning" in report["copied_bytes"]
+
+
+def test_polars_compact_report(schedule_xlsx):
+    pytest.importorskip("polars")
+    report = {}
+    data = process_schedule(
+        schedule_xlsx, "GENERAL SCHEDULE", compact=True, engine="polars", report=report
+    )
+    expected = process_schedule(schedule_xlsx, "GENERAL SCHEDULE", compact=True)
+    assert list(data.columns) == list(COMPACT_COLUMNS)
+    pd.testing.assert_frame_equal(data, expected, check_dtype=False)
+
+
+@pytest.mark.filterwarnings("error::pandas.errors.SettingWithCopyWarning")
+def test_loading_does_not_assign_into_a_view(schedule_xlsx):
+    data = load_general_schedule(schedule_xlsx, "GENERAL SCHEDULE")
+    chunks = list(iter_schedule_chunks(schedule_xlsx, "GENERAL SCHEDULE", chunk_rows=4))
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks), data, check_dtype=False, check_index_type=False
+    )
@@ -0,0 +1,39 @@
+import io
+import json
+
+from class_schedule import progress
+from class_schedule.progress import JobProgress, follow_job, job_path
+
+
+def _events(messages):
+    return [m.split("\n")[0].removeprefix("event: ") for m in messages]
+
+
+def test_follow_job_until_done(tmp_path):
+    job = JobProgress.start(tmp_path, "job-0001")
+    job.stage("general cleaning", 10, 0.1)
+    job.done(upload_id="ab12")
+    messages = list(follow_job(job.path, poll=0.01))
+    assert _events(messages) == ["start", "stage", "done"]
+    assert json.loads(messages[1].split("data: ")[1])["step"] == "clean"
+    assert not job.path.exists()
+
+
+def test_waiting_stream_is_kept_alive(tmp_path, monkeypatch):
+    monkeypatch.setattr(progress, "START_SECONDS", 0.05)
+    monkeypatch.setattr(progress, "KEEP_ALIVE_SECONDS", 0)
+    messages = list(follow_job(job_path(tmp_path, "job-0002"), poll=0.01))
+    assert messages[0] == ": waiting\n\n"
+    assert _events(messages[-1:]) == ["error"]
+
+
+def test_rejected_upload_ends_its_events(client, tmp_path):
+    response = client.post(
+        "/upload",
+        data={"file": (io.BytesIO(b"not a workbook"), "notes.txt"), "job": "job-0003"},
+    )
+    assert response.status_code == 400
+    # the stream ends on the error event instead of waiting START_SECONDS
+    messages = list(follow_job(job_path(tmp_path / "jobs", "job-0003"), poll=0.01))
+    assert _events(messages) == ["start", "error"]
+    assert "Invalid file type" in messages[-1]
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from class_schedule.helper import process_schedule
+from class_schedule.quality import anomaly_frame, anomaly_summary
+from class_schedule.utilities import meridiem_flips
+
+
+def test_anomalies_of_each_rule(schedule_xlsx):
+    report = {}
+    process_schedule(schedule_xlsx, "GENERAL SCHEDULE", report=report)
+    rows = anomaly_frame(report).groupby("rule").no.apply(sorted).to_dict()
+    assert rows == {
+        "dots": [2],
+        "erratum": [8],
+        "meridiem_flip": [10],
+        "repeated_pm": [6],
+        "semicolons": [7],
+        "tba_default": [4],
+    }
+    summary = anomaly_summary(report)
+    assert summary["anomalies"] == 6
+    assert summary["rules"]["tba_default"]["rows"] == [4]
+
+
+def test_meridiem_flips_only_when_the_timestamps_change():
+    times = pd.DataFrame(
+        [
+            ("11:20", "12:50", "pm"),  # reaches noon: the meridium is not used
+            ("9:30", "12:30", "pm"),
+            ("10:00", "11:00", "pm"),  # read as 10-11am
+            ("2:00", "3:30", "am"),  # read as 2-3:30pm
+            ("1:01", "2:02", "am"),  # the TBA placeholder
+            ("11:00", "1:00", "pm"),  # crosses noon: the meridium is not used
+            ("1:00", "2:30", "pm"),
+        ],
+        columns=["stime", "etime", "meridium"],
+    )
+    flips = meridiem_flips(times.stime, times.etime, times.meridium)
+    assert flips.tolist() == [False, False, True, True, False, False, False]
+
+
+def test_engines_report_the_same_anomalies(schedule_xlsx):
+    pytest.importorskip("polars")
+    summaries = {}
+    for engine in ("pandas", "polars"):
+        report = {}
+        process_schedule(schedule_xlsx, "GENERAL SCHEDULE", engine=engine, report=report)
+        summaries[engine] = anomaly_summary(report)
+    assert summaries["polars"] == summaries["pandas"]
+    assert summaries["polars"]["anomalies"] == 6
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from class_schedule import store
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = store.connect(tmp_path / "schedules.db")
+    yield conn
+    conn.close()
+
+
+def test_resolve_upload_prefix(conn):
+    meetings = pd.DataFrame({"cid": ["ACCT_102_s1"]})
+    store.save_schedule(conn, meetings, "2024-1", "ab12cd")
+    store.save_schedule(conn, meetings, "2024-2", "ab12ef")
+    store.save_schedule(conn, meetings, "2024-2", "a_1%ff")
+    assert store.resolve_upload(conn, "ab12c") == "ab12cd"
+    assert store.resolve_upload(conn, "a_1") == "a_1%ff"
+    with pytest.raises(KeyError, match="ambiguous"):
+        store.resolve_upload(conn, "ab12")
+    # "%" and "_" are not wildcards
+    with pytest.raises(KeyError, match="No upload"):
+        store.resolve_upload(conn, "a%")
+    with pytest.raises(KeyError, match="No upload"):
+        store.resolve_upload(conn, "_b12cd")
+
+
+def test_schedule_round_trip(conn, clash_schedule):
+    upload_id = store.content_hash(b"clashes")
+    assert store.save_schedule(conn, clash_schedule, "2024-1", upload_id) == 5
+    loaded = store.load_schedule(conn, "2024-1")
+    columns = [c for c in store.MEETING_COLUMNS if c != "minutes"]
+    expected = clash_schedule.reindex(columns=columns).reset_index(drop=True)
+    pd.testing.assert_frame_equal(loaded, expected, check_dtype=False)
+    by_id = store.load_schedule(
+        conn, upload_id=store.resolve_upload(conn, upload_id[:12])
+    )
+    assert by_id.equals(loaded)
+    assert store.list_terms(conn) == ["2024-1"]
+
+
+def test_saving_the_same_upload_replaces_it(conn, clash_schedule):
+    store.save_schedule(conn, clash_schedule, "2024-1", "ab12")
+    store.save_schedule(conn, clash_schedule.iloc[:2], "2024-1", "ab12")
+    assert len(store.load_schedule(conn, "2024-1")) == 2
+    assert len(store.list_uploads(conn, "2024-1")) == 1
+    with pytest.raises(KeyError):
+        store.load_schedule(conn, "2023-2")
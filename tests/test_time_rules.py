@@ -0,0 +1,85 @@
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from class_schedule.helper import load_general_schedule, process_schedule
+from class_schedule.quality import anomaly_frame
+from class_schedule.utilities import (
+    TIME_PLACEHOLDER,
+    compile_time_rules,
+    normalize_time,
+    normalize_times,
+)
+
+from conftest import SCHEDULE_ROWS, write_schedule
+
+BENCHMARK = Path(__file__).resolve().parent.parent / "benchmarks" / "time_rules.py"
+
+
+@pytest.fixture(scope="module")
+def golden():
+    """benchmarks/time_rules.py: GOLDEN_TIMES and legacy_times, the former chain."""
+    spec = importlib.util.spec_from_file_location("time_rules", BENCHMARK)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def assert_same_as_legacy(golden, times):
+    expected, expected_masks = golden.legacy_times(times)
+    for memoize in (False, True):
+        got, masks = normalize_times(times, memoize=memoize)
+        assert got.tolist() == expected.tolist()
+        for rule in golden.RULES:
+            want = expected_masks[rule].to_numpy(dtype=bool, na_value=False)
+            have = masks.get(rule, np.zeros(len(times), dtype=bool))
+            assert have.tolist() == want.tolist(), rule
+
+
+def test_golden_times(golden):
+    assert_same_as_legacy(golden, pd.Series(golden.GOLDEN_TIMES, dtype=object))
+    assert golden.differences(pd.Series(golden.GOLDEN_TIMES, dtype=object)) == []
+
+
+def test_workbook_times(golden, schedule_xlsx):
+    times = load_general_schedule(schedule_xlsx, "GENERAL SCHEDULE").time
+    assert_same_as_legacy(golden, times)
+
+
+def test_one_character_replacements_are_merged_only_when_independent():
+    merged = compile_time_rules((("replace", "a", "b"), ("replace", "c", "d")))
+    chained = compile_time_rules((("replace", "a", "b"), ("replace", "b", "c")))
+    assert len(merged) == 1
+    assert len(chained) == 2
+    assert normalize_time("abc", chained) == ("ccc", ())
+
+
+def test_unknown_rule_kind():
+    with pytest.raises(ValueError):
+        compile_time_rules((("splice", "a", "b"),))
+
+
+@pytest.mark.parametrize("value", [np.nan, None, pd.NA, "nan", "None", "", "  ", "TBA"])
+def test_missing_time_gets_the_placeholder(value):
+    times, flags = normalize_times(pd.Series([value, "8:00-9:30am"], dtype=object))
+    assert times.tolist() == [TIME_PLACEHOLDER, "8:00-9:30am"]
+    assert flags["tba_default"].tolist() == [True, False]
+
+
+@pytest.mark.parametrize("engine", ["pandas", "polars"])
+def test_blank_time_cell_is_processed_as_tba(tmp_path, engine):
+    if engine == "polars":
+        pytest.importorskip("polars")
+    rows = [
+        row[:10] + [np.nan] + row[11:] if row[0] == 1 else row for row in SCHEDULE_ROWS
+    ]
+    path = write_schedule(tmp_path / "blank.xlsx", rows)
+    report = {}
+    data = process_schedule(path, "GENERAL SCHEDULE", report=report, engine=engine)
+    assert data.loc[data.oldidx == 1, "start_time"].unique().tolist() == ["01:01"]
+    if engine == "pandas":
+        tba = anomaly_frame(report).query("rule == 'tba_default'")
+        assert sorted(tba.no) == [1, 4]
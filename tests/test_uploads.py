@@ -0,0 +1,48 @@
+import os
+import time
+
+import pandas as pd
+
+from class_schedule.helper import load_general_schedule
+from class_schedule.uploads import (
+    MAX_INSPECTION_AGE,
+    inspect_workbook,
+    inspection_path,
+    load_inspection,
+    save_inspection,
+)
+
+from conftest import SCHEDULE_HEADER, SCHEDULE_ROWS
+
+
+def test_inspected_header_row_is_used_to_load(tmp_path):
+    blank = [None] * len(SCHEDULE_HEADER)
+    title = ["Schedule of classes", "Semester 2"] + blank[2:]
+    # the header is on sheet row 4, below two blank rows
+    rows = [blank, blank, title, SCHEDULE_HEADER] + SCHEDULE_ROWS
+    path = tmp_path / "titled.xlsx"
+    pd.DataFrame(rows).to_excel(
+        path, sheet_name="GENERAL SCHEDULE", header=False, index=False
+    )
+    with open(path, "rb") as fh:
+        (sheet,) = inspect_workbook(fh)["sheets"]
+    assert sheet["header_row"] == 4
+
+    searched = load_general_schedule(path, "GENERAL SCHEDULE")
+    assert searched.index.tolist() == list(range(1, 11))
+    inspected = load_general_schedule(path, "GENERAL SCHEDULE", header_row=4)
+    pd.testing.assert_frame_equal(inspected, searched)
+    # a row without the "No." cell is not taken for the header
+    wrong = load_general_schedule(path, "GENERAL SCHEDULE", header_row=3)
+    pd.testing.assert_frame_equal(wrong, searched)
+
+
+def test_old_inspections_are_pruned(tmp_path, schedule_xlsx):
+    with open(schedule_xlsx, "rb") as fh:
+        info = inspect_workbook(fh)
+    save_inspection(tmp_path, "old", info)
+    stale = time.time() - MAX_INSPECTION_AGE - 60
+    os.utime(inspection_path(tmp_path, "old"), (stale, stale))
+    save_inspection(tmp_path, "new", info)
+    assert load_inspection(tmp_path, "old") is None
+    assert load_inspection(tmp_path, "new") == info